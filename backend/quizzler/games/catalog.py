@@ -0,0 +1,267 @@
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Game, Question
+import base64
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+import logging
+
+logger = logging.getLogger('quizzler.games.catalog')
+
+TOKEN_RE = re.compile(r'\w+')
+
+# A match in the title counts more than one in the description, which counts more than one in a question
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 2
+QUESTION_WEIGHT = 1
+
+#what a search result shows, terms is the game's {token: weight} kept for removal
+CatalogEntry = namedtuple('CatalogEntry', ['id', 'title', 'description', 'created_at', 'question_count', 'terms'])
+
+
+def tokenize(text):
+    # Single characters match almost everything and are left out
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+def game_terms(title, description, question_texts):
+    terms = {}
+    for text, weight in [(title, TITLE_WEIGHT), (description, DESCRIPTION_WEIGHT)] + [(text, QUESTION_WEIGHT) for text in question_texts]:
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0) + weight
+    return terms
+
+
+def encode_cursor(score, game_id, idfs):
+    return base64.urlsafe_b64encode(f"{score!r}:{game_id}:{','.join(repr(idf) for idf in idfs)}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Returns (score, game id) of the last result of the previous page and the idf of each
+    query token, in token order, that the score was computed with. None if the cursor is malformed.
+    """
+    try:
+        score, game_id, idfs = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return float(score), int(game_id), tuple(float(idf) for idf in idfs.split(','))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class CatalogIndex:
+    """
+    Inverted index over the titles, descriptions and question texts of public games.
+
+    Every token maps to the games containing it with a weight per game. A search
+    keeps the games that contain all query tokens and ranks them by the sum of
+    weight * idf. Nothing is scanned in the database per search. The index is built
+    on first use, the views report edits through game_changed(), and every
+    sync_interval seconds games edited on other workers are picked up by their updated_at.
+
+    A MySQL FULLTEXT index was the alternative. It cannot cover the question texts,
+    which live in another table, it skips words under innodb_ft_min_token_size and
+    stopwords, and ordering by MATCH() scores every match again for each page.
+    """
+
+    def __init__(self, sync_interval):
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        # token -> {game_id: weight}
+        self.postings = {}
+        # game_id -> CatalogEntry
+        self.entries = {}
+        # token -> [(-weight, -game_id)] sorted, built when a single word is searched and dropped when the token changes
+        self.ranked = {}
+        self.built = False
+        self.synced_at = None
+        self.synced_clock = 0.0
+
+    def add(self, entry):
+        self.remove(entry.id)
+        self.entries[entry.id] = entry
+        for token, weight in entry.terms.items():
+            self.postings.setdefault(token, {})[entry.id] = weight
+            self.ranked.pop(token, None)
+
+    def remove(self, game_id):
+        entry = self.entries.pop(game_id, None)
+        if entry is None:
+            return
+        for token in entry.terms:
+            self.ranked.pop(token, None)
+            games = self.postings.get(token)
+            if games is not None:
+                games.pop(game_id, None)
+                if not games:
+                    del self.postings[token]
+
+    def load(self, games):
+        """
+        Yields a CatalogEntry per game of the queryset, reading games and their questions with one streamed query each.
+        """
+        questions = (
+            Question.objects.filter(game__in=games.values('id'))
+            .order_by('game_id', 'id')
+            .values_list('game_id', 'question_text')
+            .iterator(chunk_size=2000)
+        )
+        question = next(questions, None)
+
+        for game in games.order_by('id').values('id', 'title', 'description', 'created_at').iterator(chunk_size=2000):
+            question_texts = []
+            while question is not None and question[0] <= game['id']:
+                if question[0] == game['id']:
+                    question_texts.append(question[1])
+                question = next(questions, None)
+
+            yield CatalogEntry(
+                game['id'], game['title'], game['description'], game['created_at'], len(question_texts),
+                game_terms(game['title'], game['description'], question_texts),
+            )
+
+    def ensure_fresh(self):
+        if not self.built:
+            self.build()
+        elif time.monotonic() - self.synced_clock >= self.sync_interval:
+            self.sync()
+
+    def build(self):
+        started_at = timezone.now()
+        entries = list(self.load(Game.objects.filter(is_public=True)))
+        with self.lock:
+            if self.built:
+                return
+            for entry in entries:
+                self.add(entry)
+            self.built = True
+            self.synced_at = started_at
+            self.synced_clock = time.monotonic()
+        logger.info(f"[CATALOG] Indexed {len(entries)} public games, {len(self.postings)} tokens")
+
+    def sync(self):
+        # Overlap a little with the previous sync so an edit committed during it is not missed
+        started_at = timezone.now()
+        changed = Game.objects.filter(updated_at__gte=self.synced_at - timedelta(seconds=1))
+        entries = list(self.load(changed.filter(is_public=True)))
+        hidden = list(changed.filter(is_public=False).values_list('id', flat=True))
+        # Deleted games leave no row behind, compare ids instead
+        public_ids = set(Game.objects.filter(is_public=True).values_list('id', flat=True))
+
+        with self.lock:
+            for entry in entries:
+                self.add(entry)
+            for game_id in hidden:
+                self.remove(game_id)
+            for game_id in [game_id for game_id in self.entries if game_id not in public_ids]:
+                self.remove(game_id)
+            self.synced_at = started_at
+            self.synced_clock = time.monotonic()
+
+    def refresh_game(self, game_id):
+        """
+        Reindexes one game after it was created, edited or deleted on this worker.
+        """
+        if not self.built:
+            return
+        entries = list(self.load(Game.objects.filter(id=game_id, is_public=True)))
+        with self.lock:
+            self.remove(game_id)
+            for entry in entries:
+                self.add(entry)
+
+    def search(self, query, cursor=None, limit=20):
+        """
+        Returns (entries with their scores, next cursor or None) for the games matching
+        every token of query, best first. Ties are broken by newest id, so the order
+        is total and cursor pages never skip or repeat a game. The idf depends on the
+        number of public games, so the cursor carries the idfs of its first page and
+        later pages are scored with them even if games were published in between.
+        """
+        self.ensure_fresh()
+        tokens = sorted(set(tokenize(query)))
+        if not tokens:
+            return [], None
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None and len(after[2]) != len(tokens):
+            after = None
+
+        with self.lock:
+            games_per_token = []
+            for token in tokens:
+                games = self.postings.get(token)
+                if not games:
+                    return [], None
+                games_per_token.append((token, games))
+
+            # Start from the rarest token, every other token only filters its games
+            games_per_token.sort(key=lambda item: len(item[1]))
+            total = len(self.entries)
+            token_idfs = dict(zip(tokens, after[2])) if after else {token: math.log(1 + total / len(games)) for token, games in games_per_token}
+            idf = [(games, token_idfs[token]) for token, games in games_per_token]
+
+            if len(games_per_token) == 1:
+                page = self.search_one(*games_per_token[0], idf[0][1], after, limit)
+            else:
+                page = self.search_all(idf, after, limit)
+            results = [(self.entries[-game_id], -score) for score, game_id in page[:limit]]
+
+        next_cursor = None
+        if len(page) > limit:
+            entry, score = results[-1]
+            next_cursor = encode_cursor(score, entry.id, [token_idfs[token] for token in tokens])
+        return results, next_cursor
+
+    def search_one(self, token, games, token_idf, after, limit):
+        """
+        One word ranks by its weight alone, so a page is a slice of the token's games
+        kept sorted by weight. A word found in every game costs no more than a rare one.
+        """
+        ranked = self.ranked.get(token)
+        if ranked is None:
+            ranked = self.ranked[token] = sorted((-weight, -game_id) for game_id, weight in games.items())
+
+        start = 0
+        if after is not None:
+            start = bisect.bisect_right(ranked, (-after[0], -after[1]), key=lambda item: (-round(-item[0] * token_idf, 6), item[1]))
+        return [(-round(-weight * token_idf, 6), game_id) for weight, game_id in ranked[start:start + limit + 1]]
+
+    def search_all(self, idf, after, limit):
+        """
+        Several words: walks the games of the rarest one and keeps those that have all the others.
+        """
+        ranked = []
+        games, first_idf = idf[0]
+        for game_id, weight in games.items():
+            score = weight * first_idf
+            for other_games, token_idf in idf[1:]:
+                other_weight = other_games.get(game_id)
+                if other_weight is None:
+                    break
+                score += other_weight * token_idf
+            else:
+                score = round(score, 6)
+                if after is None or (-score, -game_id) > (-after[0], -after[1]):
+                    ranked.append((-score, -game_id))
+
+        return heapq.nsmallest(limit + 1, ranked)
+
+
+catalog_index = CatalogIndex(getattr(settings, 'CATALOG_SYNC_INTERVAL', 30))
+
+
+def search_catalog(query, cursor=None, limit=20):
+    return catalog_index.search(query, cursor, limit)
+
+
+def game_changed(game_id):
+    """
+    Tells the catalog a game was created, edited or deleted, once the change is committed.
+    """
+    transaction.on_commit(lambda: catalog_index.refresh_game(game_id))
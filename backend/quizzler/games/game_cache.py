@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+import logging
+
+logger = logging.getLogger('quizzler.games.game_cache')
+
+
+def game_etag(game):
+    # version changes with every edit, so the tag changes exactly when the content does
+    return f'"game-{game.id}-v{game.version}"'
+
+
+def etag_matches(request, etag):
+    """
+    True if the request's If-None-Match lists etag, weak tags included.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+def get_game_json(game, build):
+    """
+    Returns the serialized game as JSON bytes from the shared cache, keyed by id and
+    version so an edit never serves stale content and old versions simply expire.
+    build() returns the serializer data on a miss.
+    """
+    key = f"game:{game.id}:v{game.version}"
+    content = cache.get(key)
+    if content is None:
+        content = JSONRenderer().render(build())
+        cache.set(key, content, getattr(settings, 'GAME_CACHE_TIMEOUT', 60 * 60))
+        logger.info(f"[GAME_CACHE] Cached game {game.id} version {game.version}")
+    return content
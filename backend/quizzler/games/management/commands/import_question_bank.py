@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+from games.models import Game
+from games.question_bank import READERS, import_questions
+import json
+
+
+class Command(BaseCommand):
+    help = "Creates a game from a JSONL or CSV question bank, inserting it in chunks and reporting progress. Invalid rows are skipped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Question bank file')
+        parser.add_argument('--owner', required=True, help='Username of the game owner')
+        parser.add_argument('--title', required=True)
+        parser.add_argument('--description', default='')
+        parser.add_argument('--public', action='store_true')
+        parser.add_argument('--format', choices=sorted(READERS), help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, help='Questions per insert, defaults to GAME_IMPORT_CHUNK_SIZE')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_format not in READERS:
+            raise CommandError("Give --format jsonl or csv.")
+
+        try:
+            owner = get_user_model().objects.get(username=options['owner'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['owner']}.")
+
+        game = Game.objects.create(owner=owner, title=options['title'], description=options['description'], is_public=options['public'])
+        reported = 0
+        try:
+            with open(options['path'], 'rb') as stream:
+                for progress in import_questions(game, READERS[file_format](stream), options['chunk_size']):
+                    for error in progress["errors"][reported:]:
+                        self.stderr.write(f"line {error['line']}: {json.dumps(error['error'])}")
+                    reported = len(progress["errors"])
+                    if not progress["done"]:
+                        self.stdout.write(f"chunk {progress['chunk']}: {progress['imported']} imported, {progress['skipped']} skipped")
+        except (serializers.ValidationError, UnicodeDecodeError) as e:
+            game.delete()
+            raise CommandError(str(e))
+
+        if progress["imported"] == 0:
+            game.delete()
+            raise CommandError("No valid questions in the file.")
+        self.stdout.write(f"game {game.id}: {progress['imported']} questions imported, {progress['skipped']} skipped")
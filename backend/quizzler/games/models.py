@@ -11,6 +11,17 @@ class Game(models.Model):
     description = models.CharField(max_length=5000, blank=True, default='', validators=[MinLengthValidator(1), MaxLengthValidator(5000)])
     is_public = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    #bumped by every edit, caches of the game are keyed on it
+    version = models.PositiveIntegerField(default=1)
+    #lets the public catalog of other workers pick up edits
+    updated_at = models.DateTimeField(auto_now=True)
+
+    #listings read a user's games or the public ones, newest first
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-created_at'], name='game_owner_created_idx'),
+            models.Index(fields=['is_public', '-created_at'], name='game_public_created_idx'),
+        ]
 
     #custom string for admin or debugging
     def __str__(self):
@@ -34,6 +45,12 @@ class Choice(models.Model):
     choice_text = models.CharField(max_length = 255, validators=[MinLengthValidator(1), MaxLengthValidator(50)])
     is_correct = models.BooleanField(default=False)
 
+    #answer key lookups read the correct choice of a question
+    class Meta:
+        indexes = [
+            models.Index(fields=['question', 'is_correct'], name='choice_question_correct_idx'),
+        ]
+
     def __str__(self):
         return self.choice_text
     #choice text shown 
@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class GameCursorPagination(CursorPagination):
+    """
+    Newest games first. The cursor encodes a position instead of an offset, so pages
+    stay stable while games are added and a page costs the same however deep it is.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from .models import Question, Choice
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger('quizzler.games.question_bank')
+
+CHOICES_PER_QUESTION = 4
+CSV_COLUMNS = ['question_text', 'choice_1', 'choice_2', 'choice_3', 'choice_4', 'correct']
+
+
+def validate_choices(choices_data):
+    """
+    A question has exactly CHOICES_PER_QUESTION choices and exactly one of them is correct.
+    """
+    if len(choices_data) != CHOICES_PER_QUESTION:
+        raise serializers.ValidationError("Questions must have 4 choices.")
+
+    correct_count = sum(1 for choice in choices_data if choice.get('is_correct'))
+    if correct_count != 1:
+        raise serializers.ValidationError("Each question must have exactly one correct choice.")
+
+
+def insert_questions(game, questions_data):
+    """
+    Inserts validated questions and their choices with two bulk INSERTs instead of one per row.
+    questions_data is a list of {"question_text", "choices": [{"choice_text", "is_correct"}, ...]}.
+    """
+    questions = Question.objects.bulk_create(
+        [Question(game=game, question_text=question_data['question_text']) for question_data in questions_data]
+    )
+
+    # MySQL does not return the new ids from a bulk insert, they are the game's newest rows in insert order
+    if questions and questions[0].pk is None:
+        ids = list(Question.objects.filter(game=game).order_by('-id').values_list('id', flat=True)[:len(questions)])
+        for question, question_id in zip(questions, reversed(ids)):
+            question.pk = question_id
+
+    Choice.objects.bulk_create([
+        Choice(question_id=question.pk, choice_text=choice_data['choice_text'], is_correct=choice_data.get('is_correct', False))
+        for question, question_data in zip(questions, questions_data)
+        for choice_data in question_data['choices']
+    ])
+    return questions
+
+
+def read_jsonl(stream):
+    """
+    Yields (line number, question) from a binary stream with one question per line,
+    in the same shape the create-game API takes.
+    """
+    for line_number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def read_csv(stream):
+    """
+    Yields (line number, question) from a binary CSV stream with the columns
+    question_text, choice_1 to choice_4 and correct (the number of the correct choice).
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+    if reader.fieldnames is None or any(column not in reader.fieldnames for column in CSV_COLUMNS):
+        raise serializers.ValidationError(f"CSV header must contain {', '.join(CSV_COLUMNS)}.")
+
+    for row in reader:
+        correct = (row.get('correct') or '').strip()
+        yield reader.line_num, {
+            "question_text": row['question_text'],
+            "choices": [
+                {"choice_text": row[f'choice_{number}'], "is_correct": correct == str(number)}
+                for number in range(1, 5)
+            ],
+        }
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def import_questions(game, rows, chunk_size=None, max_errors=None):
+    """
+    Adds the questions read from rows to game, chunk_size at a time. Each chunk is
+    validated, then inserted in bulk in its own transaction, so memory stays bounded
+    and a bad row only skips itself. Yields a progress dict after every chunk:
+    {"chunk", "imported", "skipped", "errors", "done"} with running totals and the
+    first max_errors errors as {"line", "error"}. The last one has done set.
+    """
+    # Imported here to avoid a circular import, the serializers use the helpers above
+    from .serializers import QuestionSerializer
+
+    chunk_size = chunk_size or getattr(settings, 'GAME_IMPORT_CHUNK_SIZE', 500)
+    max_errors = max_errors if max_errors is not None else getattr(settings, 'GAME_IMPORT_MAX_ERRORS', 50)
+    progress = {"chunk": 0, "imported": 0, "skipped": 0, "errors": []}
+
+    def add_error(line_number, error):
+        progress["skipped"] += 1
+        if len(progress["errors"]) < max_errors:
+            progress["errors"].append({"line": line_number, "error": error})
+
+    def flush(chunk):
+        with transaction.atomic():
+            insert_questions(game, chunk)
+        progress["chunk"] += 1
+        progress["imported"] += len(chunk)
+        logger.info(f"[IMPORT] Game {game.id}: chunk {progress['chunk']}, {progress['imported']} imported, {progress['skipped']} skipped")
+
+    chunk = []
+    for line_number, row in rows:
+        if isinstance(row, Exception):
+            add_error(line_number, str(row))
+            continue
+
+        serializer = QuestionSerializer(data=row)
+        if not serializer.is_valid():
+            add_error(line_number, serializer.errors)
+            continue
+        try:
+            validate_choices(serializer.validated_data['choices'])
+        except serializers.ValidationError as e:
+            add_error(line_number, e.detail[0])
+            continue
+
+        chunk.append(serializer.validated_data)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+            yield dict(progress, done=False)
+
+    if chunk:
+        flush(chunk)
+    yield dict(progress, done=True)
@@ -0,0 +1,120 @@
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from .models import Choice
+import threading
+import logging
+
+logger = logging.getLogger('quizzler.games.question_pack')
+
+#a single compiled question, choices is a tuple of (choice_text, is_correct) pairs
+PackedQuestion = namedtuple('PackedQuestion', ['question_id', 'question_text', 'choices', 'correct_index', 'correct_choice_text', 'broadcast_data'])
+
+
+class QuestionPack:
+    """
+    Immutable, indexed copy of a game's questions used by live sessions.
+    Grading an answer is a tuple index plus a string comparison.
+    """
+    __slots__ = ('game_id', 'questions')
+
+    def __init__(self, game_id, questions):
+        self.game_id = game_id
+        self.questions = tuple(questions)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def get(self, question_index):
+        if not isinstance(question_index, int) or question_index < 0 or question_index >= len(self.questions):
+            return None
+        return self.questions[question_index]
+
+    def is_correct(self, question_index, selected_answer):
+        question = self.get(question_index)
+        return question is not None and question.correct_choice_text is not None and question.correct_choice_text == selected_answer
+
+    @classmethod
+    def build(cls, game_id):
+        """
+        Compiles the pack with a single query over the game's choices joined to their questions.
+        """
+        rows = (
+            Choice.objects
+            .filter(question__game_id=game_id)
+            .order_by('question_id', 'id')
+            .values_list('question_id', 'question__question_text', 'choice_text', 'is_correct')
+        )
+
+        grouped = OrderedDict()
+        for question_id, question_text, choice_text, is_correct in rows:
+            if question_id not in grouped:
+                grouped[question_id] = (question_text, [])
+            grouped[question_id][1].append((choice_text, is_correct))
+
+        questions = []
+        for question_id, (question_text, choices) in grouped.items():
+            correct_index = next((index for index, (_, is_correct) in enumerate(choices) if is_correct), None)
+            correct_choice_text = choices[correct_index][0] if correct_index is not None else None
+            broadcast_data = {
+                "question_text": question_text,
+                "choices": [{"choice_text": choice_text, "is_correct": is_correct} for choice_text, is_correct in choices],
+            }
+            questions.append(PackedQuestion(question_id, question_text, tuple(choices), correct_index, correct_choice_text, broadcast_data))
+
+        return cls(game_id, questions)
+
+
+class QuestionPackCache:
+    """
+    Bounded LRU cache of compiled question packs keyed by (game id, game version).
+    Every edit bumps the game's version, so a worker that never heard of the edit
+    still compiles a fresh pack for the next session of the game.
+    Accessed from sync_to_async worker threads, so every operation holds a lock.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.packs = OrderedDict()
+        self.lock = threading.Lock()
+        # bumped on every invalidation so a pack built from stale rows is not stored
+        self.generation = 0
+
+    def get(self, game_id, version):
+        key = (game_id, version)
+        with self.lock:
+            pack = self.packs.get(key)
+            if pack is not None:
+                self.packs.move_to_end(key)
+                return pack
+            generation = self.generation
+
+        # Build outside the lock so a slow query does not block other games
+        pack = QuestionPack.build(game_id)
+        logger.info(f"[QUESTION_PACK] Compiled pack for game {game_id} v{version} with {len(pack)} questions")
+
+        with self.lock:
+            if generation != self.generation:
+                return pack
+            self.packs[key] = pack
+            self.packs.move_to_end(key)
+            while len(self.packs) > self.max_size:
+                self.packs.popitem(last=False)
+        return pack
+
+    def invalidate(self, game_id):
+        # Older versions are never asked for again, free them now instead of waiting for the LRU
+        with self.lock:
+            self.generation += 1
+            for key in [key for key in self.packs if key[0] == game_id]:
+                del self.packs[key]
+
+
+question_pack_cache = QuestionPackCache(getattr(settings, 'QUESTION_PACK_CACHE_SIZE', 256))
+
+
+def get_question_pack(game_id, version):
+    return question_pack_cache.get(game_id, version)
+
+
+def invalidate_question_pack(game_id):
+    question_pack_cache.invalidate(game_id)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Game, Question, Choice
 from django.db import transaction
+from .question_bank import validate_choices, insert_questions
 
 
 class ChoiceSerializer(serializers.ModelSerializer):
@@ -21,7 +22,16 @@ class GameSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Game
-        fields = ['id', 'title', 'description', 'is_public', 'questions']
+        fields = ['id', 'title', 'description', 'is_public', 'version', 'questions']
+
+
+class GameSummarySerializer(serializers.ModelSerializer):
+    # annotated by the view, see RetrieveUserGamesView
+    question_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Game
+        fields = ['id', 'title', 'description', 'is_public', 'created_at', 'question_count']
 
 
 
@@ -45,35 +55,36 @@ class CreateGameSerializer(serializers.ModelSerializer):
         # this is done to ensure the logged in user is logged as owner of the game when created
         user = self.context['request'].user
 
+        # Check every question before writing anything
+        for question in questions_data:
+            validate_choices(question['choices'])
+
         # Create game as an atomic transaction to avoid creating questions and choices without an parent game in case of failure/interruption
+        # Questions and choices go in with one bulk INSERT each, not one per row
         with transaction.atomic():
             game = Game.objects.create(owner=user, **validated_data)
+            insert_questions(game, questions_data)
 
-            for question in questions_data:
-                # pop choices data, choices_data contains a list of dictionaries, where each index is a choice formatted as a dicitonary
-                # eg. [{'choice_text': 'Obama', 'is_correct': True},{'choice_text': 'Washington', 'is_correct': False},{'choice_text': 'Rosevelt', 'is_correct': False}]
-                choices_data = question.pop('choices')
-                
-
-                #  -- Validating Choices meet bounds --
-                if len(choices_data) != 4:
-                    raise serializers.ValidationError("Questions must have 4 choices.")
-
-                # Count of ccorrect choices has to be 1 and only 1, raise error if not
-                correct_count = 0
-                for choice in choices_data:
-                    if choice.get('is_correct'):
-                        correct_count += 1
-                if correct_count != 1:
-                    raise serializers.ValidationError("Each question must have exactly one correct choice.")
+        return game
+    
 
-                question = Question.objects.create(game=game, question_text=question['question_text'])
 
-                for choice_data in choices_data:
-                    Choice.objects.create(question=question, **choice_data)
+class ImportGameSerializer(serializers.ModelSerializer):
+    file = serializers.FileField()
+    # taken from the file name when not given
+    format = serializers.ChoiceField(choices=['jsonl', 'csv'], required=False)
 
-        return game
-    
+    class Meta:
+        model = Game
+        fields = ['title', 'description', 'is_public', 'file', 'format']
+
+    def validate(self, data):
+        if 'format' not in data:
+            extension = data['file'].name.rsplit('.', 1)[-1].lower()
+            if extension not in ('jsonl', 'csv'):
+                raise serializers.ValidationError("Give a format, jsonl or csv.")
+            data['format'] = extension
+        return data
 
 
 class GameUpdateSerializer(serializers.ModelSerializer):
@@ -1,3 +1,336 @@
-from django.test import TestCase
+import json
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from authentication.models import CustomUser
+from .catalog import CatalogEntry, CatalogIndex, decode_cursor, encode_cursor, game_terms
+from .models import Choice, Game, Question
+from .question_bank import import_questions, insert_questions
 
-# Create your tests here.
+
+def catalog_with(games):
+    """
+    Index of (game id, title, description, question texts) tuples, without touching the database.
+    """
+    index = CatalogIndex(sync_interval=float('inf'))
+    index.built = True
+    for game_id, title, description, question_texts in games:
+        index.add(CatalogEntry(game_id, title, description, None, len(question_texts), game_terms(title, description, question_texts)))
+    return index
+
+
+def game_with_questions(owner, count, title="Game"):
+    game = Game.objects.create(owner=owner, title=title)
+    insert_questions(game, [
+        {"question_text": f"Question {index}", "choices": [{"choice_text": f"Choice {letter}", "is_correct": letter == "a"} for letter in "abcd"]}
+        for index in range(count)
+    ])
+    return game
+
+
+def all_pages(index, query, limit):
+    ids = []
+    cursor = None
+    while True:
+        results, cursor = index.search(query, cursor, limit)
+        ids.extend(entry.id for entry, _ in results)
+        if cursor is None:
+            return ids
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(12.5, 7, [0.5, 1.25])), (12.5, 7, (0.5, 1.25)))
+
+    def test_malformed_cursor(self):
+        self.assertIsNone(decode_cursor("not a cursor"))
+        # Valid base64 of "not:an:x"
+        self.assertIsNone(decode_cursor("bm90OmFuOng="))
+
+
+class CatalogRankingTests(SimpleTestCase):
+    def test_title_outranks_description_and_questions(self):
+        index = catalog_with([
+            (1, "Rivers", "", ["Which planet is red?"]),
+            (2, "Space", "All about the planet", []),
+            (3, "Planet quiz", "", []),
+        ])
+        results, cursor = index.search("planet")
+
+        self.assertEqual([entry.id for entry, _ in results], [3, 2, 1])
+        self.assertIsNone(cursor)
+
+    def test_every_word_must_match(self):
+        index = catalog_with([
+            (1, "Ocean animals", "", []),
+            (2, "Ocean plants", "", []),
+            (3, "Farm animals", "", []),
+        ])
+        results, _ = index.search("animals ocean")
+        self.assertEqual([entry.id for entry, _ in results], [1])
+        self.assertEqual(index.search("animals space"), ([], None))
+
+    def test_rare_words_weigh_more(self):
+        # Games 1 and 4 have the same weights, rome is in fewer games so its title match counts more
+        index = catalog_with([
+            (1, "Rome", "history", []),
+            (2, "History", "egypt", []),
+            (3, "History", "greece", []),
+            (4, "History", "rome", []),
+        ])
+        results, _ = index.search("history rome")
+        self.assertEqual([entry.id for entry, _ in results], [1, 4])
+
+    def test_ties_go_to_the_newest_game(self):
+        index = catalog_with([(game_id, "Trivia", "", []) for game_id in (4, 9, 2)])
+        results, _ = index.search("trivia")
+        self.assertEqual([entry.id for entry, _ in results], [9, 4, 2])
+
+    def test_removed_games_are_not_found(self):
+        index = catalog_with([(1, "Trivia night", "", []), (2, "Trivia", "", [])])
+        index.remove(1)
+        results, _ = index.search("trivia")
+        self.assertEqual([entry.id for entry, _ in results], [2])
+        self.assertEqual(index.search("night"), ([], None))
+
+
+class CatalogPaginationTests(SimpleTestCase):
+    games = [
+        (game_id, "Quiz" if game_id % 3 else "Quiz quiz", "music" if game_id % 2 else "", ["quiz"] * (game_id % 4))
+        for game_id in range(1, 48)
+    ]
+
+    def test_one_word_pages_match_the_full_ranking(self):
+        index = catalog_with(self.games)
+        everything, cursor = index.search("quiz", limit=100)
+        self.assertIsNone(cursor)
+
+        for limit in (1, 5, 7, 46, 47):
+            self.assertEqual(all_pages(index, "quiz", limit), [entry.id for entry, _ in everything])
+
+    def test_several_word_pages_match_the_full_ranking(self):
+        index = catalog_with(self.games)
+        everything, _ = index.search("quiz music", limit=100)
+        self.assertEqual(len(everything), 24)
+
+        for limit in (1, 5, 23, 24):
+            self.assertEqual(all_pages(index, "quiz music", limit), [entry.id for entry, _ in everything])
+
+    def test_one_word_cursor_between_equal_scores(self):
+        # Every game has the same weight, the bisect has to continue by id inside the tie
+        index = catalog_with([(game_id, "Trivia", "", []) for game_id in range(1, 11)])
+        first, cursor = index.search("trivia", limit=4)
+        second, _ = index.search("trivia", cursor, limit=4)
+
+        self.assertEqual([entry.id for entry, _ in first], [10, 9, 8, 7])
+        self.assertEqual([entry.id for entry, _ in second], [6, 5, 4, 3])
+
+    def test_removal_between_pages_skips_nothing(self):
+        index = catalog_with(self.games)
+        everything = all_pages(index, "quiz", 100)
+        first, cursor = index.search("quiz", limit=10)
+
+        # A game on the first page is deleted, the next pages come from a rebuilt sorted list
+        index.remove(first[3][0].id)
+        seen = [entry.id for entry, _ in first]
+        while cursor is not None:
+            results, cursor = index.search("quiz", cursor, 10)
+            seen.extend(entry.id for entry, _ in results)
+
+        self.assertEqual(seen, everything)
+
+    def test_publishing_between_pages_skips_nothing(self):
+        for query in ("quiz", "quiz music"):
+            index = catalog_with(self.games)
+            everything = all_pages(index, query, 100)
+            first, cursor = index.search(query, limit=10)
+
+            # More public games change every idf, the cursor keeps scoring on the first page's scale
+            for game_id in range(100, 130):
+                index.add(CatalogEntry(game_id, "Geography", "", None, 0, game_terms("Geography", "", [])))
+            seen = [entry.id for entry, _ in first]
+            while cursor is not None:
+                results, cursor = index.search(query, cursor, 10)
+                seen.extend(entry.id for entry, _ in results)
+
+            self.assertEqual(seen, everything)
+
+
+class UserGamesListingTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(email="owner@example.com", password="pw", username="owner")
+        other = CustomUser.objects.create_user(email="other@example.com", password="pw", username="other")
+        game_with_questions(other, 1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_summary_pages_cover_every_game_newest_first(self):
+        games = [game_with_questions(self.owner, index % 3, title=f"Game {index}") for index in range(7)]
+
+        seen = []
+        url = reverse('my-games') + '?view=summary&page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend((game["id"], game["question_count"]) for game in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(seen, [(game.id, index % 3) for index, game in reversed(list(enumerate(games)))])
+
+    def test_summary_page_costs_one_query_however_many_games(self):
+        for count in (2, 12):
+            Game.objects.filter(owner=self.owner).delete()
+            for index in range(count):
+                game_with_questions(self.owner, 3)
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse('my-games') + '?view=summary')
+            self.assertEqual(len(response.data["results"]), count)
+
+    def test_full_listing_costs_three_queries_however_many_questions(self):
+        for count in (1, 10):
+            Game.objects.filter(owner=self.owner).delete()
+            for index in range(count):
+                game_with_questions(self.owner, count)
+            with self.assertNumQueries(3):
+                response = self.client.get(reverse('my-games'))
+            self.assertEqual([len(game["questions"]) for game in response.data], [count] * count)
+
+
+def question_row(text, correct=0):
+    return {"question_text": text, "choices": [{"choice_text": f"{text} {number}", "is_correct": number == correct} for number in range(4)]}
+
+
+class QuestionBankTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(email="owner@example.com", password="pw", username="owner")
+        self.game = Game.objects.create(owner=self.owner, title="Bank")
+
+    def assertChoicesFollowTheirQuestions(self):
+        for question in Question.objects.filter(game=self.game):
+            self.assertEqual(sorted(choice.choice_text for choice in question.choices.all()), [f"{question.question_text} {number}" for number in range(4)])
+
+    def test_insert_links_every_choice_to_its_question_with_two_inserts(self):
+        # Without ids returned from the bulk insert, as on MySQL, one SELECT reads them back
+        with self.assertNumQueries(2 if connection.features.can_return_rows_from_bulk_insert else 3):
+            questions = insert_questions(self.game, [question_row(f"Q{index}") for index in range(30)])
+
+        self.assertEqual([question.question_text for question in questions], [f"Q{index}" for index in range(30)])
+        self.assertEqual(Choice.objects.filter(question__game=self.game).count(), 120)
+        self.assertChoicesFollowTheirQuestions()
+
+    def test_import_inserts_in_chunks_and_skips_bad_rows(self):
+        rows = [(line, question_row(f"Q{line}")) for line in range(1, 6)]
+        rows.insert(2, (9, question_row("Bad", correct=None)))
+        rows.insert(4, (10, ValueError("Invalid JSON")))
+
+        progress = list(import_questions(self.game, rows, chunk_size=2))
+
+        self.assertEqual([(step["chunk"], step["imported"], step["done"]) for step in progress], [(1, 2, False), (2, 4, False), (3, 5, True)])
+        self.assertEqual(progress[-1]["skipped"], 2)
+        self.assertEqual([error["line"] for error in progress[-1]["errors"]], [9, 10])
+        self.assertEqual(list(Question.objects.filter(game=self.game).order_by('id').values_list('question_text', flat=True)), [f"Q{line}" for line in range(1, 6)])
+        self.assertChoicesFollowTheirQuestions()
+
+    @override_settings(GAME_IMPORT_CHUNK_SIZE=2)
+    def test_import_view_reads_a_csv_upload(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        lines = ["question_text,choice_1,choice_2,choice_3,choice_4,correct"] + [f"Q{index},a,b,c,d,{index % 4 + 1}" for index in range(5)] + ["Broken,a,b,c,d,9"]
+        upload = SimpleUploadedFile("bank.csv", "\n".join(lines).encode(), content_type="text/csv")
+
+        response = client.post(reverse('import-game'), {"title": "Imported", "file": upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["imported"], response.data["skipped"], response.data["chunks"]), (5, 1, 3))
+        game = Game.objects.get(id=response.data["game_id"])
+        for index, question in enumerate(game.questions.order_by('id')):
+            self.assertEqual(question.choices.get(is_correct=True).choice_text, "abcd"[index % 4])
+
+
+class RetrieveGameTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = CustomUser.objects.create_user(email="owner@example.com", password="pw", username="owner")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.game = game_with_questions(self.owner, 3)
+        self.url = reverse('retrieve-game', args=[self.game.id])
+
+    def test_matching_etag_is_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+
+        for header in (first['ETag'], f"W/{first['ETag']}", f'"other", {first["ETag"]}'):
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_cached_game_costs_one_query(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+
+    def test_edit_changes_the_etag_and_the_content(self):
+        first = self.client.get(self.url)
+        self.client.patch(reverse('update-game', args=[self.game.id]), {"updated_game": {"title": "Renamed"}}, format='json')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(json.loads(response.content)["title"], "Renamed")
+
+    def test_private_game_of_another_user_is_forbidden(self):
+        stranger = CustomUser.objects.create_user(email="stranger@example.com", password="pw", username="stranger")
+        client = APIClient()
+        client.force_authenticate(stranger)
+        self.assertEqual(client.get(self.url).status_code, 403)
+
+
+class UpdateGameTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(email="owner@example.com", password="pw", username="owner")
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.game = game_with_questions(self.owner, 2)
+        self.question = self.game.questions.order_by('id').first()
+        self.choices = list(self.question.choices.order_by('id'))
+
+    def patch(self, payload):
+        return self.client.patch(reverse('update-game', args=[self.game.id]), payload, format='json')
+
+    def test_edit_keeping_four_choices_is_applied(self):
+        response = self.patch({
+            "updated_game": {"title": "Renamed"},
+            "updated_choices": [{"id": self.choices[1].id, "choice_text": "Changed"}],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.game.refresh_from_db()
+        self.assertEqual((self.game.title, self.game.version), ("Renamed", 2))
+
+    def test_deleting_a_choice_rolls_back_the_whole_edit(self):
+        response = self.patch({
+            "updated_game": {"title": "Renamed"},
+            "updated_questions": [{"id": self.question.id, "question_text": "Changed"}],
+            "deleted_choices": [self.choices[3].id],
+            "new_questions": [{"question_text": "New", "choices": [{"choice_text": letter, "is_correct": letter == "a"} for letter in "abcd"]}],
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.game.refresh_from_db()
+        self.question.refresh_from_db()
+        self.assertEqual((self.game.title, self.game.version), ("Game", 1))
+        self.assertEqual(self.question.question_text, "Question 0")
+        self.assertEqual(self.question.choices.count(), 4)
+        self.assertEqual(self.game.questions.count(), 2)
+
+    def test_deleting_every_choice_is_rejected(self):
+        response = self.patch({"deleted_choices": [choice.id for choice in self.choices]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Choice.objects.filter(question=self.question).count(), 4)
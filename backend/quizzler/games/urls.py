@@ -1,14 +1,18 @@
 from django.urls import path
-from .views import CreateGameView, UpdateGameView, RetrieveUserGamesView, DeleteGameView, RetrieveSingleGameView
+from .views import CreateGameView, ImportGameView, UpdateGameView, RetrieveUserGamesView, DeleteGameView, RetrieveSingleGameView, PublicCatalogView
 
 
 urlpatterns = [
     # Create game API
     path('create-game/', CreateGameView.as_view(), name='create-game'),
+    # Import question bank API
+    path('import-game/', ImportGameView.as_view(), name='import-game'),
     # Update game API
     path('<int:game_id>/update-game/', UpdateGameView.as_view(), name='update-game'),
     # Retrieve user games API
     path('my-games/', RetrieveUserGamesView.as_view(), name='my-games'),
+    # Public game catalog and search API
+    path('catalog/', PublicCatalogView.as_view(), name='catalog'),
     # Delete game API
     path('<int:game_id>/delete/', DeleteGameView.as_view(), name='delete-game'),
     # Retrieve single game API
@@ -4,8 +4,30 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 
-from .serializers import CreateGameSerializer, GameUpdateSerializer, QuestionUpdateSerializer, ChoiceUpdateSerializer, GameSerializer
+from urllib.parse import urlencode
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.db.models import Count, Prefetch, Q
+
+from .serializers import CreateGameSerializer, GameUpdateSerializer, QuestionUpdateSerializer, ChoiceUpdateSerializer, GameSerializer, GameSummarySerializer, ImportGameSerializer, QuestionSerializer
 from .models import Game, Question, Choice
+from .pagination import GameCursorPagination
+from .question_pack import invalidate_question_pack
+from .catalog import search_catalog, game_changed
+from .game_cache import game_etag, etag_matches, get_game_json
+from .question_bank import CHOICES_PER_QUESTION, READERS, import_questions, insert_questions, validate_choices
+from rest_framework import serializers
+
+
+def with_questions(games):
+    """
+    Prefetches questions and choices for GameSerializer, three queries however many games and questions there are.
+    """
+    return games.prefetch_related(
+        Prefetch('questions', queryset=Question.objects.order_by('id').prefetch_related(
+            Prefetch('choices', queryset=Choice.objects.order_by('id'))
+        ))
+    )
 
 class CreateGameView(APIView):
     permission_classes = [IsAuthenticated] #only users that are logged in can access..
@@ -14,85 +36,155 @@ class CreateGameView(APIView):
         serializer = CreateGameSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             game = serializer.save()
+            game_changed(game.id)
             return Response({"game_id": game.id}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UpdateGameView(APIView):
+def rollback_response(data, status_code):
+    """
+    Returns an error from inside transaction.atomic() without committing what was already written.
+    """
+    transaction.set_rollback(True)
+    return Response(data, status=status_code)
+
+
+class ImportGameView(APIView):
+    """
+    Creates a game from an uploaded question bank, JSONL or CSV, read and inserted in
+    chunks. Rows that fail validation are skipped and reported, the rest are kept.
+    """
     permission_classes = [IsAuthenticated]
 
-    def patch(self, request, game_id):
+    def post(self, request):
+        serializer = ImportGameSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = serializer.validated_data.pop('file')
+        reader = READERS[serializer.validated_data.pop('format')]
+        game = Game.objects.create(owner=request.user, **serializer.validated_data)
+
         try:
-            game = Game.objects.get(id=game_id, owner=request.user)
-        except Game.DoesNotExist:
-            return Response({'error': 'Game not found'}, status=404)
+            for progress in import_questions(game, reader(upload.file)):
+                pass
+        except serializers.ValidationError as e:
+            game.delete()
+            return Response({'error': e.detail[0]}, status=status.HTTP_400_BAD_REQUEST)
+        except UnicodeDecodeError:
+            game.delete()
+            return Response({'error': 'The file is not UTF-8 text.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if progress["imported"] == 0:
+            game.delete()
+            return Response({'error': 'No valid questions in the file.', 'errors': progress["errors"]}, status=status.HTTP_400_BAD_REQUEST)
 
+        game_changed(game.id)
+
+        return Response({
+            "game_id": game.id,
+            "imported": progress["imported"],
+            "skipped": progress["skipped"],
+            "chunks": progress["chunk"],
+            "errors": progress["errors"],
+        }, status=status.HTTP_201_CREATED)
+
+
+class UpdateGameView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request, game_id):
         data = request.data
         updated_game = data.get('updated_game')
         updated_questions = data.get('updated_questions', [])
         updated_choices = data.get('updated_choices', [])
         deleted_questions = data.get('deleted_questions', [])
         deleted_choices = data.get('deleted_choices', [])
+        new_questions = data.get('new_questions', [])
 
-        # Update game (title and/or is public)
-        if updated_game:
-            serializer = GameUpdateSerializer(game, data=updated_game, partial=True)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-
-        # Update questions (textual content)
-        for question_data in updated_questions:
-            try:
-                question = Question.objects.get(id=question_data['id'], game=game)
-            except:
-                return Response({'error': 'Question not found'}, status=404)
-            serializer = QuestionUpdateSerializer(question, data=question_data, partial=True)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-
-        # Update choices (textual content)
-        for choice_data in updated_choices:
-            try:
-                choice = Choice.objects.get(id=choice_data['id'])
-            except:
-                return Response({'error': 'Choice not found'})
-            serializer = ChoiceUpdateSerializer(choice, data=choice_data, partial=True)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-
-        # Delete questions by id (remove questions)
-        for question_id in deleted_questions:
+        # The whole edit is applied or nothing is. The game row stays locked until commit,
+        # so two edits of the same game cannot interleave or hand out the same version.
+        with transaction.atomic():
             try:
-                question = Question.objects.get(id=question_id, game=game)
-                question.delete()
-            except Question.DoesNotExist:
-                continue
-            
-        # Create new questions and choices
-        new_questions = data.get('new_questions', [])
-        for question_data in new_questions:
-            if 'question_text' not in question_data:
-                return Response({'error': 'Each question must have a question_text.'}, status=400)
-
-            choices_data = question_data.pop('choices', [])
-            if len(choices_data) != 4:
-                return Response({'error': 'Each question must have exactly 4 choices.'}, status=400)
-
-            correct_count = 0
-            for choice in choices_data:
-                if choice.get('is_correct'):
-                    correct_count += 1
-            if correct_count != 1:
-                return Response({'error': 'Only one correct choice is allowed'})
-            
-            # Create the question
-            question = Question.objects.create(game=game, question_text=question_data['question_text'])
-
-            # Create the associated choices
-            for choice_data in choices_data:
-                Choice.objects.create(question=question, **choice_data)
-
-        return Response({'message': 'Game updated successfully'})
+                game = Game.objects.select_for_update().get(id=game_id, owner=request.user)
+            except Game.DoesNotExist:
+                return Response({'error': 'Game not found'}, status=404)
+
+            # Everything is validated before the first write, ids are parsed so "5" finds question 5.
+            # A ValidationError leaves the atomic block, which rolls back the row lock with it
+            question_serializer = QuestionUpdateSerializer(data=updated_questions, many=True, partial=True)
+            question_serializer.is_valid(raise_exception=True)
+            choice_serializer = ChoiceUpdateSerializer(data=updated_choices, many=True, partial=True)
+            choice_serializer.is_valid(raise_exception=True)
+
+            # New questions follow the same rules as create-game
+            new_questions_serializer = QuestionSerializer(data=new_questions, many=True)
+            new_questions_serializer.is_valid(raise_exception=True)
+            for question_data in new_questions_serializer.validated_data:
+                validate_choices(question_data['choices'])
+
+            # Update game (title and/or is public)
+            if updated_game:
+                serializer = GameUpdateSerializer(game, data=updated_game, partial=True)
+                serializer.is_valid(raise_exception=True)
+                for field, value in serializer.validated_data.items():
+                    setattr(game, field, value)
+
+            # Update questions (textual content), every referenced row is fetched with one query
+            questions = Question.objects.in_bulk([question_data['id'] for question_data in question_serializer.validated_data])
+            for question_data in question_serializer.validated_data:
+                question = questions.get(question_data['id'])
+                if question is None or question.game_id != game.id:
+                    return rollback_response({'error': 'Question not found'}, 404)
+                question.question_text = question_data.get('question_text', question.question_text)
+            Question.objects.bulk_update(questions.values(), ['question_text'])
+
+            # Update choices (textual content), only choices of this game's questions can be edited
+            choices = Choice.objects.select_related('question').in_bulk([choice_data['id'] for choice_data in choice_serializer.validated_data])
+            for choice_data in choice_serializer.validated_data:
+                choice = choices.get(choice_data['id'])
+                if choice is None or choice.question.game_id != game.id:
+                    return rollback_response({'error': 'Choice not found'}, 404)
+                for field in ('choice_text', 'is_correct'):
+                    if field in choice_data:
+                        setattr(choice, field, choice_data[field])
+            Choice.objects.bulk_update(choices.values(), ['choice_text', 'is_correct'])
+
+            # Set-based deletes, ids of other games are ignored like missing ones
+            touched = {choice.question_id for choice in choices.values()}
+            if deleted_choices:
+                doomed_choices = Choice.objects.filter(id__in=deleted_choices, question__game=game)
+                touched.update(doomed_choices.values_list('question_id', flat=True))
+                doomed_choices.delete()
+            Question.objects.filter(id__in=deleted_questions, game=game).delete()
+
+            # Questions whose choices changed must still follow the create-game rules, otherwise
+            # the live question pack would drop them and shift the question indexes
+            counts = (
+                Question.objects.filter(id__in=touched)
+                .annotate(
+                    choice_count=Count('choices'),
+                    correct_count=Count('choices', filter=Q(choices__is_correct=True)),
+                )
+                .values_list('choice_count', 'correct_count')
+            )
+            for choice_count, correct_count in counts:
+                if choice_count != CHOICES_PER_QUESTION:
+                    return rollback_response({'error': f'Questions must have {CHOICES_PER_QUESTION} choices.'}, 400)
+                if correct_count != 1:
+                    return rollback_response({'error': 'Each question must have exactly one correct choice.'}, 400)
+
+            # Create new questions and choices
+            insert_questions(game, new_questions_serializer.validated_data)
+
+            game.version += 1
+            game.save()
+
+            # Drop the compiled question pack so the next hosted session sees the edits, once they are visible
+            transaction.on_commit(lambda: invalidate_question_pack(game.id))
+            game_changed(game.id)
+
+        return Response({'message': 'Game updated successfully', 'version': game.version})
 '''
 {
   "updated_game": {
@@ -129,25 +221,83 @@ class RetrieveUserGamesView(APIView):
     def get(self, request):
         # set of games that whose owner field is the current users id
         games = Game.objects.filter(owner=request.user)
-        serializer = GameSerializer(games, many=True)
+
+        # ?view=summary: one page of titles and question counts, no questions or choices
+        if request.query_params.get('view') == 'summary':
+            paginator = GameCursorPagination()
+            page = paginator.paginate_queryset(games.annotate(question_count=Count('questions')), request, view=self)
+            serializer = GameSummarySerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
+        serializer = GameSerializer(with_questions(games.order_by('id')), many=True)
         return Response(serializer.data)
 
 class RetrieveSingleGameView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, game_id):
+        # Only the columns needed for the permission check and the cache key, the nested game may come from cache
         try:
-            game = Game.objects.get(id=game_id)
+            game = Game.objects.only('id', 'owner_id', 'is_public', 'version').get(id=game_id)
         except Game.DoesNotExist:
             return Response({'error': 'Game not found'}, status=status.HTTP_404_NOT_FOUND)
 
         # Only allow if game is public OR if user is the owner
         # In other words, deny the request if the game is not public and the user requesting it is not the owner
-        if (not game.is_public) and (game.owner != request.user):
+        if (not game.is_public) and (game.owner_id != request.user.id):
             return Response({'error': 'You do not have permission to access this game.'}, status=status.HTTP_403_FORBIDDEN)
 
-        serializer = GameSerializer(game)
-        return Response(serializer.data)
+        # The client already has this version
+        etag = game_etag(game)
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            content = get_game_json(game, lambda: GameSerializer(with_questions(Game.objects.all()).get(id=game.id)).data)
+            response = HttpResponse(content, content_type='application/json')
+
+        response['ETag'] = etag
+        # Browsers keep the copy but ask again every time, permissions can change between requests
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+class PublicCatalogView(APIView):
+    """
+    Public games of every user. With ?q= the games matching every word are ranked by
+    the in-process search index, otherwise they are listed newest first. Both are
+    paginated with an opaque cursor.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        paginator = GameCursorPagination()
+        if not query:
+            games = Game.objects.filter(is_public=True).annotate(question_count=Count('questions'))
+            page = paginator.paginate_queryset(games, request, view=self)
+            return paginator.get_paginated_response(GameSummarySerializer(page, many=True).data)
+
+        limit = paginator.get_page_size(request)
+        results, next_cursor = search_catalog(query, request.query_params.get('cursor'), limit)
+
+        next_url = None
+        if next_cursor:
+            next_url = request.build_absolute_uri(f"{request.path}?{urlencode({'q': query, 'cursor': next_cursor, 'page_size': limit})}")
+        return Response({
+            "next": next_url,
+            "previous": None,
+            "results": [
+                {
+                    "id": entry.id,
+                    "title": entry.title,
+                    "description": entry.description,
+                    "is_public": True,
+                    "created_at": entry.created_at,
+                    "question_count": entry.question_count,
+                    "score": score,
+                }
+                for entry, score in results
+            ],
+        })
 
 class DeleteGameView(APIView):
     permission_classes = [IsAuthenticated]
@@ -161,5 +311,7 @@ class DeleteGameView(APIView):
         if game.owner != request.user:
             return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
         # Delete game from DB
+        invalidate_question_pack(game.id)
         game.delete()
+        game_changed(game_id)
         return Response({'message': 'Game deleted successfully'}, status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,110 @@
+from django.conf import settings
+from .event_log import publish
+import asyncio
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.answers')
+
+# Points for a correct answer
+CORRECT_ANSWER_POINTS = 100
+
+
+class AnswerIngestor:
+    """
+    Takes in the answers to the open question of one session and grades them in micro-batches.
+
+    submit() is O(1): it rejects a player's second answer to the same question and
+    refuses new answers once the pending queue is full, so a burst cannot grow memory
+    without bound. Once per window every pending answer is graded against the question
+    pack's answer key and one answers_graded message goes out with the progress and the
+    changed scores. Nothing here touches the database, the score ledger is flushed with the round.
+    """
+
+    ACCEPTED = "accepted"
+    DUPLICATE = "duplicate"
+    BUSY = "busy"
+
+    def __init__(self, channel_layer, group_name, session_state, leaderboard, window=None, max_pending=None):
+        self.channel_layer = channel_layer
+        self.group_name = group_name
+        self.session_state = session_state
+        self.leaderboard = leaderboard
+        self.window = window if window is not None else getattr(settings, 'ANSWER_BATCH_WINDOW', 0.2)
+        self.max_pending = max_pending if max_pending is not None else getattr(settings, 'ANSWER_QUEUE_LIMIT', 1000)
+
+        self.question_index = None
+        # player ids that have answered the open question, graded or not
+        self.answered = set()
+        # (player_id, selected_answer) waiting for the next batch
+        self.pending = []
+        self.batch_task = None
+
+    def open_question(self, question_index):
+        self.question_index = question_index
+        self.answered = set()
+
+    def submit(self, player_id, selected_answer):
+        if player_id in self.answered:
+            return self.DUPLICATE
+        if len(self.pending) >= self.max_pending:
+            return self.BUSY
+
+        self.answered.add(player_id)
+        self.pending.append((player_id, selected_answer))
+
+        if self.batch_task is None or self.batch_task.done():
+            self.batch_task = asyncio.ensure_future(self.grade_after_window())
+        return self.ACCEPTED
+
+    async def grade_after_window(self):
+        await asyncio.sleep(self.window)
+        self.batch_task = None
+        try:
+            await self.grade_pending()
+        except Exception as e:
+            logger.error(f"[ANSWERS] Error grading answers for {self.group_name}: {str(e)}")
+
+    async def drain(self):
+        """
+        Grades whatever is still pending right away, called before the question closes.
+        """
+        if self.batch_task is not None and not self.batch_task.done():
+            self.batch_task.cancel()
+        self.batch_task = None
+        await self.grade_pending()
+
+    def cancel(self):
+        if self.batch_task is not None and not self.batch_task.done():
+            self.batch_task.cancel()
+        self.batch_task = None
+        self.pending = []
+
+    async def grade_pending(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+
+        question = self.session_state.get_question(self.question_index)
+        correct_choice_text = question.correct_choice_text if question else None
+        ledger = self.session_state.score_ledger
+
+        correct = 0
+        for player_id, selected_answer in batch:
+            if correct_choice_text is not None and selected_answer == correct_choice_text:
+                ledger.add(player_id, CORRECT_ANSWER_POINTS)
+                correct += 1
+
+        logger.info(f"[ANSWERS] Graded {len(batch)} answers for question {self.question_index} in {self.group_name}, {correct} correct")
+
+        # One message per batch: how many have answered so far and the scores that changed
+        await publish(
+            self.channel_layer,
+            self.group_name,
+            {
+                "type": "answers_graded",
+                "question_index": self.question_index,
+                "answered": len(self.answered),
+                "players": len(self.session_state.players),
+                "scores": self.leaderboard.take_changes(),
+            }
+        )
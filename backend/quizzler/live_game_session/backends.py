@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.backends')
+
+
+def load_backend(setting, default):
+    """
+    Builds the backend named by settings.<setting>, {"BACKEND": dotted path, "CONFIG": {keyword arguments}},
+    or default with no arguments. The Redis backends import the redis package in their
+    constructor, so it is only needed when one of them is configured.
+    """
+    config = getattr(settings, setting, {"BACKEND": default})
+    backend = import_string(config["BACKEND"])(**config.get("CONFIG", {}))
+    logger.info(f"[BACKENDS] {setting} uses {config['BACKEND']}")
+    return backend
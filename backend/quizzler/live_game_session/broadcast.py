@@ -0,0 +1,24 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_frame(payload):
+    """
+    Serializes a websocket frame once, with orjson when it is installed.
+    """
+    if orjson is not None:
+        # OPT_NON_STR_KEYS keeps int keys (player ids) working the same as json.dumps
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(payload, separators=(',', ':'))
+
+
+async def broadcast(channel_layer, group_name, payload):
+    """
+    Sends payload to every connection in the group. The frame is encoded here, once,
+    and each consumer's broadcast_frame handler forwards the text as-is.
+    """
+    await channel_layer.group_send(group_name, {"type": "broadcast_frame", "text": encode_frame(payload)})
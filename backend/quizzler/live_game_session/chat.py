@@ -0,0 +1,80 @@
+from asgiref.sync import sync_to_async
+from collections import deque
+from django.conf import settings
+from .event_log import publish
+from .models import ChatMessage
+import asyncio
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.chat')
+
+
+class ChatRoom:
+    """
+    Chat of one session on this worker.
+
+    Lines posted within the same window go out together as one chat_batch frame. The
+    most recent lines are kept in a ring so late joiners and reconnecting players get
+    them from memory. With CHAT_PERSIST_HISTORY on, lines are also collected and written
+    in one bulk insert when the session is torn down.
+    """
+
+    def __init__(self, channel_layer, group_name, session_id, window=None, history_size=None, persist=None):
+        self.channel_layer = channel_layer
+        self.group_name = group_name
+        self.session_id = session_id
+        self.window = window if window is not None else getattr(settings, 'CHAT_BATCH_WINDOW', 0.25)
+        self.history = deque(maxlen=history_size if history_size is not None else getattr(settings, 'CHAT_HISTORY_SIZE', 100))
+        self.persist = persist if persist is not None else getattr(settings, 'CHAT_PERSIST_HISTORY', False)
+
+        self.pending = []
+        self.unsaved = []
+        self.batch_task = None
+
+    def post(self, username, message):
+        line = {"username": username, "message": message}
+        self.pending.append(line)
+        self.history.append(line)
+        if self.persist:
+            self.unsaved.append(line)
+
+        if self.batch_task is None or self.batch_task.done():
+            self.batch_task = asyncio.ensure_future(self.send_after_window())
+
+    def recent(self):
+        return list(self.history)
+
+    async def send_after_window(self):
+        await asyncio.sleep(self.window)
+        self.batch_task = None
+        await self.send_pending()
+
+    async def send_pending(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        try:
+            await publish(self.channel_layer, self.group_name, {"type": "chat_batch", "messages": batch})
+        except Exception as e:
+            logger.error(f"[CHAT] Error sending chat for {self.group_name}: {str(e)}")
+
+    async def close(self):
+        """
+        Sends anything still waiting and writes the unsaved history, if enabled.
+        """
+        if self.batch_task is not None and not self.batch_task.done():
+            self.batch_task.cancel()
+        self.batch_task = None
+        await self.send_pending()
+
+        if self.unsaved:
+            lines, self.unsaved = self.unsaved, []
+            await sync_to_async(save_chat_history)(self.session_id, lines)
+
+
+def save_chat_history(session_id, lines):
+    ChatMessage.objects.bulk_create(
+        [ChatMessage(session_id=session_id, username=line["username"], message=line["message"]) for line in lines],
+        batch_size=500,
+    )
+    logger.info(f"[CHAT] Saved {len(lines)} chat messages for session {session_id}")
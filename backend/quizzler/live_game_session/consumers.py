@@ -1,15 +1,68 @@
 import json
+import time
 from channels.generic.websocket import AsyncWebsocketConsumer
 from urllib.parse import parse_qs
 from asgiref.sync import sync_to_async
-from live_game_session.models import GameSession, Player
-from games.models import Question, Choice
+from django.conf import settings
+from live_game_session.models import GameSession
 import logging
 from .item_effects import ItemManager
+from .item_store import get_item_state_store
+from .session_state import SessionState
+from .rooms import get_room_registry
+from .event_log import get_event_log, publish
+from .handshake import load_handshake
+from .messages import player_group_name, send_inventory_changes
+from .rounds import RoundScheduler
+from .round_dispatch import session_schedulers, get_round_dispatcher, release_scheduler
+from .answers import AnswerIngestor
+from .presence import get_presence_registry
+from .chat import ChatRoom
+from .reaper import get_session_reaper
+from .rate_limits import ConnectionRateLimiter
+from . import metrics
 
 logger = logging.getLogger('quizzler.live_game_session.consumers')
 session_item_managers = {}
+session_states = {}
+session_chats = {}
 
+# Message types a client may send, anything else is dropped before it reaches a handler
+MESSAGE_TYPES = frozenset({
+    "chat_message", "item_use", "start_game", "pause_round", "resume_round", "skip_round",
+    "answer_submission", "items_resync", "ping",
+})
+CHAT_MAX_LENGTH = 500
+# Close code for a resume refused because the old connection is still alive, the reason
+# carries how many seconds of silence a takeover needs so the client knows when to retry
+TAKEOVER_REFUSED_CLOSE_CODE = 4009
+
+
+async def release_session(session_code):
+    """
+    Frees everything this worker keeps in memory for a session: item manager, round
+    scheduler, chat room and session state, whose scores are flushed first.
+    """
+    session_item_managers.pop(session_code, None)
+
+    await release_scheduler(session_code)
+
+    chat_room = session_chats.pop(session_code, None)
+    if chat_room:
+        await chat_room.close()
+
+    session_state = session_states.pop(session_code, None)
+    if session_state:
+        await session_state.flush()
+        logger.info(f"[SESSION] Session state for {session_code} flushed and removed.")
+
+
+async def release_idle_session(session_code):
+    """
+    Called on the worker running a session's scheduler once the session's last player left on any worker.
+    """
+    if get_room_registry().local_count(f"session_{session_code}") == 0:
+        await release_session(session_code)
 
 
 class GameSessionConsumer(AsyncWebsocketConsumer):
@@ -18,9 +71,24 @@ class GameSessionConsumer(AsyncWebsocketConsumer):
 
         self.session_code = self.scope["url_route"]["kwargs"]["session_code"]
         self.room_group_name = f"session_{self.session_code}"
+        self.room_registry = get_room_registry()
+        self.presence = get_presence_registry(self.channel_layer)
+        self.rate_limiter = ConnectionRateLimiter()
+        self.round_dispatcher = get_round_dispatcher(self.channel_layer, release_idle_session)
+        self.max_frame_size = getattr(settings, 'WEBSOCKET_MAX_FRAME_SIZE', 4096)
+        self.takeover_after = getattr(settings, 'PRESENCE_TAKEOVER_AFTER', 40)
+        # Joining records the first heartbeat in the room registry
+        self.touched_at = time.monotonic()
+        self.player_id = None
+        self.joined = False
+        self.replaced = False
         query_params = parse_qs(self.scope["query_string"].decode())
         self.username = query_params.get("username", [None])[0]
 
+        # Clients coming back from a dropped connection send the last event number they saw
+        last_seq = query_params.get("last_seq", [None])[0]
+        last_seq = int(last_seq) if last_seq and last_seq.isdigit() else None
+
         logger.info(f"[CONNECT] Session Code: {self.session_code}, Username: {self.username}")
 
         # Check for missing username
@@ -29,93 +97,117 @@ class GameSessionConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
-        # Check if this user is already connected
-        group_channels = self.channel_layer.groups.get(self.room_group_name, [])
-        for connection in group_channels:
-            if connection == self.channel_name:
-                logger.warning(f"[CONNECT] Duplicate connection attempt for {self.username}. Closing new connection.")
-                await self.close()
-                return
-
-
-        # Retrieve session
+        # Session status, roster and this player's id come from one query
         try:
-            session = await sync_to_async(GameSession.objects.get)(session_code=self.session_code)
-            logger.info(f"[CONNECT] Session found: {session.session_code}, Active: {session.is_active}")
-        except GameSession.DoesNotExist:
+            handshake = await sync_to_async(load_handshake)(self.session_code, self.username)
+        except Exception as e:
+            logger.error(f"[CONNECT] Error loading session {self.session_code}. Exception: {str(e)}")
+            await self.close()
+            return
+
+        if handshake is None:
             logger.warning(f"[CONNECT] Session {self.session_code} not found in the database. Closing connection.")
             await self.close()
             return
 
         # Check session status
-        if not session.is_active:
+        if not handshake["is_active"]:
             logger.warning(f"[CONNECT] Session {self.session_code} is inactive. Closing connection.")
             await self.close()
             return
-        
-        # Create a new ItemManager if it doesn't exist for the session
-        if self.session_code not in session_item_managers:
-            session_item_managers[self.session_code] = ItemManager()
-            logger.info(f"[CONNECT] New ItemManager created for session {self.session_code}")
 
-        # Attempt to join group
+        player = handshake["player"]
+        if player is None:
+            logger.warning(f"[CONNECT] Player {self.username} not found in session {self.session_code}. Closing connection.")
+            await self.close()
+            return
+
+        # Claim the username in the room, the registry sees connections on every worker
         try:
+            if not await self.room_registry.join(self.room_group_name, self.channel_name, self.username):
+                if last_seq is None:
+                    logger.warning(f"[CONNECT] Duplicate connection attempt for {self.username}. Closing new connection.")
+                    await self.close()
+                    return
+
+                # A resuming client replaces its old connection, which the server may not know is dead yet,
+                # as long as that one went silent. A live one keeps the username and the client retries later
+                taken, previous = await self.room_registry.take_over(self.room_group_name, self.channel_name, self.username, self.takeover_after)
+                if not taken:
+                    logger.warning(f"[CONNECT] {self.username} is still active on {previous}. Closing resuming connection.")
+                    # A close code only reaches the client once the handshake is accepted
+                    await self.accept()
+                    await self.close(code=TAKEOVER_REFUSED_CLOSE_CODE, reason=str(self.takeover_after))
+                    return
+                if previous:
+                    logger.info(f"[CONNECT] {self.username} resumed, replacing connection {previous}")
+                    await self.channel_layer.send(previous, {"type": "connection_replaced"})
+            self.joined = True
+            self.player_id = player["id"]
+            self.session_id = handshake["session_id"]
             await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+            await self.channel_layer.group_add(player_group_name(self.room_group_name, self.player_id), self.channel_name)
             logger.info(f"[CONNECT] Added to group: {self.room_group_name}")
         except Exception as e:
             logger.error(f"[CONNECT] Error joining group: {self.room_group_name}. Exception: {str(e)}")
             await self.close()
             return
 
-        # Accept WebSocket connection
+        # Create a new ItemManager if it doesn't exist for the session
+        if self.session_code not in session_item_managers:
+            session_item_managers[self.session_code] = ItemManager(self.session_code)
+            logger.info(f"[CONNECT] New ItemManager created for session {self.session_code}")
+
+        # Players joining a game that is already running are added to the in-memory roster
+        session_state = self.get_session_state()
+        if session_state:
+            session_state.add_player(self.player_id, self.username, player["score"])
+
+        # Work out what a returning client missed. Live events wait until connect() returns,
+        # so replayed ones always arrive first and the client drops anything it has already seen.
+        event_log = get_event_log()
+        missed = None
+        if last_seq is not None:
+            missed = await event_log.since(self.room_group_name, last_seq)
+        event_seq = await event_log.current_seq(self.room_group_name)
+
+        # Accept WebSocket connection and send the player list, with who is online, to the newly connected client
         try:
             await self.accept()
+            await self.send(text_data=json.dumps({
+                "type": "player_list",
+                "players": handshake["players"],
+                "online": await self.room_registry.usernames(self.room_group_name),
+                "event_seq": event_seq,
+                "resumed": missed is not None
+            }))
             logger.info(f"[CONNECT] WebSocket connection established for {self.username} in session {self.session_code}")
         except Exception as e:
             logger.error(f"[CONNECT] Error during WebSocket acceptance. Exception: {str(e)}")
             await self.close()
             return
 
-        # Send player list to the newly connected client
         try:
-            players = await sync_to_async(list)(
-                Player.objects.filter(session=session).values("id", "username", "score")
-            )
-            await self.send(text_data=json.dumps({
-                "type": "player_list",
-                "players": players
-            }))
-            logger.info(f"[CONNECT] Player list sent to {self.username}")
+            if missed is not None:
+                logger.info(f"[RESUME] Replaying {len(missed)} events to {self.username} after {last_seq}")
+                for frame in missed:
+                    await self.send(text_data=frame)
+            else:
+                await self.send_snapshot(event_seq)
+                await self.send_chat_history()
+            await self.send_own_inventory()
         except Exception as e:
-            logger.error(f"[CONNECT] Error sending player list to {self.username}. Exception: {str(e)}")
+            logger.error(f"[CONNECT] Error resuming session for {self.username}. Exception: {str(e)}")
             await self.close()
             return
 
-        # Notify others about the new player
-        try:
-            player = await sync_to_async(Player.objects.get)(
-                session=session, username=self.username
-            )
-            logger.info(f"[CONNECT] Player {player.username} with ID {player.id} successfully retrieved.")
+        # Others hear about the new player in the next batched presence_update
+        self.presence.connected(self.room_group_name, self.channel_name, self.username, self.player_id)
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "player_joined",
-                    "username": self.username,
-                    "player_id": player.id
-                }
-            )
-            logger.info(f"[CONNECT] Player joined message sent to group {self.room_group_name}")
-            
-        except Player.DoesNotExist:
-            logger.warning(f"[CONNECT] Player {self.username} not found in session {self.session_code}. Closing connection.")
-            await self.close()
-            return
-        except Exception as e:
-            logger.error(f"[CONNECT] Error notifying group about player {self.username}. Exception: {str(e)}")
-            await self.close()
-            return
+        # Expired sessions are reaped from inside the worker when SESSION_REAPER_INTERVAL is set
+        reaper = get_session_reaper(self.channel_layer, release_session)
+        if reaper:
+            reaper.start()
 
 
 
@@ -128,73 +220,106 @@ class GameSessionConsumer(AsyncWebsocketConsumer):
         logger.info(f"[DISCONNECT] session_code: {self.session_code}")
         logger.info(f"[DISCONNECT] username: {self.username}")
 
-        # Attempt to retrieve the session
-        session = None
-        try:
-            session = await sync_to_async(GameSession.objects.get)(session_code=self.session_code)
-            if session.is_active:
-                logger.info(f"[DISCONNECT] Session {session.session_code} is active.")
-            else:
-                logger.info(f"[DISCONNECT] Session {session.session_code} is inactive.")
-        except GameSession.DoesNotExist:
-            logger.warning(f"[DISCONNECT] Session {self.session_code} not found in database.")
+        # Connections refused during the handshake never joined the room, nothing to clean up
+        if not self.joined:
+            return
 
-        # Check if the player still exists
-        try:
-            if session:
-                player = await sync_to_async(Player.objects.get)(
-                    session=session,
-                    username=self.username
-                )
-                logger.info(f"[DISCONNECT] Player found: {player.username} with ID {player.id}")
-
-                # Mark player as inactive only if the session is still active
-                if session.is_active:
-                    player.is_active = False
-                    await sync_to_async(player.save)()
-                    logger.info(f"[DISCONNECT] Player {player.username} marked as inactive.")
-        except Player.DoesNotExist:
-            logger.warning(f"[DISCONNECT] Player {self.username} not found in session {self.session_code}.")
+        self.presence.disconnected(self.channel_name, announce=not self.replaced)
 
         # Remove from group
         try:
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+            if self.player_id is not None:
+                await self.channel_layer.group_discard(player_group_name(self.room_group_name, self.player_id), self.channel_name)
             logger.info(f"[DISCONNECT] Removed from group: {self.room_group_name}")
         except Exception as e:
             logger.error(f"[DISCONNECT] Error removing from group: {e}")
 
-        # Remove item_manager if group is empty
-        group_channels = self.channel_layer.groups.get(self.room_group_name, [])
-        if not group_channels:
-            logger.info(f"[DISCONNECT] No more players in session {self.session_code}. Removing ItemManager.")
-            session_item_managers.pop(self.session_code, None)
+        remaining = 0
+        try:
+            remaining = await self.room_registry.leave(self.room_group_name, self.channel_name, self.username)
+            logger.info(f"[DISCONNECT] {remaining} connections left in {self.room_group_name} across all workers")
+
+            # Shared item state and the event log are only dropped once nobody on any worker is left in the session
+            if remaining == 0:
+                await sync_to_async(get_item_state_store().delete)(self.session_code)
+                await get_event_log().delete(self.room_group_name)
+                if self.get_scheduler() is None:
+                    await self.round_dispatcher.release_everywhere(self.room_group_name, self.session_code)
+        except Exception as e:
+            logger.error(f"[DISCONNECT] Error updating room registry: {e}")
+
+        # Remove item_manager once this worker serves no more players of the session
+        if self.room_registry.local_count(self.room_group_name) == 0:
+            # The game keeps running here for the players on other workers, it is released when the last one leaves
+            if remaining and self.get_scheduler():
+                logger.info(f"[DISCONNECT] No more players in session {self.session_code} on this worker, keeping its running rounds.")
+                return
+            logger.info(f"[DISCONNECT] No more players in session {self.session_code} on this worker. Releasing session.")
+            await release_session(self.session_code)
 
 
 
+    async def receive(self, text_data=None, bytes_data=None):
+        # Any message proves the connection is alive, not only ping
+        self.presence.seen(self.channel_name)
+        if self.joined and time.monotonic() - self.touched_at >= self.takeover_after / 4:
+            await self.touch_registry()
 
-    async def receive(self, text_data):
-        data = json.loads(text_data)
-        message_type = data.get('type')
-        logger.info(f'[RECEIVE] Message received: {message_type} | Data: {data}')
+        # Everything here runs before the frame is parsed, so abusive traffic costs as little as possible
+        if text_data is None:
+            metrics.increment("ws.dropped.binary")
+            return
+        if len(text_data) > self.max_frame_size:
+            metrics.increment("ws.dropped.oversize")
+            return
+        if not self.rate_limiter.allow_frame():
+            metrics.increment("ws.dropped.rate.connection")
+            return
+
+        try:
+            data = json.loads(text_data)
+            message_type = data.get('type')
+        except (ValueError, AttributeError):
+            metrics.increment("ws.dropped.invalid")
+            return
+
+        if not isinstance(message_type, str) or message_type not in MESSAGE_TYPES:
+            metrics.increment("ws.dropped.unknown_type")
+            return
+        if not self.rate_limiter.allow(message_type):
+            metrics.increment(f"ws.dropped.rate.{message_type}")
+            return
+
+        metrics.increment(f"ws.received.{message_type}")
+        logger.debug(f'[RECEIVE] Message received: {message_type} from {self.username} ({len(text_data)} chars)')
 
         if message_type == 'chat_message':
             await self.handle_chat_message(data)
         elif message_type == 'item_use':
             await self.handle_item_use(data)
         elif message_type == "start_game":
-            # attempt to retrieve game session, return if fail
+            # Starting again would replace the running game's state and lose its unwritten scores
+            previous_state = self.get_session_state()
+            if previous_state and not previous_state.finished:
+                await self.send(text_data=json.dumps({
+                    "type": "error",
+                    "message": "The game is already running."
+                }))
+                return
+            # A finished game's last scores are written before the players are read again
+            if previous_state:
+                await previous_state.flush()
+
+            # Load the session, players and questions once, later in-game reads are served from memory
             try:
-                session = await sync_to_async(GameSession.objects.get)(session_code=self.session_code)
+                session_state = await sync_to_async(SessionState.load)(self.session_code)
             except GameSession.DoesNotExist:
                 return
 
-            # Retrieve host username
-            host_username = await sync_to_async(lambda: session.host.username)()
-
             # Retrieve game ID(of the game associated with session, not the session code), return if fail
-            try:
-                game_id = await sync_to_async(lambda: session.game.id)()
-            except AttributeError:
+            game_id = session_state.game_id
+            if not game_id:
                 await self.send(text_data=json.dumps({
                     "type": "error",
                     "message": "Game ID not found."
@@ -202,15 +327,18 @@ class GameSessionConsumer(AsyncWebsocketConsumer):
                 return
 
             # Only host can start the game
-            if host_username != self.username:
+            if session_state.host_username != self.username:
                 await self.send(text_data=json.dumps({
                     "type": "error",
                     "message": "Only the host can start the game."
                 }))
                 return
 
+            session_states[self.session_code] = session_state
+
             # Broadcast to all players that the game has started and send game ID
-            await self.channel_layer.group_send(
+            await publish(
+                self.channel_layer,
                 self.room_group_name,
                 {
                     "type": "game_started",
@@ -219,77 +347,30 @@ class GameSessionConsumer(AsyncWebsocketConsumer):
             )
 
             # Initialize the current question index in the session
-            session.current_round = 0
-            await sync_to_async(session.save)()
-
-            # Send the first question
-            await self.send_question(session, game_id, 0)
-
-        elif message_type == "next_question":
-            try:
-                session = await sync_to_async(GameSession.objects.get)(session_code=self.session_code)
-                game = await sync_to_async(lambda: session.game)()
-                game_id = await sync_to_async(lambda: game.id)()
-
-                current_index = session.current_round
-                next_index = current_index + 1
-
-                question_count = await sync_to_async(lambda: game.questions.count())()
+            session_state.set_round(0)
+            await session_state.flush()
 
-                host_username = await sync_to_async(lambda: session.host.username)()
-                # Ensure only the host can trigger the next question
-                if self.username != host_username:
-                    logger.warning(f"[NEXT_QUESTION] Non-host {self.username} attempted to trigger next_question. Ignoring.")
-                    return
-
-                
-
-                # Retrieve the correct ItemManager
-                item_manager = self.get_item_manager()
-
-                # Apply item effects before moving to next question
-                if item_manager:
-                    await sync_to_async(item_manager.apply_queued_items)()
-
-                # Grant items based on the new round index and send updated items to frontend
-                if item_manager:
-                    await sync_to_async(item_manager.grant_items)(session)
-                    await self.send_player_items()
-
-                # Check if there are more questions
-                if next_index < question_count:
-                    session.current_round = next_index
-                    await sync_to_async(session.save)()
-                    await self.send_question(session, game_id, next_index)
-                else:
-                    players = await sync_to_async(lambda: list(session.player_set.all()))()
-                    scores = [{"username": player.username, "score": player.score} for player in players]
-
-                    # End game if no more questions
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {
-                            "type": "game_ended",
-                            "message": "Game Over",
-                            "scores": scores,
-                        }
-                    )
+            # From here on the scheduler advances rounds by itself
+            scheduler = RoundScheduler(
+                self.channel_layer,
+                self.room_group_name,
+                session_state,
+                self.get_item_manager(),
+            )
+            await self.round_dispatcher.adopt(self.session_code, scheduler)
+            await scheduler.start(0)
 
-            except GameSession.DoesNotExist:
-                await self.send(text_data=json.dumps({
-                    "type": "error",
-                    "message": "Session not found."
-                }))
+        elif message_type in ("pause_round", "resume_round", "skip_round"):
+            await self.handle_round_control(message_type)
 
         elif message_type == 'answer_submission':
             await self.handle_answer_submission(data)
 
+        elif message_type == "items_resync":
+            await self.handle_items_resync(data)
+
         elif message_type == "ping":
             await self.send(text_data=json.dumps({"type": "pong"}))
-            
-        else:
-            # Optional: Handle unknown message types
-            pass
 
 
 
@@ -307,31 +388,42 @@ class GameSessionConsumer(AsyncWebsocketConsumer):
 
 
 
+    async def touch_registry(self):
+        # Other workers let a resuming client take this username over only once these heartbeats stop
+        self.touched_at = time.monotonic()
+        try:
+            await self.room_registry.touch(self.room_group_name, self.channel_name, self.username)
+        except Exception as e:
+            logger.error(f"[PRESENCE] Error recording heartbeat for {self.username}: {str(e)}")
+
     async def handle_chat_message(self, data):
-        username = data['username']
-        message = data['message']
-
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "chat_message",
-                "username": username,
-                "message": message,
-            }
-        )
+        message = data.get('message')
+        if not isinstance(message, str) or not message.strip() or len(message) > CHAT_MAX_LENGTH:
+            metrics.increment("ws.dropped.chat_invalid")
+            return
+
+        # The sender is always the connection's own username, never what the client claims
+        self.get_chat_room().post(self.username, message)
 
     async def handle_item_use(self, data):
         item_type = data.get("item")
         target_player_username = data.get("target")
-        session_code = data.get("sessionCode")
+        session_code = self.session_code
         username = self.username
 
         logger.info(f"[ITEM_USE] Item: {item_type}, Target: {target_player_username}, User: {username}")
 
         try:
-            session = await sync_to_async(GameSession.objects.get)(session_code=session_code)
-            player = await sync_to_async(Player.objects.get)(session=session, username=username)
-            player_id = player.id
+            session_state = await self.get_or_load_session_state()
+            if not session_state:
+                logger.warning(f"[ITEM_USE] Session {session_code} not found.")
+                return
+
+            player = session_state.get_player(username)
+            if not player:
+                logger.warning(f"[ITEM_USE] Player {username} not found in session {session_code}.")
+                return
+            player_id = player["id"]
 
             # Retrieve the correct ItemManager
             item_manager = self.get_item_manager()
@@ -340,234 +432,141 @@ class GameSessionConsumer(AsyncWebsocketConsumer):
                 logger.warning(f"[ITEM_USE] No ItemManager found for session {session_code}.")
                 return
 
-            # Verify item in player's inventory
-            if item_type not in item_manager.player_items.get(player_id, []):
-                logger.warning(f"[ITEM_USE] Player {username} does not have the item {item_type}.")
-                return
-
             # Determine target player ID
             target_id = None
             target_player = None
             if item_type in ["Cannon", "Torpedo"] and target_player_username:
-                try:
-                    target_player = await sync_to_async(Player.objects.get)(session=session, username=target_player_username)
-                    target_id = target_player.id
-                except Player.DoesNotExist:
+                target_player = session_state.get_player(target_player_username)
+                if not target_player:
                     logger.warning(f"[ITEM_USE] Target player {target_player_username} not found.")
                     return
+                target_id = target_player["id"]
 
-            # Use the item
-            await sync_to_async(item_manager.use_item)(player_id, item_type, target_id)
+            # Use the item, this also verifies the item is in the player's inventory
+            used, changes = await sync_to_async(item_manager.use_item)(player_id, item_type, target_id)
+            if not used:
+                logger.warning(f"[ITEM_USE] Player {username} does not have the item {item_type}.")
+                return
             logger.info(f"[ITEM_USE] {item_type} used by {username} targeting {target_player_username}")
 
             # Broadcast the action to all players
-            await self.channel_layer.group_send(
+            await publish(
+                self.channel_layer,
                 self.room_group_name,
                 {
                     "type": "item_used",
                     "item_type": item_type,
                     "player_id": player_id,
                     "target_id": target_id,
-                    "source_username": player.username,
-                    "target_username": target_player.username if target_player else None,
+                    "source_username": player["username"],
+                    "target_username": target_player["username"] if target_player else None,
                 }
             )
 
-            # Send items to update frontend after an item is used(remove the item)
-            await self.send_player_items()
+            # Send the user's new inventory to them only, everyone else gets the item count
+            await send_inventory_changes(self.channel_layer, self.room_group_name, changes)
 
-        except GameSession.DoesNotExist:
-            logger.warning(f"[ITEM_USE] Session {session_code} not found.")
-        except Player.DoesNotExist:
-            logger.warning(f"[ITEM_USE] Player {username} not found in session {session_code}.")
         except Exception as e:
             logger.error(f"[ITEM_USE] Error in handle_item_use: {str(e)}")
 
 
 
 
-    async def chat_message(self, event):
-        await self.send(text_data=json.dumps({
-            "type": "chat_message",
-            "username": event["username"],
-            "message": event["message"],
-        }))
-
-    async def player_joined(self, event):
-        await self.send(text_data=json.dumps({
-            "type": "player_joined",
-            "username": event["username"],
-            "player_id": event["player_id"]
-        }))
-
-    async def game_started(self, event):
-        game_id = event.get("game_id")
-
-        if not game_id:
-            logger.info("Error: `game_id` not provided in game_started event.")
-            return
-
-        await self.send(text_data=json.dumps({
-            "type": "game_started",
-            "game_id": game_id
-        }))
-
-    async def send_question(self, session, game_id, question_index):
-        try:
-            # Fetch the question
-            questions = await sync_to_async(list)(session.game.questions.all())
-
-            if question_index >= len(questions):
-                logger.info(f"Invalid question index: {question_index}")
-                return
-
-            question = questions[question_index]
-            choices = await sync_to_async(list)(question.choices.all())
-
-            logger.info(f"Broadcasting question 0 for game {game_id}")
-
-            # Broadcast question to all players
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "question_broadcast",
-                    "question_index": question_index,
-                    "question_data": {
-                        "question_text": question.question_text,
-                        "choices": [
-                            {"choice_text": choice.choice_text, "is_correct": choice.is_correct}
-                            for choice in choices
-                        ]
-                    }
-                }
-            )
-
-        except Exception as e:
-            logger.info(f"Error in sending question: {e}")
-
-
-    async def question_broadcast(self, event):
-        await self.send(text_data=json.dumps({
-            "type": "question_broadcast",
-            "question_index": event["question_index"],
-            "question_data": event["question_data"]
-        }))
-
-    async def game_ended(self, event):
-        await self.send(text_data=json.dumps({
-            "type": "game_ended",
-            "message": event["message"],
-            "scores": event.get("scores", [])
-        }))
-
-
     async def handle_answer_submission(self, data):
-        logger.info(f'handle_asnwer executing')
         question_index = data.get("questionIndex")
         selected_answer = data.get("selectedAnswer")
-        session_code = data.get("sessionCode")
-        username = self.username
 
-        try:
-            # Retrieve the session
-            session = await sync_to_async(GameSession.objects.get)(session_code=session_code)
+        # Queued in O(1) on the worker running the rounds, grading and the score broadcast happen once per batch
+        status = await self.round_dispatcher.submit_answer(
+            self.room_group_name, self.session_code, question_index, self.player_id, selected_answer, self.channel_name
+        )
 
-            game = await sync_to_async(lambda: session.game)()
+        # Late, repeated or overflowing answers are refused, "busy" answers can be sent again shortly.
+        # Answers forwarded to another worker are refused through answer_rejected() below
+        if status is not None and status != AnswerIngestor.ACCEPTED:
+            await self.answer_rejected({"question_index": question_index, "reason": status})
 
-            # Retrieve the question
-            questions = await sync_to_async(lambda: list(game.questions.all()))()
+    async def handle_round_control(self, message_type):
+        await self.round_dispatcher.control(self.room_group_name, self.session_code, self.username, message_type, self.channel_name)
 
-            # Ensure index is within bounds
-            if question_index < 0 or question_index >= len(questions):
-                logger.warning(f"Invalid question index: {question_index}")
-                return
-
-            # Retrieve the question by index
-            question = questions[question_index]
+    async def send_own_inventory(self):
+        """
+        Sends this player's full inventory and its version, used on connect and when the client asks for a resync.
+        """
+        item_manager = self.get_item_manager()
+        if not item_manager or self.player_id is None:
+            return
 
-            # Determine if the answer is correct
-            correct_choice = await sync_to_async(Choice.objects.get)(question=question, is_correct=True)
-            is_correct = await sync_to_async(lambda: correct_choice.choice_text == selected_answer)()
+        items, version = await sync_to_async(item_manager.get_inventory)(self.player_id)
+        await self.send(text_data=json.dumps({
+            "type": "player_items_sync",
+            "player_id": self.player_id,
+            "items": items,
+            "version": version
+        }))
 
-            # Retrieve the player
-            try:
-                player = await sync_to_async(Player.objects.get)(session=session, username=username)
-            except Player.DoesNotExist:
-                logger.warning(f"[ANSWER_SUBMISSION] Player {username} not found in session {session_code}")
-                return
+    async def handle_items_resync(self, data):
+        item_manager = self.get_item_manager()
+        if not item_manager or self.player_id is None:
+            return
 
-            # Grant points if correct
-            if is_correct:
-                await sync_to_async(lambda: setattr(player, 'score', player.score + 100))()
-                await sync_to_async(player.save)()
+        # Only resend when the client's version is behind, otherwise it is already up to date
+        _, version = await sync_to_async(item_manager.get_inventory)(self.player_id)
+        if data.get("version") != version:
+            await self.send_own_inventory()
+
+    async def send_snapshot(self, event_seq):
+        """
+        Sends the current question and scores of a running game from memory, as of event_seq.
+        Only the scheduler's worker keeps them current, other workers ask it for the snapshot.
+        In the lobby player_list already says everything there is to know.
+        """
+        scheduler = self.get_scheduler()
+        if scheduler is None:
+            await self.round_dispatcher.request_snapshot(self.room_group_name, self.session_code, event_seq, self.channel_name)
+            return
+        await self.session_snapshot({"snapshot": scheduler.snapshot(), "event_seq": event_seq})
 
-            # Broadcast updated scores to all players
-            scores = await sync_to_async(list)(
-                Player.objects.filter(session=session).values("username", "score")
-            )
+    async def session_snapshot(self, event):
+        snapshot = dict(event["snapshot"], type="session_snapshot", event_seq=event["event_seq"])
+        await self.send(text_data=json.dumps(snapshot))
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "update_scores",
-                    "scores": scores
-                }
-            )
+    async def send_chat_history(self):
+        # Recent chat for players who join late or come back after the replay log moved on
+        chat_room = session_chats.get(self.session_code)
+        if chat_room and chat_room.history:
+            await self.send(text_data=json.dumps({
+                "type": "chat_history",
+                "messages": chat_room.recent()
+            }))
 
-        except GameSession.DoesNotExist:
-            logger.warning(f"[ANSWER_SUBMISSION] Session {session_code} not found.")
-        except Question.DoesNotExist:
-            logger.warning(f"[ANSWER_SUBMISSION] Question {question_index} not found.")
-        except Choice.DoesNotExist:
-            logger.warning(f"[ANSWER_SUBMISSION] Correct choice not found for question {question_index}.")
-        except Exception as e:
-            logger.error(f"[ANSWER_SUBMISSION] Error: {str(e)}")
+    async def broadcast_frame(self, event):
+        # Frame was serialized once by the sender, forward it as-is
+        await self.send(text_data=event["text"])
 
-    async def update_scores(self, event):
+    async def answer_rejected(self, event):
         await self.send(text_data=json.dumps({
-            "type": "update_scores",
-            "scores": event["scores"]
+            "type": "answer_rejected",
+            "question_index": event["question_index"],
+            "reason": event["reason"]
         }))
 
-    async def item_used(self, event):
+    async def round_error(self, event):
         await self.send(text_data=json.dumps({
-            "type": "item_used",
-            "item_type": event["item_type"],
-            "player_id": event["player_id"],
-            "target_id": event["target_id"],
-            "source_username": event["source_username"],
-            "target_username": event.get("target_username")
+            "type": "error",
+            "message": event["message"]
         }))
 
-    async def send_player_items(self):
-        item_manager = self.get_item_manager()
-
-        if not item_manager:
-            logger.warning(f"[ITEMS] No ItemManager found for session {self.session_code}.")
-            return
-
-        # Construct items payload
-        player_items = {
-            player_id: items
-            for player_id, items in item_manager.player_items.items()
-        }
-
-        logger.info("Constructed items payload and broadcasting")
-
-        # Broadcast items to all clients in the session
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "player_items",
-                "items": player_items
-            }
-        )
+    async def connection_replaced(self, event):
+        # The same player reconnected elsewhere, this connection is stale
+        self.replaced = True
+        await self.send(text_data=json.dumps({"type": "connection_replaced"}))
+        await self.close()
 
-    async def player_items(self, event):
-        await self.send(text_data=json.dumps({
-            "type": "player_items",
-            "items": event["items"]
-        }))
+    async def presence_expired(self, event):
+        # Sent by the presence sweeper when this connection stopped sending heartbeats
+        logger.info(f"[PRESENCE] Closing silent connection for {self.username} in session {self.session_code}")
+        await self.close()
 
     async def game_session_ended(self, event):
         await self.send(text_data=json.dumps({
@@ -579,4 +578,33 @@ class GameSessionConsumer(AsyncWebsocketConsumer):
 
 
     def get_item_manager(self):
-        return session_item_managers.get(self.session_code)
\ No newline at end of file
+        return session_item_managers.get(self.session_code)
+
+    def get_session_state(self):
+        return session_states.get(self.session_code)
+
+    def get_chat_room(self):
+        chat_room = session_chats.get(self.session_code)
+        if chat_room is None:
+            chat_room = ChatRoom(self.channel_layer, self.room_group_name, self.session_id)
+            session_chats[self.session_code] = chat_room
+        return chat_room
+
+    def get_scheduler(self):
+        return session_schedulers.get(self.session_code)
+
+    async def get_or_load_session_state(self):
+        """
+        Returns the in-memory session state, loading it if this worker has not seen the game start.
+        Away from the scheduler's worker its scores and round go stale, only read the roster from it.
+        """
+        session_state = self.get_session_state()
+        if session_state:
+            return session_state
+
+        try:
+            session_state = await sync_to_async(SessionState.load)(self.session_code)
+        except GameSession.DoesNotExist:
+            return None
+
+        return session_states.setdefault(self.session_code, session_state)
\ No newline at end of file
@@ -0,0 +1,159 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from .backends import load_backend
+from .broadcast import encode_frame
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.event_log')
+
+
+def frame_with_seq(seq, text):
+    """
+    Puts the sequence number first in an already encoded frame, '{"type":...}' -> '{"seq":7,"type":...}'.
+    """
+    return f'{{"seq":{seq},{text[1:]}'
+
+
+class EventLog(ABC):
+    """
+    Numbers every event broadcast to a session room and keeps the most recent ones.
+
+    Sequence numbers only go up for as long as the room exists. A reconnecting client
+    sends the last number it saw and is replayed whatever it missed, as long as that
+    is still in the log. Otherwise it gets a snapshot instead.
+    """
+
+    @abstractmethod
+    async def append(self, room, text):
+        """
+        Assigns the next sequence number to an encoded frame, stores it and returns the numbered frame.
+        """
+
+    @abstractmethod
+    async def since(self, room, last_seq):
+        """
+        Returns the frames after last_seq, or None if some of them are no longer in the log.
+        """
+
+    @abstractmethod
+    async def current_seq(self, room):
+        ...
+
+    @abstractmethod
+    async def delete(self, room):
+        ...
+
+
+class InMemoryEventLog(EventLog):
+    """
+    Process-local log, used with a single worker and in tests.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        # room -> [last seq, deque of (seq, frame)]
+        self.rooms = {}
+
+    async def append(self, room, text):
+        log = self.rooms.get(room)
+        if log is None:
+            log = self.rooms[room] = [0, deque(maxlen=self.capacity)]
+        log[0] += 1
+        framed = frame_with_seq(log[0], text)
+        log[1].append((log[0], framed))
+        return framed
+
+    async def since(self, room, last_seq):
+        seq, events = self.rooms.get(room, (0, ()))
+        if last_seq > seq:
+            return None
+        if last_seq == seq:
+            return []
+        if not events or events[0][0] > last_seq + 1:
+            return None
+        return [framed for event_seq, framed in events if event_seq > last_seq]
+
+    async def current_seq(self, room):
+        return self.rooms.get(room, (0,))[0]
+
+    async def delete(self, room):
+        self.rooms.pop(room, None)
+
+
+class RedisEventLog(EventLog):
+    """
+    Log shared by all workers through a Redis-protocol server, so numbers are
+    consistent no matter which worker broadcast an event. Each room is a counter
+    plus a capped list of numbered frames.
+    """
+
+    APPEND = """
+    local seq = redis.call('INCR', KEYS[1])
+    local framed = '{"seq":' .. seq .. ',' .. string.sub(ARGV[1], 2)
+    redis.call('RPUSH', KEYS[2], framed)
+    redis.call('LTRIM', KEYS[2], -tonumber(ARGV[2]), -1)
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+    return framed
+    """
+
+    def __init__(self, url, prefix='quizzler', capacity=256, expiry=7200):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+        self.capacity = capacity
+        self.expiry = expiry
+        self.append_script = self.redis.register_script(self.APPEND)
+
+    def seq_key(self, room):
+        return f"{self.prefix}:events:{room}:seq"
+
+    def events_key(self, room):
+        return f"{self.prefix}:events:{room}"
+
+    async def append(self, room, text):
+        framed = await self.append_script(keys=[self.seq_key(room), self.events_key(room)], args=[text, self.capacity, self.expiry])
+        return framed.decode()
+
+    async def since(self, room, last_seq):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.get(self.seq_key(room))
+            pipe.lrange(self.events_key(room), 0, -1)
+            seq, events = await pipe.execute()
+
+        seq = int(seq or 0)
+        if last_seq > seq:
+            return None
+        missed = seq - last_seq
+        if missed > len(events):
+            return None
+        return [framed.decode() for framed in events[len(events) - missed:]]
+
+    async def current_seq(self, room):
+        return int(await self.redis.get(self.seq_key(room)) or 0)
+
+    async def delete(self, room):
+        await self.redis.delete(self.seq_key(room), self.events_key(room))
+
+
+event_log = None
+
+
+def get_event_log():
+    """
+    Returns the process-wide log configured by settings.EVENT_LOG.
+    """
+    global event_log
+    if event_log is None:
+        event_log = load_backend('EVENT_LOG', 'live_game_session.event_log.InMemoryEventLog')
+    return event_log
+
+
+async def publish(channel_layer, room, payload):
+    """
+    Broadcasts a session event to the whole room with the next sequence number, and keeps it for replay.
+    Messages for a single player's group go through broadcast() and are not numbered.
+    """
+    framed = await get_event_log().append(room, encode_frame(payload))
+    await channel_layer.group_send(room, {"type": "broadcast_frame", "text": framed})
@@ -0,0 +1,35 @@
+from django.utils import timezone
+from .models import Player
+
+
+def load_handshake(session_code, username):
+    """
+    Loads everything a new connection needs in a single query: the session's status,
+    the roster sent as player_list and the connecting player's id.
+
+    Returns None if the session has no players (or does not exist), otherwise
+    {"session_id", "is_active", "player", "players"} where player is the connecting
+    player's roster entry, or None if username is not on the roster. A session past
+    expires_at counts as inactive even before the reaper marks it.
+    """
+    rows = list(
+        Player.objects.filter(session__session_code=session_code)
+        .values_list("id", "username", "score", "session_id", "session__is_active", "session__expires_at")
+    )
+    if not rows:
+        return None
+
+    player = None
+    players = []
+    for row_id, row_username, score, _, _, _ in rows:
+        entry = {"id": row_id, "username": row_username, "score": score}
+        players.append(entry)
+        if row_username == username:
+            player = entry
+
+    return {
+        "session_id": rows[0][3],
+        "is_active": rows[0][4] and rows[0][5] > timezone.now(),
+        "player": player,
+        "players": players,
+    }
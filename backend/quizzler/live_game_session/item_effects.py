@@ -1,4 +1,6 @@
 from .models import Player
+from .item_store import ItemStateConflict, get_item_state_store
+from .round_resolution import load_shielded_ids, reset_shields, resolve_round
 import random
 import logging
 
@@ -11,136 +13,156 @@ class ItemManager:
     ITEM_TYPES = ["Cannon", "Torpedo", "Shield"]
     GRANT_ROUND_INTERVAL = 2
 
-    def __init__(self):
-        self.player_items = {}
-        self.item_queue = []
+    # Attempts at an optimistic update before giving up
+    MAX_UPDATE_ATTEMPTS = 5
 
-    def assign_item(self, player_id, item_type):
+    def __init__(self, session_code, store=None, rng_seed=None):
+        # Inventories and the item queue live in the store so every worker sees the same state
+        self.session_code = session_code
+        self.store = store if store is not None else get_item_state_store()
+        self.rng_seed = rng_seed if rng_seed is not None else session_code
+
+    def get_inventory(self, player_id):
+        """
+        Returns (items, version) for one player, read from the store.
+        """
+        _, player_items, _, versions = self.store.load(self.session_code)
+        return player_items.get(player_id, []), versions.get(player_id, 0)
+
+    def update(self, mutate):
+        """
+        Loads the item state, applies mutate(player_items, item_queue) and saves the result
+        only if no other worker changed the state in between, retrying otherwise.
+        mutate may run more than once, so it must not have side effects outside the state.
+
+        Every inventory the mutation changed gets its version bumped. Returns
+        (result of mutate, {player_id: {"items": [...], "version": n}} for the changed inventories).
+        """
+        for attempt in range(self.MAX_UPDATE_ATTEMPTS):
+            revision, player_items, item_queue, versions = self.store.load(self.session_code)
+            before = {player_id: tuple(items) for player_id, items in player_items.items()}
+
+            result = mutate(player_items, item_queue)
+
+            changes = {}
+            for player_id, items in player_items.items():
+                if tuple(items) != before.get(player_id):
+                    versions[player_id] = versions.get(player_id, 0) + 1
+                    changes[player_id] = {"items": list(items), "version": versions[player_id]}
+
+            if self.store.save(self.session_code, revision, player_items, item_queue, versions):
+                return result, changes
+            logger.info(f"Item state for session {self.session_code} changed during update, retrying (attempt {attempt + 1})")
+
+        raise ItemStateConflict(f"Could not update item state for session {self.session_code}")
+
+    def assign_item(self, player_items, player_id, item_type):
         """
         Assigns an item to a player, maintaining a max of 2 items.
         """
-        if player_id not in self.player_items:
-            self.player_items[player_id] = []
+        if player_id not in player_items:
+            player_items[player_id] = []
 
         # Enforce item limit
-        if len(self.player_items[player_id]) >= self.MAX_ITEMS:
-            self.player_items[player_id].pop(0)
+        if len(player_items[player_id]) >= self.MAX_ITEMS:
+            player_items[player_id].pop(0)
 
-        self.player_items[player_id].append(item_type)
-        print(f"Assigned {item_type} to player {player_id}")
+        player_items[player_id].append(item_type)
 
     def use_item(self, player_id, item_type, target_id=None):
         """
         Queues item effects except for Shield, which is applied immediately.
+        Returns (used, inventory changes), used is False if the player does not hold the item.
         """
         logger.info(f"use_item entered in item_effects.py with player_id: {player_id}, item_type: {item_type}, target_id: {target_id}")
-        logger.info(f"Current player_items: {self.player_items}")
 
-        # Check if player exists in player_items and if the item is present
-        if player_id not in self.player_items:
-            logger.warning(f"Player {player_id} not found in player_items. Current state: {self.player_items}")
-            return
+        def take_item(player_items, item_queue):
+            # Check if player exists in player_items and if the item is present
+            if item_type not in player_items.get(player_id, []):
+                return False
 
-        if item_type not in self.player_items[player_id]:
-            logger.warning(f"Item {item_type} not found for player {player_id}. Current items: {self.player_items[player_id]}")
-            return
-        
-
-        if item_type in self.player_items.get(player_id, []):
-            self.player_items[player_id].remove(item_type)
-
-            if item_type == "Shield":
-                self.apply_shield(player_id)
-            else:
-                self.item_queue.append({
+            player_items[player_id].remove(item_type)
+            if item_type != "Shield":
+                item_queue.append({
                     "player_id": player_id,
                     "item_type": item_type,
                     "target_id": target_id
                 })
+            return True
 
-    def apply_queued_items(self):
-        """
-        Apply all queued items at the end of the round and reset shields.
-        """
-        logger.info("apply_queued_items entered in item_efects.py")
-        while self.item_queue:
-            item_data = self.item_queue.pop(0)
-            self.apply_effect(
-                item_data["item_type"],
-                item_data["player_id"],
-                item_data["target_id"]
-            )
+        used, changes = self.update(take_item)
+        if not used:
+            logger.warning(f"Item {item_type} not found for player {player_id}.")
+            return False, changes
 
-        # Reset shields
-        Player.objects.filter(shield_active=True).update(shield_active=False)
+        if item_type == "Shield":
+            self.apply_shield(player_id)
+        return True, changes
 
-    def apply_effect(self, item_type, player_id, target_id):
+    def apply_queued_items(self, session_state):
         """
-        Applies the effect of the item.
+        Apply all queued items at the end of the round and reset shields.
+        Net deductions per target are computed in one pass and recorded in the session's
+        score ledger, which writes them with the round's other deltas in one scoped update.
+        Returns the round effects report.
         """
-        logger.info(f'apply_effect entered in item_efects.py, {player_id} hits {target_id} with {item_type}')
-        if item_type == "Cannon":
-            self.apply_cannon(player_id, target_id)
-        elif item_type == "Torpedo":
-            self.apply_torpedo(player_id, target_id)
+        logger.info("apply_queued_items entered in item_efects.py")
 
-    def apply_cannon(self, player_id, target_id):
-        """
-        Applies the Cannon effect: 75-point deduction.
-        """
-        logger.info(f'apply_cannon entered in item_efects.py, {player_id} againts {target_id}')
-        try:
-            target_player = Player.objects.get(id=target_id)
+        def take_queue(player_items, item_queue):
+            queued = list(item_queue)
+            item_queue.clear()
+            return queued
 
-            if not target_player.shield_active:
-                target_player.score -= 75
-                target_player.save()
-                print(f"Cannon hit {target_player.username} for -75 points")
-            else:
-                print(f"Cannon blocked by shield on {target_player.username}")
+        item_queue, _ = self.update(take_queue)
+        shielded_ids = load_shielded_ids(session_state.session_id) if item_queue else set()
 
-        except Player.DoesNotExist:
-            pass
+        round_effects = resolve_round(item_queue, shielded_ids, session_state.players_by_id)
+        for target_id, points in round_effects["deductions"].items():
+            session_state.score_ledger.add(target_id, -points)
 
-    def apply_torpedo(self, player_id, target_id):
-        """
-        Applies the Torpedo effect: 50-point deduction.
-        """
-        try:
-            target_player = Player.objects.get(id=target_id)
+        logger.info(f"Resolved {len(item_queue)} queued items for session {self.session_code}: {len(round_effects['hits'])} hits, {len(round_effects['blocked'])} blocked")
 
-            if not target_player.shield_active:
-                target_player.score -= 50
-                target_player.save()
-                print(f"Torpedo hit {target_player.username} for -50 points")
-            else:
-                print(f"Torpedo blocked by shield on {target_player.username}")
+        # Reset shields for this session only
+        reset_shields(session_state.session_id)
 
-        except Player.DoesNotExist:
-            pass
+        return round_effects
 
     def apply_shield(self, player_id):
         """
         Activates a shield for the current round.
         """
-        try:
-            player = Player.objects.get(id=player_id)
-            player.shield_active = True
-            player.save()
-            print(f"Shield activated for {player.username}")
-        except Player.DoesNotExist:
-            pass
+        if Player.objects.filter(id=player_id).update(shield_active=True):
+            logger.info(f"Shield activated for player {player_id}")
 
-    def grant_items(self, session):
+    def grant_items(self, session_state):
         logger.info("grant_items entered in item_efects.py")
         """
-        Grants 1 item to all players in the session every 3 rounds, 
-        but only if they have less than 2 items.
+        Grants 1 item to every player holding fewer than MAX_ITEMS items, every
+        GRANT_ROUND_INTERVAL rounds. All items for the round are drawn at once from the
+        round's RNG, started again on every retry, and the changed inventories are returned as {player_id: {"items": [...], "version": n}}.
+        """
+        if session_state.current_round % self.GRANT_ROUND_INTERVAL != 0:
+            return {}
+
+        player_ids = sorted(player["id"] for player in session_state.players.values())
+
+        def grant(player_items, item_queue):
+            # A retry must not continue the stream an earlier attempt already drew from
+            rng = self.round_rng(session_state.current_round)
+            # Check if player has less than MAX_ITEMS
+            eligible = [player_id for player_id in player_ids if len(player_items.get(player_id, [])) < self.MAX_ITEMS]
+            draws = rng.choices(self.ITEM_TYPES, k=len(eligible))
+
+            for player_id, item_type in zip(eligible, draws):
+                self.assign_item(player_items, player_id, item_type)
+
+        _, granted = self.update(grant)
+        logger.info(f"Granted {len(granted)} items for session {self.session_code} in round {session_state.current_round}")
+        return granted
+
+    def round_rng(self, round_index):
+        """
+        RNG for one round's grants, seeded from the session and round so draws are the same
+        on every worker, on optimistic retries and when a game is replayed.
         """
-        if session.current_round % self.GRANT_ROUND_INTERVAL == 0:
-            players = Player.objects.filter(session=session)
-            for player in players:
-                # Check if player has less than MAX_ITEMS
-                if len(self.player_items.get(player.id, [])) < self.MAX_ITEMS:
-                    item_type = random.choice(self.ITEM_TYPES)
-                    self.assign_item(player.id, item_type)
+        return random.Random(f"{self.rng_seed}:{round_index}")
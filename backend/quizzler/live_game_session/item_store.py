@@ -0,0 +1,157 @@
+from abc import ABC, abstractmethod
+from .backends import load_backend
+import threading
+import json
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.item_store')
+
+# Bumped whenever the serialized layout below changes
+ITEM_STATE_FORMAT = 2
+
+# One character per item keeps inventories and queued effects small on the wire
+ITEM_CODES = {"Cannon": "C", "Torpedo": "T", "Shield": "S"}
+ITEM_NAMES = {code: name for name, code in ITEM_CODES.items()}
+
+
+class ItemStateConflict(Exception):
+    """
+    Raised when an update keeps losing the optimistic concurrency race.
+    """
+
+
+def dump_item_state(player_items, item_queue, versions):
+    """
+    Serializes inventories, queued effects and per-player inventory versions as compact JSON, eg.
+    {"v":2,"i":{"12":"CS"},"q":[[12,"T",14]],"n":{"12":3}}
+    """
+    return json.dumps({
+        "v": ITEM_STATE_FORMAT,
+        "i": {str(player_id): "".join(ITEM_CODES[item] for item in items) for player_id, items in player_items.items()},
+        "q": [[effect["player_id"], ITEM_CODES[effect["item_type"]], effect["target_id"]] for effect in item_queue],
+        "n": {str(player_id): version for player_id, version in versions.items()},
+    }, separators=(',', ':'))
+
+
+def load_item_state(raw):
+    if not raw:
+        return {}, [], {}
+    data = json.loads(raw)
+    if data.get("v") != ITEM_STATE_FORMAT:
+        logger.warning(f"[ITEM_STORE] Discarding item state with unknown format {data.get('v')}")
+        return {}, [], {}
+    player_items = {int(player_id): [ITEM_NAMES[code] for code in codes] for player_id, codes in data["i"].items()}
+    item_queue = [
+        {"player_id": player_id, "item_type": ITEM_NAMES[code], "target_id": target_id}
+        for player_id, code, target_id in data["q"]
+    ]
+    versions = {int(player_id): version for player_id, version in data["n"].items()}
+    return player_items, item_queue, versions
+
+
+class ItemStateStore(ABC):
+    """
+    Holds each session's item state as a (revision, serialized state) pair.
+    save() only succeeds if the revision is still the one that was loaded.
+    """
+
+    def load(self, session_code):
+        """
+        Returns (revision, player_items, item_queue, versions).
+        """
+        revision, raw = self.load_raw(session_code)
+        player_items, item_queue, versions = load_item_state(raw)
+        return revision, player_items, item_queue, versions
+
+    def save(self, session_code, expected_revision, player_items, item_queue, versions):
+        return self.save_raw(session_code, expected_revision, dump_item_state(player_items, item_queue, versions))
+
+    @abstractmethod
+    def load_raw(self, session_code):
+        ...
+
+    @abstractmethod
+    def save_raw(self, session_code, expected_revision, raw):
+        ...
+
+    @abstractmethod
+    def delete(self, session_code):
+        ...
+
+
+class InMemoryItemStateStore(ItemStateStore):
+    """
+    Process-local store, used with a single worker and in tests.
+    """
+
+    def __init__(self):
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def load_raw(self, session_code):
+        with self.lock:
+            return self.states.get(session_code, (0, None))
+
+    def save_raw(self, session_code, expected_revision, raw):
+        with self.lock:
+            revision, _ = self.states.get(session_code, (0, None))
+            if revision != expected_revision:
+                return False
+            self.states[session_code] = (revision + 1, raw)
+            return True
+
+    def delete(self, session_code):
+        with self.lock:
+            self.states.pop(session_code, None)
+
+
+class RedisItemStateStore(ItemStateStore):
+    """
+    Store shared by all workers through a Redis-protocol server. The compare-and-set
+    runs as a server-side script so the revision check and the write are atomic.
+    """
+
+    COMPARE_AND_SET = """
+    local revision = tonumber(redis.call('HGET', KEYS[1], 'rev') or '0')
+    if revision ~= tonumber(ARGV[1]) then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], 'rev', revision + 1, 'data', ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 1
+    """
+
+    def __init__(self, url, prefix='quizzler', expiry=7200):
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.expiry = expiry
+        self.compare_and_set = self.redis.register_script(self.COMPARE_AND_SET)
+
+    def state_key(self, session_code):
+        return f"{self.prefix}:items:{session_code}"
+
+    def load_raw(self, session_code):
+        revision, raw = self.redis.hmget(self.state_key(session_code), 'rev', 'data')
+        return int(revision or 0), raw
+
+    def save_raw(self, session_code, expected_revision, raw):
+        saved = self.compare_and_set(keys=[self.state_key(session_code)], args=[expected_revision, raw, self.expiry])
+        return bool(saved)
+
+    def delete(self, session_code):
+        self.redis.delete(self.state_key(session_code))
+
+
+item_state_store = None
+
+
+def get_item_state_store():
+    """
+    Returns the process-wide store configured by settings.ITEM_STATE_STORE.
+    """
+    global item_state_store
+    if item_state_store is None:
+        item_state_store = load_backend('ITEM_STATE_STORE', 'live_game_session.item_store.InMemoryItemStateStore')
+    return item_state_store
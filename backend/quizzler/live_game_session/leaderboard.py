@@ -0,0 +1,40 @@
+from .event_log import publish
+
+
+class LeaderboardBroadcaster:
+    """
+    Tracks which scores of one session clients have already been sent.
+
+    During a question only the entries that changed since the last message are sent,
+    as part of each graded answer batch. At the end of a question a full ranked
+    snapshot is sent (update_scores) so every client converges on the same final scores.
+    """
+
+    def __init__(self, channel_layer, group_name, session_state):
+        self.channel_layer = channel_layer
+        self.group_name = group_name
+        self.session_state = session_state
+
+        # username -> score as last sent to the group
+        self.last_sent = {}
+
+    def ranked_scores(self):
+        players = sorted(self.session_state.players.values(), key=lambda player: (-player["score"], player["username"]))
+        return [{"username": player["username"], "score": player["score"]} for player in players]
+
+    def take_changes(self):
+        """
+        Returns the entries that changed since the last message and marks them as sent.
+        """
+        scores = self.ranked_scores()
+        changes = [entry for entry in scores if self.last_sent.get(entry["username"]) != entry["score"]]
+        self.last_sent = {entry["username"]: entry["score"] for entry in scores}
+        return changes
+
+    async def flush(self):
+        """
+        Sends the full ranked leaderboard.
+        """
+        scores = self.ranked_scores()
+        self.last_sent = {entry["username"]: entry["score"] for entry in scores}
+        await publish(self.channel_layer, self.group_name, {"type": "update_scores", "scores": scores})
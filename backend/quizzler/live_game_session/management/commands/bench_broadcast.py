@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from channels.layers import InMemoryChannelLayer
+from live_game_session.broadcast import broadcast, orjson
+import asyncio
+import json
+import time
+
+
+class Command(BaseCommand):
+    help = "Measures CPU time per group broadcast of a full scoreboard as the room grows, per-consumer json.dumps vs pre-serialized frames."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,50,100,300,500', help='Comma separated room sizes')
+        parser.add_argument('--rounds', type=int, default=20, help='Broadcasts per measurement')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        rounds = options['rounds']
+
+        self.stdout.write(f"encoder: {'orjson' if orjson is not None else 'json'}")
+        self.stdout.write(f"{'players':>8} {'per-consumer ms':>16} {'pre-serialized ms':>18} {'speedup':>8}")
+        for size in sizes:
+            legacy, frame = asyncio.run(self.measure(size, rounds))
+            self.stdout.write(f"{size:>8} {legacy * 1000:>16.2f} {frame * 1000:>18.2f} {legacy / frame:>7.1f}x")
+
+    async def measure(self, size, rounds):
+        channel_layer = InMemoryChannelLayer(capacity=rounds * 2 + 10)
+        group_name = "session_BENCH1"
+        channels = []
+        for _ in range(size):
+            channel_name = await channel_layer.new_channel()
+            await channel_layer.group_add(group_name, channel_name)
+            channels.append(channel_name)
+
+        scores = [{"username": f"player{index}", "score": index * 100} for index in range(size)]
+
+        async def legacy_round():
+            # Old path: the event dict goes to every consumer, each rebuilds and encodes it
+            await channel_layer.group_send(group_name, {"type": "update_scores", "scores": scores})
+            for channel_name in channels:
+                event = await channel_layer.receive(channel_name)
+                json.dumps({"type": "update_scores", "scores": event["scores"]})
+
+        async def frame_round():
+            # New path: encoded once by the sender, consumers forward the text
+            await broadcast(channel_layer, group_name, {"type": "update_scores", "scores": scores})
+            for channel_name in channels:
+                event = await channel_layer.receive(channel_name)
+                event["text"]
+
+        legacy = await self.time_rounds(legacy_round, rounds)
+        frame = await self.time_rounds(frame_round, rounds)
+        await channel_layer.flush()
+        return legacy, frame
+
+    async def time_rounds(self, run_round, rounds):
+        start = time.process_time()
+        for _ in range(rounds):
+            await run_round()
+        return (time.process_time() - start) / rounds
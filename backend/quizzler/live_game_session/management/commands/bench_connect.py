@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from authentication.models import CustomUser
+from games.models import Game
+from live_game_session.models import GameSession, Player
+from live_game_session.routing import websocket_urlpatterns
+from live_game_session import consumers
+import asyncio
+import time
+
+
+def legacy_handshake(session_code, username):
+    """
+    The handshake as connect() loaded it before load_handshake(): the session, the roster
+    and the connecting player in three round trips. Only kept to measure the difference.
+    """
+    try:
+        session = GameSession.objects.get(session_code=session_code)
+    except GameSession.DoesNotExist:
+        return None
+
+    players = list(Player.objects.filter(session=session).values("id", "username", "score"))
+    try:
+        player = Player.objects.get(session=session, username=username)
+        player = {"id": player.id, "username": player.username, "score": player.score}
+    except Player.DoesNotExist:
+        player = None
+
+    return {
+        "session_id": session.id,
+        "is_active": session.is_active and session.expires_at > timezone.now(),
+        "player": player,
+        "players": players,
+    }
+
+
+class Command(BaseCommand):
+    help = "Measures websocket handshakes per second for a class joining one session. Creates and then deletes its own user, game and session."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=300, help='Players joining the session')
+        parser.add_argument('--concurrency', type=int, default=50, help='Handshakes in flight at once')
+        parser.add_argument('--legacy', action='store_true', help='Load the handshake with the previous three queries, to compare')
+
+    def handle(self, *args, **options):
+        players = options['players']
+        concurrency = options['concurrency']
+
+        user, session = self.create_session(players)
+        load_handshake = consumers.load_handshake
+        if options['legacy']:
+            consumers.load_handshake = legacy_handshake
+        try:
+            elapsed = asyncio.run(self.connect_all(session.session_code, players, concurrency))
+        finally:
+            consumers.load_handshake = load_handshake
+            user.delete()
+
+        path = "legacy handshake" if options['legacy'] else "single-query handshake"
+        self.stdout.write(f"{players} handshakes, {concurrency} at a time, {path}: {elapsed:.2f}s, {players / elapsed:.0f} connects/s")
+
+    def create_session(self, players):
+        user = CustomUser.objects.create_user(email='bench-connect@quizzler.invalid', password='bench-connect', username='bench-connect')
+        game = Game.objects.create(owner=user, title='Connect benchmark')
+        session = GameSession.objects.create(host=user, game=game, session_code='BENCHC')
+        Player.objects.bulk_create([Player(session=session, username=f"player{index}") for index in range(players)])
+        return user, session
+
+    async def connect_all(self, session_code, players, concurrency):
+        application = URLRouter(websocket_urlpatterns)
+        semaphore = asyncio.Semaphore(concurrency)
+        communicators = []
+
+        async def connect(index):
+            async with semaphore:
+                communicator = WebsocketCommunicator(application, f"/ws/session/{session_code}/?username=player{index}")
+                connected, _ = await communicator.connect(timeout=30)
+                if connected:
+                    communicators.append(communicator)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[connect(index) for index in range(players)])
+        elapsed = time.perf_counter() - start
+
+        for communicator in communicators:
+            await communicator.disconnect()
+        await sync_to_async(lambda: None)()
+        return elapsed
@@ -0,0 +1,169 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from datetime import timedelta
+from authentication.models import CustomUser
+from games.models import Game, Question, Choice
+from live_game_session.models import GameSession, Player
+from live_game_session.reaper import delete_in_batches
+from live_game_session.utils import SessionCodeAllocator
+import time
+
+BENCH_PREFIX = 'benchq'
+# Real codes are upper case, a lower case prefix keeps the synthetic ones apart
+BENCH_CODE_PREFIX = 'q'
+
+
+def with_ids(rows, queryset):
+    """
+    MySQL does not return the ids of bulk inserted rows, they are the newest rows of queryset in insert order.
+    """
+    if rows and rows[0].pk is None:
+        ids = list(queryset.order_by('-id').values_list('id', flat=True)[:len(rows)])
+        for row, row_id in zip(rows, reversed(ids)):
+            row.pk = row_id
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Loads synthetic games and players, then reports query plans and latencies of the hot lookups with and without their indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=1_000_000, help='Synthetic players to load')
+        parser.add_argument('--games', type=int, default=100_000, help='Synthetic games to load')
+        parser.add_argument('--players-per-session', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=200, help='Runs of each query per measurement')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--plans', action='store_true', help='Print EXPLAIN output for each query')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the synthetic data and exit')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        if options['cleanup']:
+            self.cleanup()
+            return
+
+        if not GameSession.objects.filter(host__username__startswith=BENCH_PREFIX).exists():
+            started = time.perf_counter()
+            self.load(options['games'], options['players'], options['players_per_session'])
+            self.stdout.write(f"loaded synthetic data in {time.perf_counter() - started:.1f}s")
+
+        queries = self.queries()
+        repeat = options['repeat']
+
+        # Drop the indexes added for these lookups, measure, then put them back. SQLite rebuilds the table
+        # to drop a constraint and keeps the unique (session, username) index, run on MySQL for real numbers
+        indexed = self.measure(queries, repeat, options['plans'])
+        self.toggle_indexes(add=False)
+        try:
+            plain = self.measure(queries, repeat, options['plans'])
+        finally:
+            self.toggle_indexes(add=True)
+
+        self.stdout.write(f"{'query':<28} {'without ms':>11} {'with ms':>9} {'speedup':>8}")
+        for name in queries:
+            self.stdout.write(f"{name:<28} {plain[name] * 1000:>11.3f} {indexed[name] * 1000:>9.3f} {plain[name] / indexed[name]:>7.1f}x")
+
+    def load(self, games, players, players_per_session):
+        sessions = players // players_per_session
+        codes = SessionCodeAllocator(length=5)
+        if sessions > codes.space:
+            raise CommandError(f"At most {codes.space * players_per_session} players fit in synthetic sessions of {players_per_session}.")
+
+        owners = with_ids(
+            CustomUser.objects.bulk_create(
+                [CustomUser(username=f"{BENCH_PREFIX}{index}", email=f"{BENCH_PREFIX}{index}@example.com") for index in range(max(1, games // 100))],
+                batch_size=self.batch_size,
+            ),
+            CustomUser.objects.filter(username__startswith=BENCH_PREFIX),
+        )
+
+        game_rows = with_ids(
+            Game.objects.bulk_create(
+                [Game(owner=owners[index % len(owners)], title=f"Game {index}", is_public=index % 10 == 0) for index in range(games)],
+                batch_size=self.batch_size,
+            ),
+            Game.objects.filter(owner__username__startswith=BENCH_PREFIX),
+        )
+        question_rows = with_ids(
+            Question.objects.bulk_create(
+                [Question(game=game, question_text=f"Question {index}") for index, game in enumerate(game_rows)],
+                batch_size=self.batch_size,
+            ),
+            Question.objects.filter(game__owner__username__startswith=BENCH_PREFIX),
+        )
+        Choice.objects.bulk_create(
+            [Choice(question=question, choice_text=f"Choice {number}", is_correct=number == 0) for question in question_rows for number in range(4)],
+            batch_size=self.batch_size,
+        )
+
+        # Mostly finished sessions with a few still active, like a live deployment before the reaper runs
+        now = timezone.now()
+        session_rows = with_ids(
+            GameSession.objects.bulk_create(
+                [
+                    GameSession(
+                        host=owners[index % len(owners)],
+                        game=game_rows[index % len(game_rows)],
+                        session_code=f"{BENCH_CODE_PREFIX}{codes.encode(index)}",
+                        is_active=index % 50 == 0,
+                        expires_at=now - timedelta(hours=index % 72),
+                    )
+                    for index in range(sessions)
+                ],
+                batch_size=self.batch_size,
+            ),
+            GameSession.objects.filter(host__username__startswith=BENCH_PREFIX),
+        )
+        for start in range(0, len(session_rows), self.batch_size // players_per_session or 1):
+            chunk = session_rows[start:start + (self.batch_size // players_per_session or 1)]
+            Player.objects.bulk_create(
+                [Player(session=session, username=f"player{number}") for session in chunk for number in range(players_per_session)],
+                batch_size=self.batch_size,
+            )
+
+    def queries(self):
+        session = GameSession.objects.filter(host__username__startswith=BENCH_PREFIX).order_by('-id').first()
+        owner = CustomUser.objects.filter(username__startswith=BENCH_PREFIX).order_by('-id').first()
+        question = Question.objects.filter(game__owner=owner).order_by('-id').first()
+
+        return {
+            "player_by_username": Player.objects.filter(session_id=session.id, username="player7").values_list('id', flat=True),
+            "correct_choice": Choice.objects.filter(question_id=question.id, is_correct=True).values_list('choice_text', flat=True),
+            "expired_sessions": GameSession.objects.filter(is_active=True, expires_at__lte=timezone.now()).values_list('id', flat=True)[:500],
+            "games_by_owner": Game.objects.filter(owner=owner).order_by('-created_at').values_list('id', flat=True)[:50],
+            "public_games": Game.objects.filter(is_public=True).order_by('-created_at').values_list('id', flat=True)[:50],
+        }
+
+    def measure(self, queries, repeat, plans):
+        results = {}
+        for name, queryset in queries.items():
+            if plans:
+                self.stdout.write(f"-- {name}\n{queryset.explain()}")
+
+            # .all() clones the queryset so every run goes to the database
+            list(queryset.all())
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            results[name] = (time.perf_counter() - started) / repeat
+        return results
+
+    def toggle_indexes(self, add):
+        with connection.schema_editor() as schema_editor:
+            for model in (Player, GameSession, Game, Choice):
+                for index in model._meta.indexes:
+                    (schema_editor.add_index if add else schema_editor.remove_index)(model, index)
+                for constraint in model._meta.constraints:
+                    (schema_editor.add_constraint if add else schema_editor.remove_constraint)(model, constraint)
+
+    def cleanup(self):
+        owners = CustomUser.objects.filter(username__startswith=BENCH_PREFIX)
+        deleted = 0
+        deleted += delete_in_batches(Player.objects.filter(session__host__in=owners), self.batch_size)
+        deleted += delete_in_batches(GameSession.objects.filter(host__in=owners), self.batch_size)
+        deleted += delete_in_batches(Choice.objects.filter(question__game__owner__in=owners), self.batch_size)
+        deleted += delete_in_batches(Question.objects.filter(game__owner__in=owners), self.batch_size)
+        deleted += delete_in_batches(Game.objects.filter(owner__in=owners), self.batch_size)
+        deleted += delete_in_batches(owners, self.batch_size)
+        self.stdout.write(f"deleted {deleted} synthetic rows")
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from live_game_session.reaper import reap_sessions, close_expired_sessions
+import asyncio
+
+
+class Command(BaseCommand):
+    help = "Deactivates expired game sessions, closes their websocket groups and purges players of sessions that ended long ago. Meant to run from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'SESSION_REAPER_BATCH_SIZE', 500), help='Rows updated or deleted per statement')
+        parser.add_argument('--retention', type=int, default=getattr(settings, 'SESSION_RETENTION', 24 * 60 * 60), help='Seconds a finished session and its players are kept')
+        parser.add_argument('--no-purge', action='store_true', help='Only deactivate expired sessions, keep all rows')
+
+    def handle(self, *args, **options):
+        # Connections live in the ASGI workers, they are reached through the channel layer.
+        # An in-memory layer is private to this process, a deactivated session's sockets would stay
+        # open and the workers' reaper would no longer see it as expired, so expiry is left to them
+        channel_layer = get_channel_layer()
+        shared = not isinstance(channel_layer, InMemoryChannelLayer)
+        if not shared:
+            self.stderr.write(self.style.WARNING(
+                "The channel layer is in memory, so this process cannot close the workers' connections. "
+                "Expired sessions are left to the reaper inside the workers (SESSION_REAPER_INTERVAL), only old sessions are purged."
+            ))
+
+        result = reap_sessions(options['batch_size'], options['retention'], purge=not options['no_purge'], expire=shared)
+
+        if result["expired"]:
+            asyncio.run(close_expired_sessions(channel_layer, result["expired"]))
+
+        self.stdout.write(
+            f"expired {len(result['expired'])} sessions, "
+            f"purged {result['sessions_purged']} sessions and {result['players_purged']} players"
+        )
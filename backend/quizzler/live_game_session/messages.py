@@ -0,0 +1,62 @@
+from .broadcast import broadcast
+from .event_log import publish
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.messages')
+
+
+def player_group_name(room_group_name, player_id):
+    # Personal group so inventory changes reach only the player's own connections
+    return f"{room_group_name}_player_{player_id}"
+
+
+async def send_question(channel_layer, room_group_name, session_state, question_index, duration):
+    """
+    Broadcasts a question with the number of seconds its answer window stays open.
+    """
+    question = session_state.get_question(question_index)
+    if question is None:
+        logger.info(f"Invalid question index: {question_index}")
+        return
+
+    logger.info(f"Broadcasting question {question_index} for game {session_state.game_id}")
+    await publish(
+        channel_layer,
+        room_group_name,
+        {
+            "type": "question_broadcast",
+            "question_index": question_index,
+            "question_data": question.broadcast_data,
+            "duration": duration
+        }
+    )
+
+
+async def send_inventory_changes(channel_layer, room_group_name, changes):
+    """
+    Sends each changed inventory to its owner as a versioned delta, plus one small
+    public summary of item counts to the whole session.
+    """
+    if not changes:
+        return
+
+    for player_id, change in changes.items():
+        await broadcast(
+            channel_layer,
+            player_group_name(room_group_name, player_id),
+            {
+                "type": "player_items_delta",
+                "player_id": player_id,
+                "items": change["items"],
+                "version": change["version"]
+            }
+        )
+
+    await publish(
+        channel_layer,
+        room_group_name,
+        {
+            "type": "player_items_summary",
+            "counts": {player_id: len(change["items"]) for player_id, change in changes.items()}
+        }
+    )
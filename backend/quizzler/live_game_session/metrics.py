@@ -0,0 +1,12 @@
+from collections import Counter
+
+# Process-wide counters, each worker keeps its own
+counters = Counter()
+
+
+def increment(name, amount=1):
+    counters[name] += amount
+
+
+def snapshot():
+    return dict(counters)
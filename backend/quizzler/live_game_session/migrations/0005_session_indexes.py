@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 12:51
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_players(apps, schema_editor):
+    # Joins used to be checked with exists() only, keep the first row of any username taken twice
+    Player = apps.get_model('live_game_session', 'Player')
+    duplicates = (
+        Player.objects.values('session_id', 'username')
+        .annotate(rows=Count('id'), first_id=Min('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        Player.objects.filter(session_id=duplicate['session_id'], username=duplicate['username']).exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_game_session', '0004_chatmessage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(fields=['is_active', 'expires_at'], name='session_active_expires_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_players, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='player',
+            constraint=models.UniqueConstraint(fields=('session', 'username'), name='unique_player_username_per_session'),
+        ),
+    ]
@@ -18,9 +18,27 @@ class GameSession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(default=get_default_expiration)
 
+    class Meta:
+        # The reaper looks for active sessions past expires_at
+        indexes = [
+            models.Index(fields=['is_active', 'expires_at'], name='session_active_expires_idx'),
+        ]
+
 class Player(models.Model):
     session = models.ForeignKey(GameSession, on_delete=models.CASCADE)
     username = models.CharField(max_length=50, validators=[MinLengthValidator(1), MaxLengthValidator(50)])
     score = models.IntegerField(default=0)
-    shield_active = models.BooleanField(default=False)    
+    shield_active = models.BooleanField(default=False)
+
+    class Meta:
+        # A username is taken once per session, the constraint's index also serves lookups by (session, username)
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'username'], name='unique_player_username_per_session'),
+        ]
 
+
+class ChatMessage(models.Model):
+    session = models.ForeignKey(GameSession, on_delete=models.CASCADE, related_name='chat_messages')
+    username = models.CharField(max_length=50)
+    message = models.CharField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,120 @@
+from django.conf import settings
+from .event_log import publish
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.presence')
+
+
+class PresenceRegistry:
+    """
+    Tracks when each connection served by this process was last heard from.
+
+    Any message from the client, including the periodic ping, counts as a heartbeat.
+    A sweeper task closes connections that stay silent for longer than the timeout.
+    Joins and leaves are merged per room and broadcast once per window as presence_update.
+    Nothing here is written to the database.
+    """
+
+    def __init__(self, channel_layer, timeout=None, sweep_interval=None, window=None):
+        self.channel_layer = channel_layer
+        self.timeout = timeout if timeout is not None else getattr(settings, 'PRESENCE_TIMEOUT', 60)
+        self.sweep_interval = sweep_interval if sweep_interval is not None else getattr(settings, 'PRESENCE_SWEEP_INTERVAL', 15)
+        self.window = window if window is not None else getattr(settings, 'PRESENCE_BROADCAST_WINDOW', 0.5)
+
+        # channel_name -> {"room", "username", "player_id", "last_seen"}
+        self.connections = {}
+        # room -> {username: (status, player_id)} waiting for the next broadcast
+        self.pending = {}
+        self.pending_tasks = {}
+        self.sweeper = None
+
+    def connected(self, room, channel_name, username, player_id):
+        self.connections[channel_name] = {
+            "room": room,
+            "username": username,
+            "player_id": player_id,
+            "last_seen": time.monotonic(),
+        }
+        self.mark(room, username, player_id, "online")
+
+        if self.sweeper is None or self.sweeper.done():
+            self.sweeper = asyncio.ensure_future(self.sweep_forever())
+
+    def seen(self, channel_name):
+        connection = self.connections.get(channel_name)
+        if connection is not None:
+            connection["last_seen"] = time.monotonic()
+
+    def disconnected(self, channel_name, announce=True):
+        """
+        Forgets the connection. announce is False when a newer connection of the same player replaced it.
+        """
+        connection = self.connections.pop(channel_name, None)
+        if connection is not None and announce:
+            self.mark(connection["room"], connection["username"], connection["player_id"], "offline")
+
+    def mark(self, room, username, player_id, status):
+        # A later change for the same player replaces the earlier one, a quick drop and rejoin sends nothing new
+        self.pending.setdefault(room, {})[username] = (status, player_id)
+
+        task = self.pending_tasks.get(room)
+        if task is None or task.done():
+            self.pending_tasks[room] = asyncio.ensure_future(self.broadcast_after_window(room))
+
+    async def broadcast_after_window(self, room):
+        await asyncio.sleep(self.window)
+        self.pending_tasks.pop(room, None)
+        changes = self.pending.pop(room, None)
+        if not changes:
+            return
+
+        online = []
+        offline = []
+        for username, (status, player_id) in changes.items():
+            entry = {"player_id": player_id, "username": username}
+            (online if status == "online" else offline).append(entry)
+
+        try:
+            await publish(self.channel_layer, room, {"type": "presence_update", "online": online, "offline": offline})
+        except Exception as e:
+            logger.error(f"[PRESENCE] Error broadcasting presence for {room}: {str(e)}")
+
+    async def sweep_forever(self):
+        try:
+            while self.connections:
+                await asyncio.sleep(self.sweep_interval)
+                await self.expire_silent()
+        finally:
+            self.sweeper = None
+
+    async def expire_silent(self):
+        """
+        Closes every connection not heard from within the timeout. The consumer closes its
+        own socket on presence_expired, its disconnect() then frees the rest of its state.
+        """
+        cutoff = time.monotonic() - self.timeout
+        expired = [channel_name for channel_name, connection in self.connections.items() if connection["last_seen"] < cutoff]
+
+        for channel_name in expired:
+            connection = self.connections[channel_name]
+            logger.info(f"[PRESENCE] {connection['username']} in {connection['room']} timed out.")
+            self.disconnected(channel_name)
+            try:
+                await self.channel_layer.send(channel_name, {"type": "presence_expired"})
+            except Exception as e:
+                logger.error(f"[PRESENCE] Error expiring {channel_name}: {str(e)}")
+
+
+presence_registry = None
+
+
+def get_presence_registry(channel_layer):
+    """
+    Returns the process-wide presence registry, created on first use with the consumers' channel layer.
+    """
+    global presence_registry
+    if presence_registry is None:
+        presence_registry = PresenceRegistry(channel_layer)
+    return presence_registry
@@ -0,0 +1,56 @@
+from django.conf import settings
+import time
+
+DEFAULT_RATE_LIMITS = {
+    "connection": (20, 40),
+    "default": (2, 5),
+}
+
+
+class TokenBucket:
+    """
+    Allows rate events per second on average with bursts of up to capacity.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ConnectionRateLimiter:
+    """
+    Token buckets for one websocket connection: one for every frame it sends, and one per message type.
+    Limits come from settings.WEBSOCKET_RATE_LIMITS as {name: (per second, burst)}, types without
+    their own entry use "default".
+    """
+
+    def __init__(self, limits=None):
+        self.limits = limits if limits is not None else getattr(settings, 'WEBSOCKET_RATE_LIMITS', DEFAULT_RATE_LIMITS)
+        self.connection = TokenBucket(*self.limits["connection"])
+        self.buckets = {}
+
+    def allow_frame(self):
+        return self.connection.take()
+
+    def allow(self, message_type):
+        """
+        message_type must be a known type, the buckets are created on first use.
+        """
+        bucket = self.buckets.get(message_type)
+        if bucket is None:
+            rate, burst = self.limits.get(message_type, self.limits["default"])
+            bucket = self.buckets[message_type] = TokenBucket(rate, burst)
+        return bucket.take()
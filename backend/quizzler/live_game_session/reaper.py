@@ -0,0 +1,147 @@
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from .models import GameSession, Player, ChatMessage
+from .item_store import get_item_state_store
+from .event_log import get_event_log
+import asyncio
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.reaper')
+
+
+def deactivate_expired_sessions(batch_size, now=None):
+    """
+    Marks active sessions past expires_at as inactive, batch_size rows per UPDATE.
+    Returns the codes of the sessions that were deactivated.
+    """
+    now = now or timezone.now()
+    codes = []
+    while True:
+        batch = list(
+            GameSession.objects.filter(is_active=True, expires_at__lte=now)
+            .values_list('id', 'session_code')[:batch_size]
+        )
+        if not batch:
+            return codes
+        GameSession.objects.filter(id__in=[session_id for session_id, _ in batch]).update(is_active=False)
+        codes.extend(session_code for _, session_code in batch)
+
+
+def delete_in_batches(queryset, batch_size):
+    """
+    Deletes the rows of queryset batch_size primary keys at a time, so no statement locks the whole set.
+    """
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += queryset.model.objects.filter(id__in=ids).delete()[0]
+
+
+def purge_old_sessions(batch_size, retention, now=None):
+    """
+    Deletes sessions that ended more than retention seconds ago with their players and
+    chat lines. Final scores stay available until then. Returns (sessions, players) deleted.
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=retention)
+    sessions = players = 0
+    while True:
+        session_ids = list(
+            GameSession.objects.filter(is_active=False, expires_at__lte=cutoff)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not session_ids:
+            return sessions, players
+        players += delete_in_batches(Player.objects.filter(session_id__in=session_ids), batch_size)
+        delete_in_batches(ChatMessage.objects.filter(session_id__in=session_ids), batch_size)
+        sessions += GameSession.objects.filter(id__in=session_ids).delete()[0]
+
+
+def reap_sessions(batch_size=None, retention=None, purge=True, expire=True):
+    """
+    Deactivates expired sessions, unless expire is False, and purges long finished ones.
+    Returns {"expired": [session codes], "sessions_purged", "players_purged"}.
+    """
+    batch_size = batch_size or getattr(settings, 'SESSION_REAPER_BATCH_SIZE', 500)
+    retention = retention if retention is not None else getattr(settings, 'SESSION_RETENTION', 24 * 60 * 60)
+
+    now = timezone.now()
+    expired = deactivate_expired_sessions(batch_size, now) if expire else []
+    sessions_purged = players_purged = 0
+    if purge:
+        sessions_purged, players_purged = purge_old_sessions(batch_size, retention, now)
+
+    if expired or sessions_purged:
+        logger.info(f"[REAPER] Deactivated {len(expired)} expired sessions, purged {sessions_purged} sessions and {players_purged} players")
+    return {"expired": expired, "sessions_purged": sessions_purged, "players_purged": players_purged}
+
+
+async def close_expired_sessions(channel_layer, session_codes):
+    """
+    Tells every connection of the expired sessions to leave, on every worker. Their
+    disconnect() frees the per-session state of the worker that serves them. Shared
+    item state and event logs are dropped here since nobody may join again.
+    """
+    for session_code in session_codes:
+        room = f"session_{session_code}"
+        try:
+            await channel_layer.group_send(room, {
+                "type": "game.session_ended",
+                "message": "The session has expired."
+            })
+            await sync_to_async(get_item_state_store().delete)(session_code)
+            await get_event_log().delete(room)
+        except Exception as e:
+            logger.error(f"[REAPER] Error closing expired session {session_code}: {str(e)}")
+
+
+class SessionReaper:
+    """
+    Optional in-process reaper, runs reap_sessions() every interval seconds in the
+    event loop of an ASGI worker. release is called with each expired session code
+    to free whatever this worker still keeps for it in memory.
+    """
+
+    def __init__(self, channel_layer, release, interval):
+        self.channel_layer = channel_layer
+        self.release = release
+        self.interval = interval
+        self.task = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run_forever())
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reap_once()
+            except Exception as e:
+                logger.error(f"[REAPER] Error reaping sessions: {str(e)}")
+
+    async def reap_once(self):
+        result = await sync_to_async(reap_sessions)()
+        await close_expired_sessions(self.channel_layer, result["expired"])
+        for session_code in result["expired"]:
+            await self.release(session_code)
+        return result
+
+
+session_reaper = None
+
+
+def get_session_reaper(channel_layer, release):
+    """
+    Returns the process-wide reaper, or None unless settings.SESSION_REAPER_INTERVAL is set.
+    """
+    global session_reaper
+    interval = getattr(settings, 'SESSION_REAPER_INTERVAL', None)
+    if not interval:
+        return None
+    if session_reaper is None:
+        session_reaper = SessionReaper(channel_layer, release, interval)
+    return session_reaper
@@ -0,0 +1,266 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from .backends import load_backend
+import time
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.rooms')
+
+
+class RoomRegistry(ABC):
+    """
+    Tracks which websocket channels are connected to each session room.
+
+    The channel layer only delivers group messages, it cannot say who is in a group
+    on every backend. The registry answers that question for all workers, while also
+    remembering which channels this process serves so per-process state can be freed.
+    It also keeps when each username's connection was last heard from, so a username
+    is only taken over from a connection that went silent.
+    """
+
+    def __init__(self):
+        # room -> {channel_name: username} for connections handled by this process
+        self.local_rooms = defaultdict(dict)
+
+    def local_count(self, room):
+        return len(self.local_rooms.get(room, ()))
+
+    async def join(self, room, channel_name, username):
+        """
+        Adds the channel to the room. Returns False without joining if the username
+        already has a connection in the room on any worker.
+        """
+        if not await self.add_member(room, channel_name, username):
+            return False
+        self.local_rooms[room][channel_name] = username
+        return True
+
+    async def take_over(self, room, channel_name, username, idle_after):
+        """
+        Joins even if the username is connected already, moving the username to this channel,
+        but only if its connection has not been heard from for idle_after seconds.
+        Returns (taken, the channel that held it before or None).
+        """
+        taken, previous = await self.replace_member(room, channel_name, username, time.time() - idle_after)
+        if taken:
+            self.local_rooms[room][channel_name] = username
+        return taken, previous
+
+    async def touch(self, room, channel_name, username):
+        """
+        Records that the connection holding username is alive.
+        """
+        await self.touch_member(room, channel_name, username, time.time())
+
+    async def leave(self, room, channel_name, username):
+        """
+        Removes the channel and returns how many channels are still in the room across all workers.
+        """
+        local_members = self.local_rooms.get(room)
+        if local_members is not None:
+            local_members.pop(channel_name, None)
+            if not local_members:
+                del self.local_rooms[room]
+        return await self.remove_member(room, channel_name, username)
+
+    @abstractmethod
+    async def add_member(self, room, channel_name, username):
+        """
+        Claims username for channel_name, atomically, returns False if it is already taken.
+        """
+
+    @abstractmethod
+    async def replace_member(self, room, channel_name, username, silent_since):
+        """
+        Moves username to channel_name unless its connection was heard from after the
+        silent_since timestamp, atomically. Returns (taken, previous channel or None).
+        """
+
+    @abstractmethod
+    async def touch_member(self, room, channel_name, username, now):
+        """
+        Stores now as the username's last heartbeat if channel_name still holds it.
+        """
+
+    @abstractmethod
+    async def remove_member(self, room, channel_name, username):
+        """
+        Releases the channel, and the username if this channel still holds it. Returns the room size.
+        """
+
+    @abstractmethod
+    async def count(self, room):
+        ...
+
+    @abstractmethod
+    async def usernames(self, room):
+        """
+        Returns the usernames connected to the room on any worker.
+        """
+
+
+class LocalRoomRegistry(RoomRegistry):
+    """
+    In-process registry for a single worker, paired with the in-memory channel layer and used in tests.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # room -> {username: channel_name}
+        self.claimed = defaultdict(dict)
+        # room -> {username: time of the last heartbeat}
+        self.heartbeats = defaultdict(dict)
+
+    async def add_member(self, room, channel_name, username):
+        # No await between the check and the write, so this is atomic on the event loop
+        room_usernames = self.claimed[room]
+        if username in room_usernames:
+            return False
+        room_usernames[username] = channel_name
+        self.heartbeats[room][username] = time.time()
+        return True
+
+    async def replace_member(self, room, channel_name, username, silent_since):
+        room_usernames = self.claimed[room]
+        previous = room_usernames.get(username)
+        if previous is not None and self.heartbeats[room].get(username, 0) > silent_since:
+            return False, previous
+        room_usernames[username] = channel_name
+        self.heartbeats[room][username] = time.time()
+        return True, previous
+
+    async def touch_member(self, room, channel_name, username, now):
+        if self.claimed.get(room, {}).get(username) == channel_name:
+            self.heartbeats[room][username] = now
+
+    async def remove_member(self, room, channel_name, username):
+        room_usernames = self.claimed.get(room)
+        if room_usernames is not None:
+            if room_usernames.get(username) == channel_name:
+                del room_usernames[username]
+                self.heartbeats[room].pop(username, None)
+            if not room_usernames:
+                del self.claimed[room]
+                self.heartbeats.pop(room, None)
+        return self.local_count(room)
+
+    async def count(self, room):
+        return self.local_count(room)
+
+    async def usernames(self, room):
+        return list(self.claimed.get(room, ()))
+
+
+class RedisRoomRegistry(RoomRegistry):
+    """
+    Registry shared by all workers through a Redis-protocol server.
+    Each room is a hash of channel_name -> username plus an index of username -> channel_name
+    and a hash of username -> last heartbeat, all expire if no worker touches them.
+    """
+
+    ADD_MEMBER = """
+    if redis.call('HSETNX', KEYS[2], ARGV[2], ARGV[1]) == 0 then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('HSET', KEYS[3], ARGV[2], ARGV[4])
+    for _, key in ipairs(KEYS) do
+        redis.call('EXPIRE', key, ARGV[3])
+    end
+    return 1
+    """
+
+    REPLACE_MEMBER = """
+    local previous = redis.call('HGET', KEYS[2], ARGV[2])
+    if previous and tonumber(redis.call('HGET', KEYS[3], ARGV[2]) or '0') > tonumber(ARGV[4]) then
+        return {0, previous}
+    end
+    if previous then
+        redis.call('HDEL', KEYS[1], previous)
+    end
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[1])
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('HSET', KEYS[3], ARGV[2], ARGV[5])
+    for _, key in ipairs(KEYS) do
+        redis.call('EXPIRE', key, ARGV[3])
+    end
+    return {1, previous}
+    """
+
+    TOUCH_MEMBER = """
+    if redis.call('HGET', KEYS[2], ARGV[2]) == ARGV[1] then
+        redis.call('HSET', KEYS[3], ARGV[2], ARGV[3])
+        for _, key in ipairs(KEYS) do
+            redis.call('EXPIRE', key, ARGV[4])
+        end
+    end
+    """
+
+    REMOVE_MEMBER = """
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    if redis.call('HGET', KEYS[2], ARGV[2]) == ARGV[1] then
+        redis.call('HDEL', KEYS[2], ARGV[2])
+        redis.call('HDEL', KEYS[3], ARGV[2])
+    end
+    return redis.call('HLEN', KEYS[1])
+    """
+
+    def __init__(self, url, prefix='quizzler', expiry=7200):
+        super().__init__()
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+        self.expiry = expiry
+        self.add_member_script = self.redis.register_script(self.ADD_MEMBER)
+        self.replace_member_script = self.redis.register_script(self.REPLACE_MEMBER)
+        self.touch_member_script = self.redis.register_script(self.TOUCH_MEMBER)
+        self.remove_member_script = self.redis.register_script(self.REMOVE_MEMBER)
+
+    def room_key(self, room):
+        return f"{self.prefix}:room:{room}"
+
+    def usernames_key(self, room):
+        return f"{self.prefix}:room:{room}:users"
+
+    def heartbeats_key(self, room):
+        return f"{self.prefix}:room:{room}:seen"
+
+    def keys(self, room):
+        return [self.room_key(room), self.usernames_key(room), self.heartbeats_key(room)]
+
+    async def add_member(self, room, channel_name, username):
+        added = await self.add_member_script(keys=self.keys(room), args=[channel_name, username, self.expiry, time.time()])
+        return bool(added)
+
+    async def replace_member(self, room, channel_name, username, silent_since):
+        taken, previous = await self.replace_member_script(
+            keys=self.keys(room),
+            args=[channel_name, username, self.expiry, silent_since, time.time()],
+        )
+        return bool(taken), previous.decode() if previous else None
+
+    async def touch_member(self, room, channel_name, username, now):
+        await self.touch_member_script(keys=self.keys(room), args=[channel_name, username, now, self.expiry])
+
+    async def remove_member(self, room, channel_name, username):
+        return await self.remove_member_script(keys=self.keys(room), args=[channel_name, username])
+
+    async def count(self, room):
+        return await self.redis.hlen(self.room_key(room))
+
+    async def usernames(self, room):
+        return [username.decode() for username in await self.redis.hkeys(self.usernames_key(room))]
+
+
+room_registry = None
+
+
+def get_room_registry():
+    """
+    Returns the process-wide registry configured by settings.ROOM_REGISTRY.
+    """
+    global room_registry
+    if room_registry is None:
+        room_registry = load_backend('ROOM_REGISTRY', 'live_game_session.rooms.LocalRoomRegistry')
+    return room_registry
@@ -0,0 +1,210 @@
+from .answers import AnswerIngestor
+from .event_log import publish
+from .rounds import RoundScheduler
+import asyncio
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.round_dispatch')
+
+# session_code -> RoundScheduler running on this worker
+session_schedulers = {}
+
+
+def scheduler_group_name(room_group_name):
+    # Only the worker running the session's scheduler is in this group
+    return f"{room_group_name}_scheduler"
+
+
+class RoundDispatcher:
+    """
+    Routes answers, the host's round controls and snapshot requests to the worker that
+    runs the session's RoundScheduler, wherever the player is connected.
+
+    The worker that starts a game listens on a channel of its own and adds it to the
+    session's scheduler group. Other workers forward to that group and only hear back
+    when an answer is refused or a control fails. A scheduler on this worker is called
+    directly. release is called with a session code once its last player left on any
+    worker, to free what this worker still keeps for the running game.
+    """
+
+    def __init__(self, channel_layer, release):
+        self.channel_layer = channel_layer
+        self.release = release
+        self.channel_name = None
+        self.reader = None
+
+    async def listen(self):
+        if self.channel_name is None:
+            self.channel_name = await self.channel_layer.new_channel()
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.ensure_future(self.read_forever())
+
+    async def read_forever(self):
+        while True:
+            message = await self.channel_layer.receive(self.channel_name)
+            try:
+                await self.dispatch(message)
+            except Exception as e:
+                logger.error(f"[ROUNDS] Error handling {message.get('type')} for session {message.get('session_code')}: {str(e)}")
+
+    async def dispatch(self, message):
+        session_code = message["session_code"]
+        scheduler = session_schedulers.get(session_code)
+
+        if message["type"] == "round.answer":
+            status = RoundScheduler.CLOSED
+            if scheduler:
+                status = scheduler.submit_answer(message["question_index"], message["player_id"], message["selected_answer"])
+            if status != AnswerIngestor.ACCEPTED:
+                await self.reject_answer(message["reply_channel"], message["question_index"], status)
+
+        elif message["type"] == "round.control":
+            if scheduler is None:
+                await self.channel_layer.send(message["reply_channel"], {"type": "round.error", "message": "No round is running."})
+                return
+            # Closing a round writes to the database, answers for other sessions should not wait for it
+            asyncio.ensure_future(self.run_control(scheduler, message["username"], message["action"]))
+
+        elif message["type"] == "round.snapshot":
+            if scheduler:
+                await self.channel_layer.send(message["reply_channel"], {
+                    "type": "session.snapshot",
+                    "snapshot": scheduler.snapshot(),
+                    "event_seq": message["event_seq"],
+                })
+
+        elif message["type"] == "round.stop":
+            # A newer start of the same session took over on another worker
+            if message["sender"] != self.channel_name:
+                await self.drop(session_code)
+
+        elif message["type"] == "round.release":
+            await self.release(session_code)
+
+    async def adopt(self, session_code, scheduler):
+        """
+        Makes scheduler the session's only one, stopping any a previous start left on this or another worker.
+        """
+        await self.listen()
+        group = scheduler_group_name(scheduler.group_name)
+
+        old_scheduler = session_schedulers.pop(session_code, None)
+        if old_scheduler:
+            old_scheduler.cancel()
+        await self.channel_layer.group_send(group, {"type": "round.stop", "session_code": session_code, "sender": self.channel_name})
+
+        session_schedulers[session_code] = scheduler
+        await self.channel_layer.group_add(group, self.channel_name)
+
+    async def drop(self, session_code):
+        scheduler = session_schedulers.pop(session_code, None)
+        if scheduler is None:
+            return
+        scheduler.cancel()
+        if self.channel_name:
+            await self.channel_layer.group_discard(scheduler_group_name(scheduler.group_name), self.channel_name)
+
+    async def submit_answer(self, room_group_name, session_code, question_index, player_id, selected_answer, reply_channel):
+        """
+        Queues an answer with the session's scheduler. Returns its status when the scheduler
+        runs here, otherwise None: the answer is forwarded and reply_channel gets
+        answer.rejected only if it is refused.
+        """
+        scheduler = session_schedulers.get(session_code)
+        if scheduler:
+            return scheduler.submit_answer(question_index, player_id, selected_answer)
+
+        await self.channel_layer.group_send(scheduler_group_name(room_group_name), {
+            "type": "round.answer",
+            "session_code": session_code,
+            "question_index": question_index,
+            "player_id": player_id,
+            "selected_answer": selected_answer,
+            "reply_channel": reply_channel,
+        })
+        return None
+
+    async def control(self, room_group_name, session_code, username, action, reply_channel):
+        """
+        Pauses, resumes or skips the session's round on the worker that runs it.
+        """
+        scheduler = session_schedulers.get(session_code)
+        if scheduler:
+            await self.run_control(scheduler, username, action)
+            return
+
+        await self.channel_layer.group_send(scheduler_group_name(room_group_name), {
+            "type": "round.control",
+            "session_code": session_code,
+            "username": username,
+            "action": action,
+            "reply_channel": reply_channel,
+        })
+
+    async def run_control(self, scheduler, username, action):
+        # Only the host can pause, resume or skip
+        if username != scheduler.session_state.host_username:
+            logger.warning(f"[ROUNDS] Non-host {username} attempted {action}. Ignoring.")
+            return
+
+        if action == "skip_round":
+            await scheduler.skip()
+            return
+
+        changed = scheduler.pause() if action == "pause_round" else scheduler.resume()
+        if changed:
+            await publish(
+                self.channel_layer,
+                scheduler.group_name,
+                {
+                    "type": "round_paused" if scheduler.paused else "round_resumed",
+                    "question_index": scheduler.round_index,
+                    "time_remaining": scheduler.time_remaining()
+                }
+            )
+
+    async def request_snapshot(self, room_group_name, session_code, event_seq, reply_channel):
+        """
+        Asks the worker running the session's scheduler to send reply_channel session.snapshot.
+        Nobody answers in the lobby, when no game was started.
+        """
+        await self.channel_layer.group_send(scheduler_group_name(room_group_name), {
+            "type": "round.snapshot",
+            "session_code": session_code,
+            "event_seq": event_seq,
+            "reply_channel": reply_channel,
+        })
+
+    async def release_everywhere(self, room_group_name, session_code):
+        """
+        Tells the worker running the session's scheduler that nobody is left in the session.
+        """
+        await self.channel_layer.group_send(scheduler_group_name(room_group_name), {"type": "round.release", "session_code": session_code})
+
+    async def reject_answer(self, reply_channel, question_index, reason):
+        await self.channel_layer.send(reply_channel, {"type": "answer.rejected", "question_index": question_index, "reason": reason})
+
+
+round_dispatcher = None
+
+
+def get_round_dispatcher(channel_layer, release):
+    """
+    Returns the process-wide round dispatcher, created on first use with the consumers' channel layer.
+    """
+    global round_dispatcher
+    if round_dispatcher is None:
+        round_dispatcher = RoundDispatcher(channel_layer, release)
+    return round_dispatcher
+
+
+async def release_scheduler(session_code):
+    """
+    Stops the session's scheduler if it runs on this worker.
+    """
+    if round_dispatcher is not None:
+        await round_dispatcher.drop(session_code)
+        return
+    scheduler = session_schedulers.pop(session_code, None)
+    if scheduler:
+        scheduler.cancel()
@@ -0,0 +1,51 @@
+from collections import Counter
+from .models import Player
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.round_resolution')
+
+# Points taken from the target by each attacking item
+ITEM_DAMAGE = {"Cannon": 75, "Torpedo": 50}
+
+
+def resolve_round(item_queue, shielded_ids, players_by_id):
+    """
+    Resolves a whole round of queued items in one pass.
+
+    Returns a report {"deductions": {target_id: points}, "hits": [...], "blocked": [...]}
+    where hits and blocked list every attack with the usernames involved. Attacks on
+    players outside the session roster are dropped.
+    """
+    deductions = Counter()
+    hits = []
+    blocked = []
+
+    for effect in item_queue:
+        damage = ITEM_DAMAGE.get(effect["item_type"])
+        source = players_by_id.get(effect["player_id"])
+        target = players_by_id.get(effect["target_id"])
+        if damage is None or target is None:
+            continue
+
+        entry = {
+            "item_type": effect["item_type"],
+            "source_username": source["username"] if source else None,
+            "target_username": target["username"],
+        }
+
+        if target["id"] in shielded_ids:
+            blocked.append(entry)
+        else:
+            deductions[target["id"]] += damage
+            entry["points"] = -damage
+            hits.append(entry)
+
+    return {"deductions": dict(deductions), "hits": hits, "blocked": blocked}
+
+
+def load_shielded_ids(session_id):
+    return set(Player.objects.filter(session_id=session_id, shield_active=True).values_list('id', flat=True))
+
+
+def reset_shields(session_id):
+    Player.objects.filter(session_id=session_id, shield_active=True).update(shield_active=False)
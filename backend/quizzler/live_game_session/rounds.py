@@ -0,0 +1,231 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from .event_log import publish
+from .messages import send_question, send_inventory_changes
+from .leaderboard import LeaderboardBroadcaster
+from .answers import AnswerIngestor
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.rounds')
+
+
+class RoundScheduler:
+    """
+    Owns the question timer of one running session.
+
+    Each question gets an answer window that closes at a monotonic deadline. Answers go
+    through an AnswerIngestor while it is open. When it closes, the last answers are
+    graded, queued items are resolved, new items are granted, the leaderboard is sent
+    and the next question goes out, or the game ends after the last one. The host can
+    only pause, resume or skip. The scheduler lives in the worker that started the game,
+    RoundDispatcher brings it the answers and controls sent to other workers. It keeps
+    running while the session has players on any worker, also after the host left.
+    """
+
+    CLOSED = "closed"
+
+    def __init__(self, channel_layer, group_name, session_state, item_manager, duration=None):
+        self.channel_layer = channel_layer
+        self.group_name = group_name
+        self.session_state = session_state
+        self.item_manager = item_manager
+        self.leaderboard = LeaderboardBroadcaster(channel_layer, group_name, session_state)
+        self.answers = AnswerIngestor(channel_layer, group_name, session_state, self.leaderboard)
+        self.duration = duration if duration is not None else getattr(settings, 'ROUND_DURATION', 30)
+        # A round that fails to close is tried again, the game ends after too many failures in a row
+        self.retry_delay = getattr(settings, 'ROUND_RETRY_DELAY', 5)
+        self.retry_limit = getattr(settings, 'ROUND_RETRY_LIMIT', 3)
+        self.failures = 0
+
+        self.round_index = None
+        # Monotonic time the answer window closes, None while paused or between rounds
+        self.deadline = None
+        # Seconds left in the window while paused
+        self.remaining = None
+        self.timer = None
+        # Serializes closing a round so a skip and the timer cannot both advance the game
+        self.lock = asyncio.Lock()
+
+    @property
+    def paused(self):
+        return self.remaining is not None
+
+    def time_remaining(self):
+        if self.paused:
+            return self.remaining
+        if self.deadline is None:
+            return 0
+        return max(0.0, self.deadline - time.monotonic())
+
+    def snapshot(self):
+        """
+        The session state's snapshot with the open question's remaining time, only this worker knows it.
+        """
+        snapshot = self.session_state.snapshot()
+        if snapshot["phase"] == "question":
+            snapshot["time_remaining"] = self.time_remaining()
+            snapshot["paused"] = self.paused
+        return snapshot
+
+    def accepts(self, question_index):
+        """
+        True if an answer to question_index arrives while its window is open. Stale and late answers are refused here.
+        """
+        return question_index == self.round_index and self.deadline is not None and time.monotonic() < self.deadline
+
+    def submit_answer(self, question_index, player_id, selected_answer):
+        """
+        Queues an answer for grading. Returns AnswerIngestor's status, or CLOSED if the window is not open.
+        """
+        if not self.accepts(question_index):
+            return self.CLOSED
+        return self.answers.submit(player_id, selected_answer)
+
+    async def start(self, round_index):
+        self.open_round(round_index)
+        await send_question(self.channel_layer, self.group_name, self.session_state, round_index, self.duration)
+
+    def open_round(self, round_index):
+        self.round_index = round_index
+        self.remaining = None
+        self.answers.open_question(round_index)
+        self.run_timer(self.duration)
+
+    def run_timer(self, seconds):
+        self.stop_timer()
+        self.deadline = time.monotonic() + seconds
+        self.timer = asyncio.ensure_future(self.close_after(self.round_index, seconds))
+
+    def stop_timer(self):
+        if self.timer is not None and not self.timer.done():
+            self.timer.cancel()
+        self.timer = None
+
+    async def close_after(self, round_index, seconds):
+        await asyncio.sleep(seconds)
+        self.timer = None
+        await self.close_round(round_index)
+
+    def pause(self):
+        if self.deadline is None:
+            return False
+        self.remaining = self.time_remaining()
+        self.deadline = None
+        self.stop_timer()
+        return True
+
+    def resume(self):
+        if not self.paused:
+            return False
+        seconds = self.remaining
+        self.remaining = None
+        self.run_timer(seconds)
+        return True
+
+    async def skip(self):
+        self.stop_timer()
+        await self.close_round(self.round_index)
+
+    def cancel(self):
+        self.stop_timer()
+        self.answers.cancel()
+        self.round_index = None
+        self.deadline = None
+        self.remaining = None
+
+    async def close_round(self, round_index):
+        async with self.lock:
+            # The round was already closed by the timer or an earlier skip
+            if round_index is None or round_index != self.round_index:
+                return
+            self.deadline = None
+            self.remaining = None
+
+            try:
+                await self.answers.drain()
+                await self.advance()
+                self.failures = 0
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"[ROUNDS] Error advancing {self.group_name} past round {round_index} (failure {self.failures}): {str(e)}")
+                await self.recover(round_index)
+
+    async def recover(self, round_index):
+        """
+        Keeps a failed round from hanging the game: closing it is tried again after
+        retry_delay seconds, and after retry_limit failures the game ends with the
+        scores it has.
+        """
+        # The next question already went out and has its own timer
+        if round_index != self.round_index:
+            return
+
+        if self.failures < self.retry_limit:
+            self.timer = asyncio.ensure_future(self.close_after(round_index, self.retry_delay))
+            return
+
+        self.round_index = None
+        self.session_state.finished = True
+        try:
+            await publish(
+                self.channel_layer,
+                self.group_name,
+                {
+                    "type": "game_ended",
+                    "message": "The game was stopped after an error.",
+                    "scores": self.session_state.scores(),
+                }
+            )
+        except Exception as e:
+            logger.error(f"[ROUNDS] Error ending {self.group_name}: {str(e)}")
+
+    async def advance(self):
+        session_state = self.session_state
+
+        # Apply item effects before moving to next question, hits are added to this round's score ledger
+        if self.item_manager:
+            round_effects = await sync_to_async(self.item_manager.apply_queued_items)(session_state)
+
+            # One message describing every hit and block of the round
+            if round_effects["hits"] or round_effects["blocked"]:
+                await publish(
+                    self.channel_layer,
+                    self.group_name,
+                    {
+                        "type": "round_effects",
+                        "hits": round_effects["hits"],
+                        "blocked": round_effects["blocked"],
+                    }
+                )
+
+            # Grant items based on the new round index and send updated items to frontend
+            granted = await sync_to_async(self.item_manager.grant_items)(session_state)
+            await send_inventory_changes(self.channel_layer, self.group_name, granted)
+
+        # Question is over, send one full ranked snapshot including item effects
+        await self.leaderboard.flush()
+
+        next_index = session_state.current_round + 1
+        if next_index < session_state.question_count:
+            session_state.set_round(next_index)
+            await session_state.flush()
+            await self.start(next_index)
+            return
+
+        # End game if no more questions, the round stays open to recover() until everyone has heard
+        scores = session_state.scores()
+        session_state.finished = True
+        await session_state.flush()
+
+        await publish(
+            self.channel_layer,
+            self.group_name,
+            {
+                "type": "game_ended",
+                "message": "Game Over",
+                "scores": scores,
+            }
+        )
+        self.round_index = None
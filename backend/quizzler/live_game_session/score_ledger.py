@@ -0,0 +1,65 @@
+from collections import Counter, defaultdict
+from django.db.models import Case, F, IntegerField, Value, When
+from .models import Player
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.score_ledger')
+
+
+class ScoreLedger:
+    """
+    Accumulates score deltas for one session (answers, item hits) and applies them
+    to the Player table in a single UPDATE ... SET score = score + CASE ... statement.
+
+    Because the write is relative to the stored score, concurrent writers never
+    lose each other's points and only the score column is touched.
+    """
+
+    def __init__(self, session_id, roster=None):
+        self.session_id = session_id
+        # player_id -> {"score", ...}, kept in step with the deltas when provided
+        self.roster = roster
+        self.deltas = Counter()
+
+    def add(self, player_id, delta):
+        if not delta:
+            return
+        self.deltas[player_id] += delta
+        if self.roster is not None and player_id in self.roster:
+            self.roster[player_id]["score"] += delta
+
+    def take(self):
+        """
+        Returns the pending deltas and starts a new round of accumulation.
+        """
+        pending = {player_id: delta for player_id, delta in self.deltas.items() if delta}
+        self.deltas = Counter()
+        return pending
+
+    def restore(self, pending):
+        """
+        Puts back deltas from take() that could not be written, the roster already has them.
+        """
+        self.deltas.update(pending)
+
+    def apply(self, deltas):
+        """
+        Applies the given {player_id: delta} map in one UPDATE scoped to the session.
+        Players sharing the same delta share one WHEN branch to keep the statement small.
+        """
+        if not deltas:
+            return 0
+
+        ids_by_delta = defaultdict(list)
+        for player_id, delta in deltas.items():
+            ids_by_delta[delta].append(player_id)
+
+        increment = Case(
+            *[When(id__in=player_ids, then=Value(delta)) for delta, player_ids in ids_by_delta.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        updated = Player.objects.filter(session_id=self.session_id, id__in=list(deltas)).update(score=F('score') + increment)
+
+        logger.info(f"[SCORE_LEDGER] Applied {len(deltas)} score deltas for session {self.session_id}")
+        return updated
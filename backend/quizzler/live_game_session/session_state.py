@@ -0,0 +1,131 @@
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from .models import GameSession, Player
+from .score_ledger import ScoreLedger
+from games.question_pack import get_question_pack
+import logging
+
+logger = logging.getLogger('quizzler.live_game_session.session_state')
+
+
+class SessionState:
+    """
+    In-memory copy of a running game session.
+
+    Loaded once when the host starts the game so that answers, item use and round
+    changes are served from memory. Score changes go through a ScoreLedger and,
+    together with the current round, are written back in batches by flush().
+    """
+
+    def __init__(self, session, players, question_pack):
+        self.session_id = session.id
+        self.session_code = session.session_code
+        self.game_id = session.game_id
+        self.host_username = session.host.username
+        self.current_round = session.current_round
+        # Set once the last question is over, nothing is left but the final scores
+        self.finished = False
+
+        # username -> {"id", "username", "score"}
+        self.players = {}
+        self.players_by_id = {}
+        for player in players:
+            self.add_player(player.id, player.username, player.score)
+
+        # compiled, immutable questions shared with other sessions of the same game
+        self.question_pack = question_pack
+
+        # shared with the ItemManager so answers and item hits land in the same batch
+        self.score_ledger = ScoreLedger(self.session_id, self.players_by_id)
+        self.round_dirty = False
+
+    @classmethod
+    def load(cls, session_code):
+        """
+        Loads the session and its players, the game's questions come from the shared question pack cache.
+        """
+        session = GameSession.objects.select_related('host', 'game').get(session_code=session_code)
+        players = Player.objects.filter(session=session).only('id', 'username', 'score')
+        question_pack = get_question_pack(session.game_id, session.game.version)
+
+        logger.info(f"[SESSION_STATE] Loaded session {session_code} with {len(question_pack)} questions")
+        return cls(session, list(players), question_pack)
+
+    # -- Players --
+
+    def add_player(self, player_id, username, score=0):
+        if username in self.players:
+            return self.players[username]
+        player = {"id": player_id, "username": username, "score": score}
+        self.players[username] = player
+        self.players_by_id[player_id] = player
+        return player
+
+    def get_player(self, username):
+        return self.players.get(username)
+
+    def get_player_by_id(self, player_id):
+        return self.players_by_id.get(player_id)
+
+    def scores(self):
+        return [{"username": player["username"], "score": player["score"]} for player in self.players.values()]
+
+    # -- Questions --
+
+    @property
+    def question_count(self):
+        return len(self.question_pack)
+
+    def get_question(self, question_index):
+        return self.question_pack.get(question_index)
+
+    def set_round(self, round_index):
+        self.current_round = round_index
+        self.round_dirty = True
+
+    def snapshot(self):
+        """
+        Everything a client needs to rejoin the running game, built from memory only.
+        """
+        if self.finished:
+            return {"phase": "ended", "game_id": self.game_id, "scores": self.scores()}
+
+        question = self.get_question(self.current_round)
+        return {
+            "phase": "question",
+            "game_id": self.game_id,
+            "question_index": self.current_round,
+            "question_data": question.broadcast_data if question else None,
+            "scores": self.scores(),
+        }
+
+    # -- Persistence --
+
+    async def flush(self):
+        """
+        Writes pending score deltas and the current round back to the database.
+        Pending changes are taken on the event loop before the thread hop so that
+        changes made while the write is running are kept for the next flush. If the
+        write fails they are put back for the next flush and the error is raised.
+        """
+        score_deltas = self.score_ledger.take()
+        current_round = self.current_round if self.round_dirty else None
+        self.round_dirty = False
+
+        if not score_deltas and current_round is None:
+            return
+
+        try:
+            await sync_to_async(self.write_changes)(score_deltas, current_round)
+        except Exception:
+            self.score_ledger.restore(score_deltas)
+            if current_round is not None:
+                self.round_dirty = True
+            raise
+
+    def write_changes(self, score_deltas, current_round):
+        with transaction.atomic():
+            self.score_ledger.apply(score_deltas)
+
+            if current_round is not None:
+                GameSession.objects.filter(id=self.session_id).update(current_round=current_round)
@@ -1,3 +1,363 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import CustomUser
+from games.models import Game
+from .answers import AnswerIngestor
+from .event_log import InMemoryEventLog
+from .item_effects import ItemManager
+from .item_store import InMemoryItemStateStore, ItemStateConflict
+from .models import GameSession, Player
+from .score_ledger import ScoreLedger
+from .rooms import LocalRoomRegistry
+from .round_resolution import resolve_round
+from .session_state import SessionState
+from .utils import SessionCodeAllocator, create_game_session
 
-# Create your tests here.
+
+def session_with_players(current_round, player_ids):
+    players = {f"player{player_id}": {"id": player_id, "username": f"player{player_id}", "score": 0} for player_id in player_ids}
+    return SimpleNamespace(current_round=current_round, players=players)
+
+
+def hosted_session(host_name="host"):
+    host = CustomUser.objects.create_user(email=f"{host_name}@example.com", password="pw", username=host_name)
+    return create_game_session(host, Game.objects.create(owner=host, title="Game"))
+
+
+class RacingItemStateStore(InMemoryItemStateStore):
+    """
+    Lets another writer save right before each of the first `races` saves, like a second worker would.
+    """
+
+    def __init__(self, races):
+        super().__init__()
+        self.races = races
+
+    def save_raw(self, session_code, expected_revision, raw):
+        if self.races:
+            self.races -= 1
+            revision, current = self.load_raw(session_code)
+            super().save_raw(session_code, revision, current)
+        return super().save_raw(session_code, expected_revision, raw)
+
+
+class ItemManagerTests(SimpleTestCase):
+    def test_same_seed_and_round_grant_the_same_items(self):
+        session_state = session_with_players(4, [1, 2, 3, 4, 5])
+        first = ItemManager("ABC123", store=InMemoryItemStateStore()).grant_items(session_state)
+        second = ItemManager("ABC123", store=InMemoryItemStateStore()).grant_items(session_state)
+
+        self.assertEqual(len(first), 5)
+        self.assertEqual(first, second)
+
+    def test_conflicts_do_not_change_the_grants(self):
+        session_state = session_with_players(4, [1, 2, 3, 4, 5])
+        plain = ItemManager("ABC123", store=InMemoryItemStateStore()).grant_items(session_state)
+        racing = ItemManager("ABC123", store=RacingItemStateStore(races=2)).grant_items(session_state)
+
+        self.assertEqual(plain, racing)
+
+    def test_grants_only_every_interval(self):
+        session_state = session_with_players(ItemManager.GRANT_ROUND_INTERVAL + 1, [1])
+        self.assertEqual(ItemManager("ABC123", store=InMemoryItemStateStore()).grant_items(session_state), {})
+
+    def test_full_inventories_get_nothing(self):
+        manager = ItemManager("ABC123", store=InMemoryItemStateStore())
+        manager.update(lambda player_items, item_queue: player_items.update({1: ["Shield", "Cannon"]}))
+
+        granted = manager.grant_items(session_with_players(0, [1, 2]))
+        self.assertEqual(list(granted), [2])
+
+    def test_update_retries_after_a_conflict(self):
+        manager = ItemManager("ABC123", store=RacingItemStateStore(races=2))
+
+        calls = []
+        def add_torpedo(player_items, item_queue):
+            calls.append(1)
+            player_items[7] = ["Torpedo"]
+
+        _, changes = manager.update(add_torpedo)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(changes, {7: {"items": ["Torpedo"], "version": 1}})
+        self.assertEqual(manager.get_inventory(7), (["Torpedo"], 1))
+
+    def test_update_gives_up_after_max_attempts(self):
+        manager = ItemManager("ABC123", store=RacingItemStateStore(races=ItemManager.MAX_UPDATE_ATTEMPTS))
+        with self.assertRaises(ItemStateConflict):
+            manager.update(lambda player_items, item_queue: None)
+
+
+class ResolveRoundTests(SimpleTestCase):
+    players_by_id = {
+        1: {"id": 1, "username": "ann", "score": 0},
+        2: {"id": 2, "username": "bob", "score": 0},
+        3: {"id": 3, "username": "cid", "score": 0},
+    }
+
+    def test_attacks_on_one_target_add_up(self):
+        queue = [
+            {"player_id": 1, "item_type": "Cannon", "target_id": 2},
+            {"player_id": 3, "item_type": "Torpedo", "target_id": 2},
+        ]
+        report = resolve_round(queue, set(), self.players_by_id)
+
+        self.assertEqual(report["deductions"], {2: 125})
+        self.assertEqual([hit["points"] for hit in report["hits"]], [-75, -50])
+        self.assertEqual(report["blocked"], [])
+
+    def test_shield_blocks_every_attack_on_its_holder(self):
+        queue = [
+            {"player_id": 1, "item_type": "Cannon", "target_id": 2},
+            {"player_id": 3, "item_type": "Torpedo", "target_id": 2},
+            {"player_id": 2, "item_type": "Torpedo", "target_id": 1},
+        ]
+        report = resolve_round(queue, {2}, self.players_by_id)
+
+        self.assertEqual(report["deductions"], {1: 50})
+        self.assertEqual(len(report["blocked"]), 2)
+        self.assertEqual(report["hits"][0]["target_username"], "ann")
+
+    def test_unknown_targets_and_items_are_dropped(self):
+        queue = [
+            {"player_id": 1, "item_type": "Cannon", "target_id": 99},
+            {"player_id": 1, "item_type": "Shield", "target_id": 2},
+        ]
+        self.assertEqual(resolve_round(queue, set(), self.players_by_id), {"deductions": {}, "hits": [], "blocked": []})
+
+
+class SessionStateFlushTests(SimpleTestCase):
+    async def test_failed_write_keeps_the_changes_for_the_next_flush(self):
+        session = SimpleNamespace(id=1, session_code="ABC123", game_id=1, host=SimpleNamespace(username="ann"), current_round=0)
+        session_state = SessionState(session, [SimpleNamespace(id=7, username="ann", score=0)], None)
+        session_state.score_ledger.add(7, 100)
+        session_state.set_round(1)
+
+        writes = []
+        def write_changes(score_deltas, current_round):
+            writes.append((score_deltas, current_round))
+            if len(writes) == 1:
+                raise RuntimeError("database is down")
+        session_state.write_changes = write_changes
+
+        with self.assertRaises(RuntimeError):
+            await session_state.flush()
+        session_state.score_ledger.add(7, 50)
+        await session_state.flush()
+
+        self.assertEqual(writes[1], ({7: 150}, 1))
+        self.assertEqual(session_state.get_player("ann")["score"], 150)
+
+
+class LocalRoomRegistryTests(SimpleTestCase):
+    async def test_duplicate_username_is_rejected(self):
+        registry = LocalRoomRegistry()
+        self.assertTrue(await registry.join("room", "channel-1", "ann"))
+        self.assertFalse(await registry.join("room", "channel-2", "ann"))
+        self.assertEqual(registry.local_count("room"), 1)
+
+    async def test_take_over_moves_the_username_from_a_silent_connection(self):
+        registry = LocalRoomRegistry()
+        await registry.join("room", "channel-1", "ann")
+
+        self.assertEqual(await registry.take_over("room", "channel-2", "ann", idle_after=0), (True, "channel-1"))
+        self.assertEqual(await registry.usernames("room"), ["ann"])
+        self.assertEqual(registry.local_count("room"), 2)
+
+    async def test_take_over_is_refused_while_the_connection_is_alive(self):
+        registry = LocalRoomRegistry()
+        await registry.join("room", "channel-1", "ann")
+        await registry.touch("room", "channel-1", "ann")
+
+        self.assertEqual(await registry.take_over("room", "channel-2", "ann", idle_after=60), (False, "channel-1"))
+        self.assertEqual(registry.local_count("room"), 1)
+
+    async def test_heartbeats_of_a_replaced_channel_do_not_count(self):
+        registry = LocalRoomRegistry()
+        await registry.join("room", "channel-1", "ann")
+        await registry.take_over("room", "channel-2", "ann", idle_after=0)
+        registry.heartbeats["room"]["ann"] = 0
+
+        await registry.touch("room", "channel-1", "ann")
+        self.assertEqual(await registry.take_over("room", "channel-3", "ann", idle_after=60), (True, "channel-2"))
+
+    async def test_leave_of_a_replaced_channel_keeps_the_username(self):
+        registry = LocalRoomRegistry()
+        await registry.join("room", "channel-1", "ann")
+        await registry.take_over("room", "channel-2", "ann", idle_after=0)
+
+        self.assertEqual(await registry.leave("room", "channel-1", "ann"), 1)
+        self.assertFalse(await registry.join("room", "channel-3", "ann"))
+        self.assertEqual(await registry.leave("room", "channel-2", "ann"), 0)
+        self.assertTrue(await registry.join("room", "channel-3", "ann"))
+
+
+class InMemoryEventLogTests(SimpleTestCase):
+    async def append_events(self, event_log, count):
+        for index in range(count):
+            await event_log.append("room", f'{{"type":"event","index":{index}}}')
+
+    async def test_since_returns_the_missed_frames(self):
+        event_log = InMemoryEventLog(capacity=5)
+        await self.append_events(event_log, 3)
+
+        self.assertEqual(await event_log.since("room", 1), [
+            '{"seq":2,"type":"event","index":1}',
+            '{"seq":3,"type":"event","index":2}',
+        ])
+        self.assertEqual(len(await event_log.since("room", 0)), 3)
+
+    async def test_since_when_up_to_date(self):
+        event_log = InMemoryEventLog()
+        self.assertEqual(await event_log.since("room", 0), [])
+        await self.append_events(event_log, 2)
+        self.assertEqual(await event_log.since("room", 2), [])
+
+    async def test_since_ahead_of_the_log(self):
+        # A client that saw a previous incarnation of the room
+        event_log = InMemoryEventLog()
+        await self.append_events(event_log, 2)
+        self.assertIsNone(await event_log.since("room", 5))
+
+    async def test_since_past_the_capacity(self):
+        event_log = InMemoryEventLog(capacity=3)
+        await self.append_events(event_log, 6)
+
+        self.assertIsNone(await event_log.since("room", 2))
+        self.assertEqual(len(await event_log.since("room", 3)), 3)
+
+
+class AnswerIngestorTests(SimpleTestCase):
+    def make_ingestor(self, max_pending=10):
+        # A long window so nothing is graded while the test runs
+        ingestor = AnswerIngestor(None, "room", None, None, window=60, max_pending=max_pending)
+        ingestor.open_question(0)
+        self.addCleanup(ingestor.cancel)
+        return ingestor
+
+    async def test_second_answer_is_a_duplicate(self):
+        ingestor = self.make_ingestor()
+        self.assertEqual(ingestor.submit(1, "a"), AnswerIngestor.ACCEPTED)
+        self.assertEqual(ingestor.submit(1, "b"), AnswerIngestor.DUPLICATE)
+        self.assertEqual(ingestor.pending, [(1, "a")])
+
+    async def test_full_queue_is_busy_and_can_be_retried(self):
+        ingestor = self.make_ingestor(max_pending=1)
+        self.assertEqual(ingestor.submit(1, "a"), AnswerIngestor.ACCEPTED)
+        self.assertEqual(ingestor.submit(2, "a"), AnswerIngestor.BUSY)
+
+        # A busy answer was not recorded, once the queue drains it goes through
+        ingestor.pending = []
+        self.assertEqual(ingestor.submit(2, "a"), AnswerIngestor.ACCEPTED)
+
+    async def test_next_question_accepts_everyone_again(self):
+        ingestor = self.make_ingestor()
+        ingestor.submit(1, "a")
+        ingestor.open_question(1)
+        self.assertEqual(ingestor.submit(1, "a"), AnswerIngestor.ACCEPTED)
+
+
+class SessionCodeAllocatorTests(SimpleTestCase):
+    def test_codes_do_not_repeat_over_the_whole_space(self):
+        allocator = SessionCodeAllocator(length=3)
+        codes = {allocator.next_code() for _ in range(allocator.space)}
+        self.assertEqual(len(codes), allocator.space)
+        self.assertTrue(all(len(code) == 3 for code in codes))
+
+    def test_codes_do_not_repeat_over_a_window(self):
+        allocator = SessionCodeAllocator()
+        codes = [allocator.next_code() for _ in range(10000)]
+        self.assertEqual(len(set(codes)), len(codes))
+
+    def test_consecutive_codes_are_not_a_fixed_step_apart(self):
+        allocator = SessionCodeAllocator(start=0)
+        values = [allocator.decode(allocator.next_code()) for _ in range(50)]
+        steps = {(after - before) % allocator.space for before, after in zip(values, values[1:])}
+        self.assertGreater(len(steps), 1)
+
+    def test_the_walk_depends_on_the_key(self):
+        first = SessionCodeAllocator(start=0, key=b'first')
+        second = SessionCodeAllocator(start=0, key=b'second')
+        self.assertNotEqual([first.next_code() for _ in range(5)], [second.next_code() for _ in range(5)])
+
+
+class ScoreLedgerApplyTests(TestCase):
+    def setUp(self):
+        self.session = hosted_session()
+        self.players = {username: Player.objects.create(session=self.session, username=username, score=score) for username, score in [("ann", 10), ("bob", 0), ("cid", 5)]}
+        self.stranger = Player.objects.create(session=hosted_session("other"), username="ann", score=7)
+
+    def scores(self):
+        return dict(Player.objects.filter(session=self.session).values_list('username', 'score'))
+
+    def test_deltas_land_in_one_update_scoped_to_the_session(self):
+        deltas = {self.players["ann"].id: 5, self.players["bob"].id: 5, self.players["cid"].id: -3, self.stranger.id: 100}
+        with self.assertNumQueries(1):
+            updated = ScoreLedger(self.session.id).apply(deltas)
+
+        self.assertEqual(updated, 3)
+        self.assertEqual(self.scores(), {"ann": 15, "bob": 5, "cid": 2})
+        self.stranger.refresh_from_db()
+        self.assertEqual(self.stranger.score, 7)
+
+    def test_scores_written_in_between_are_kept(self):
+        ledger = ScoreLedger(self.session.id)
+        ledger.add(self.players["ann"].id, 30)
+        pending = ledger.take()
+
+        # Another writer changes the row after the deltas were taken
+        Player.objects.filter(id=self.players["ann"].id).update(score=100)
+        ledger.apply(pending)
+
+        self.assertEqual(self.scores()["ann"], 130)
+
+    def test_write_changes_stores_scores_and_round_together(self):
+        session = GameSession.objects.select_related('host').get(id=self.session.id)
+        session_state = SessionState(session, Player.objects.filter(session=session), None)
+        session_state.score_ledger.add(self.players["bob"].id, 40)
+        session_state.set_round(3)
+
+        session_state.write_changes(session_state.score_ledger.take(), session_state.current_round)
+
+        self.assertEqual(self.scores()["bob"], 40)
+        self.assertEqual(GameSession.objects.get(id=self.session.id).current_round, 3)
+
+
+class JoinSessionTests(TestCase):
+    def setUp(self):
+        self.session = hosted_session()
+
+    def join(self, username, session_code=None):
+        return APIClient().post(reverse('join-session'), {"session_code": session_code or self.session.session_code, "username": username}, format='json')
+
+    def test_taken_username_is_refused_by_the_constraint(self):
+        first = self.join("ann")
+        second = self.join("ann")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data["player_id"], Player.objects.get(session=self.session, username="ann").id)
+        self.assertEqual(second.status_code, 409)
+        self.assertEqual(Player.objects.filter(session=self.session).count(), 1)
+
+    def test_unknown_session_is_not_found(self):
+        self.assertEqual(self.join("ann", session_code="ZZZZZZ").status_code, 404)
+
+
+class ReapSessionsCommandTests(TestCase):
+    def test_in_memory_layer_leaves_expiry_to_the_workers(self):
+        expired = hosted_session()
+        GameSession.objects.filter(id=expired.id).update(expires_at=timezone.now() - timedelta(minutes=1))
+        finished = hosted_session("old")
+        GameSession.objects.filter(id=finished.id).update(is_active=False, expires_at=timezone.now() - timedelta(days=3))
+
+        stderr = StringIO()
+        call_command('reap_sessions', stdout=StringIO(), stderr=stderr)
+
+        self.assertIn("channel layer is in memory", stderr.getvalue())
+        self.assertTrue(GameSession.objects.get(id=expired.id).is_active)
+        self.assertFalse(GameSession.objects.filter(id=finished.id).exists())
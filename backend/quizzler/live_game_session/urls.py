@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import JoinSessionView, HostGameView, EndGameSessionView, GetFinalScoresView
+from .views import JoinSessionView, HostGameView, EndGameSessionView, GetFinalScoresView, WebSocketMetricsView
 
 urlpatterns = [
     path('host-game/', HostGameView.as_view(), name='host-game'),
     path('end-session/<str:session_code>/', EndGameSessionView.as_view(), name='end-session'),
     path('join-session/', JoinSessionView.as_view(), name='join-session'),
     path('final-scores/<str:session_code>/', GetFinalScoresView.as_view(), name='final-scores'),
+    path('metrics/', WebSocketMetricsView.as_view(), name='websocket-metrics'),
 ]
\ No newline at end of file
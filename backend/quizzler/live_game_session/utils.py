@@ -1,9 +1,103 @@
+import hashlib
+import hmac
 import random
 import string
+import threading
+import logging
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from live_game_session.models import GameSession
 
+logger = logging.getLogger('quizzler.live_game_session.utils')
+
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+
+class SessionCodeAllocator:
+    """
+    Hands out session codes by walking a secret permutation of every possible code.
+
+    The n-th code is a keyed Feistel network applied to n and written in base 36. The
+    network permutes the smallest power of two covering alphabet**length codes, and
+    results outside the code space are fed through it again until they land inside
+    (cycle-walking), so one process never repeats a code until the whole space of about
+    two billion codes is used. Without the key, which is derived from SECRET_KEY, one
+    code says nothing about the codes handed out before or after it. Each process
+    starts at a random point of the walk, the unique constraint on session_code
+    catches the rare clash with another process or an old session.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, length=6, start=None, key=None):
+        self.length = length
+        self.space = len(CODE_ALPHABET) ** length
+        self.half_bits = ((self.space - 1).bit_length() + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.key = key if key is not None else hmac.new(settings.SECRET_KEY.encode(), b'quizzler.session_code', hashlib.sha256).digest()
+        self.counter = start if start is not None else random.SystemRandom().randrange(self.space)
+        self.lock = threading.Lock()
+
+    def round_value(self, round_index, half):
+        digest = hmac.new(self.key, bytes([round_index]) + half.to_bytes(8, 'big'), hashlib.sha256).digest()
+        return int.from_bytes(digest[:8], 'big') & self.half_mask
+
+    def feistel(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for round_index in range(self.ROUNDS):
+            left, right = right, left ^ self.round_value(round_index, right)
+        return (left << self.half_bits) | right
+
+    def permute(self, index):
+        value = self.feistel(index)
+        while value >= self.space:
+            value = self.feistel(value)
+        return value
+
+    def encode(self, index):
+        chars = []
+        for _ in range(self.length):
+            index, digit = divmod(index, len(CODE_ALPHABET))
+            chars.append(CODE_ALPHABET[digit])
+        return ''.join(reversed(chars))
+
+    def decode(self, code):
+        index = 0
+        for char in code:
+            index = index * len(CODE_ALPHABET) + CODE_ALPHABET.index(char)
+        return index
+
+    def next_code(self):
+        with self.lock:
+            n = self.counter
+            self.counter = (self.counter + 1) % self.space
+        return self.encode(self.permute(n))
+
+
+session_code_allocator = SessionCodeAllocator()
+
+
 def generate_unique_session_code(length=6):
-    while True:
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-        if not GameSession.objects.filter(session_code=code).exists():
-            return code
+    """
+    Returns the next code of the allocator without asking the database. Insert it with
+    create_game_session() so a clash is retried.
+    """
+    if length != session_code_allocator.length:
+        return SessionCodeAllocator(length).next_code()
+    return session_code_allocator.next_code()
+
+
+def create_game_session(host, game, attempts=5):
+    """
+    Creates a session with a freshly allocated code, retrying with the next code if the
+    unique constraint on session_code rejects it.
+    """
+    for attempt in range(attempts):
+        session_code = generate_unique_session_code()
+        try:
+            with transaction.atomic():
+                return GameSession.objects.create(host=host, game=game, session_code=session_code)
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+            logger.info(f"[SESSION_CODE] Code {session_code} already taken, retrying (attempt {attempt + 1})")
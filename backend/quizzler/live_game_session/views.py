@@ -1,10 +1,12 @@
 from django.utils import timezone
+from django.db import IntegrityError, transaction
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from live_game_session.models import GameSession, Player
 from live_game_session.serializers import JoinSessionSerializer, HostGameSerializer
-from live_game_session.utils import generate_unique_session_code
+from live_game_session.utils import create_game_session
+from live_game_session import metrics
 from games.models import Game
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
@@ -22,12 +24,7 @@ class HostGameView(APIView):
         if not game:
             return Response({'error': 'Game not found or not owned by user'}, status=404)
 
-        session_code = generate_unique_session_code()
-        session = GameSession.objects.create(
-            host=request.user,
-            game=game,
-            session_code=session_code
-        )
+        session = create_game_session(request.user, game)
 
         Player.objects.create(session=session, username=request.user.username)
 
@@ -74,11 +71,13 @@ class JoinSessionView(APIView):
         except GameSession.DoesNotExist:
             return Response({'error': 'Session not found'}, status=404)
 
-        if Player.objects.filter(session=session, username=username).exists():
+        # The unique constraint on (session, username) decides, a separate exists() check could race
+        try:
+            with transaction.atomic():
+                player = Player.objects.create(session=session, username=username)
+        except IntegrityError:
             return Response({'error': 'Username already taken in this session'}, status=409)
 
-        player = Player.objects.create(session=session, username=username)
-
         return Response({'player_id': player.id})
 
 class GetFinalScoresView(APIView):
@@ -95,4 +94,14 @@ class GetFinalScoresView(APIView):
             return Response({"scores": scores}, status=200)
 
         except GameSession.DoesNotExist:
-            return Response({"error": "Session not found."}, status=404)
\ No newline at end of file
+            return Response({"error": "Session not found."}, status=404)
+
+
+class WebSocketMetricsView(APIView):
+    """
+    Message counters of the worker that serves the request, including traffic dropped by the websocket limits.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
@@ -95,12 +95,126 @@ CORS_ALLOWED_ORIGINS = [
 
 ASGI_APPLICATION = 'quizzler.routing.application'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+load_dotenv()
+
+# With REDIS_URL set, group messages, room membership, item state and the event log are shared through Redis so
+# more than one ASGI worker can serve the same session. Without it everything stays in-process.
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [REDIS_URL],
+            },
+        }
+    }
+    ROOM_REGISTRY = {
+        "BACKEND": "live_game_session.rooms.RedisRoomRegistry",
+        "CONFIG": {
+            "url": REDIS_URL,
+        },
+    }
+    ITEM_STATE_STORE = {
+        "BACKEND": "live_game_session.item_store.RedisItemStateStore",
+        "CONFIG": {
+            "url": REDIS_URL,
+        },
+    }
+    EVENT_LOG = {
+        "BACKEND": "live_game_session.event_log.RedisEventLog",
+        "CONFIG": {
+            "url": REDIS_URL,
+            "capacity": 256,
+        },
+    }
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
     }
+    ROOM_REGISTRY = {
+        "BACKEND": "live_game_session.rooms.LocalRoomRegistry",
+    }
+    ITEM_STATE_STORE = {
+        "BACKEND": "live_game_session.item_store.InMemoryItemStateStore",
+    }
+    # Most recent session events kept for clients that reconnect
+    EVENT_LOG = {
+        "BACKEND": "live_game_session.event_log.InMemoryEventLog",
+        "CONFIG": {
+            "capacity": 256,
+        },
+    }
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a serialized game stays in the cache, entries are keyed by game version so edits need no invalidation
+GAME_CACHE_TIMEOUT = 60 * 60
+
+# Seconds after which the public catalog index of a worker picks up games edited on other workers
+CATALOG_SYNC_INTERVAL = 30
+
+# Number of compiled question packs (games) kept in memory for live sessions
+QUESTION_PACK_CACHE_SIZE = 256
+
+# Questions validated and inserted per transaction by question bank imports, and how many bad rows are reported
+GAME_IMPORT_CHUNK_SIZE = 500
+GAME_IMPORT_MAX_ERRORS = 50
+
+# Seconds over which answers are collected and graded as one batch
+ANSWER_BATCH_WINDOW = 0.2
+# Answers waiting for grading before new ones are refused as busy
+ANSWER_QUEUE_LIMIT = 1000
+
+# Seconds each question stays open for answers before the server moves on
+ROUND_DURATION = 30
+
+# Chat lines sent within CHAT_BATCH_WINDOW seconds go out as one frame, the last CHAT_HISTORY_SIZE
+# lines are replayed to late joiners. With CHAT_PERSIST_HISTORY they are also saved when the session closes
+CHAT_BATCH_WINDOW = 0.25
+CHAT_HISTORY_SIZE = 100
+CHAT_PERSIST_HISTORY = False
+
+# Largest websocket text frame accepted, longer frames are dropped before parsing
+WEBSOCKET_MAX_FRAME_SIZE = 4096
+# Token buckets per connection as (messages per second, burst). "connection" covers every frame,
+# the others one message type each, types without an entry use "default"
+WEBSOCKET_RATE_LIMITS = {
+    "connection": (20, 40),
+    "default": (2, 5),
+    "chat_message": (1, 5),
+    "answer_submission": (2, 4),
+    "item_use": (2, 4),
+    "ping": (1, 3),
 }
 
+# Connections silent for PRESENCE_TIMEOUT seconds are closed, clients ping every 25 seconds
+PRESENCE_TIMEOUT = 60
+PRESENCE_SWEEP_INTERVAL = 15
+# A resuming client only takes its username over from a connection silent for this many seconds
+PRESENCE_TAKEOVER_AFTER = 40
+# Seconds over which joins and leaves are merged into one presence broadcast
+PRESENCE_BROADCAST_WINDOW = 0.5
+
+# Expired sessions are deactivated and finished ones purged after SESSION_RETENTION seconds by the
+# reap_sessions command, or every SESSION_REAPER_INTERVAL seconds inside a worker when that is set.
+# Without Redis the channel layer lives in the worker, only a reaper inside it can close the sockets
+SESSION_REAPER_INTERVAL = None if REDIS_URL else 60
+SESSION_REAPER_BATCH_SIZE = 500
+SESSION_RETENTION = 24 * 60 * 60
+
 ROOT_URLCONF = 'quizzler.urls'
 
 TEMPLATES = [
@@ -124,8 +238,6 @@ WSGI_APPLICATION = 'quizzler.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-load_dotenv()
-
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.mysql',
@@ -1,31 +1,17 @@
-import React, { useState, useEffect } from "react";
+import React, { useState } from "react";
 import { useWebSocket } from "../../context/WebSocketContext";
 
 const ChatBox = () => {
-  const { sendMessage, isConnected } = useWebSocket();
+  // Chat lives in the context so it survives moving from the lobby to the game
+  const { sendMessage, isConnected, chatMessages: messages } = useWebSocket();
   const [message, setMessage] = useState("");
-  const [messages, setMessages] = useState([]);
   const playerName = sessionStorage.getItem("playerName");
 
-  useEffect(() => {
-    const handleChatMessage = (e) => {
-      const { username, message } = e.detail;
-      setMessages((prev) => [...prev, { username, message }]);
-    };
-
-    window.addEventListener("chatMessage", handleChatMessage);
-
-    return () => {
-      window.removeEventListener("chatMessage", handleChatMessage);
-    };
-  }, []);
-
   const handleSendMessage = () => {
     if (!message.trim() || !isConnected) return;
 
     const chatMessage = {
       type: "chat_message",
-      username: playerName,
       message,
     };
 
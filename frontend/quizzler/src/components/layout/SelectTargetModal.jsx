@@ -1,7 +1,7 @@
 // src/components/layout/SelectTargetModal.jsx
 import React from 'react';
 
-const SelectTargetModal = ({ players, currentPlayer, onSelect, onClose }) => {
+const SelectTargetModal = ({ players, currentPlayer, itemCounts = {}, onSelect, onClose }) => {
   return (
     <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center">
       <div className="bg-white p-6 rounded-lg shadow-md w-64">
@@ -17,6 +17,10 @@ const SelectTargetModal = ({ players, currentPlayer, onSelect, onClose }) => {
               onClick={() => onSelect(player.username)}
             >
               {player.username}
+              {/* Held items hint at who may have a Shield up */}
+              {itemCounts[player.username] !== undefined && (
+                <span className="ml-1 text-xs opacity-75">({itemCounts[player.username]} items)</span>
+              )}
             </button>
           ))}
         </div>
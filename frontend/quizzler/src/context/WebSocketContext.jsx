@@ -3,11 +3,25 @@ import { useNavigate } from "react-router-dom";
 
 const WebSocketContext = createContext();
 
+// Close code the server uses when the old connection of a resuming player is still alive,
+// the close reason is the number of seconds it must stay silent before it can be replaced
+const TAKEOVER_REFUSED_CLOSE_CODE = 4009;
+const MAX_RECONNECT_ATTEMPTS = 8;
+const MAX_RECONNECT_DELAY = 30000;
+
 export const WebSocketProvider = ({ children }) => {
   const socketRef = useRef(null);
   const pingIntervalRef = useRef(null);
+  // Dropped connections are reopened until the session ends, the player leaves or another tab takes over
+  const reconnectRef = useRef({ enabled: false, attempts: 0, takeoverRetried: false, timer: null });
   const [players, setPlayers] = useState([]);
+  const [onlinePlayers, setOnlinePlayers] = useState({});
+  const [chatMessages, setChatMessages] = useState([]);
   const [playerItems, setPlayerItems] = useState({});
+  const [itemCounts, setItemCounts] = useState({});
+  const itemsVersionRef = useRef(0);
+  // Sequence number of the last session event seen, sent back when reconnecting
+  const lastSeqRef = useRef(Number(sessionStorage.getItem("lastSeq")) || 0);
   const [isConnected, setIsConnected] = useState(false);
   const [sessionCode, setSessionCode] = useState(null);
   const [playerName, setPlayerName] = useState(null);
@@ -17,20 +31,42 @@ export const WebSocketProvider = ({ children }) => {
   const navigate = useNavigate();
   const WS_URL = import.meta.env.VITE_WS_URL;
 
+  // After a page reload, reopen the session this tab was in and resume from the last event seen
+  useEffect(() => {
+    const storedSessionCode = sessionStorage.getItem("sessionCode");
+    const storedPlayerName = sessionStorage.getItem("playerName");
+    if (storedSessionCode && storedPlayerName) {
+      connectWebSocket(storedSessionCode, storedPlayerName, sessionStorage.getItem("isHost") === "true");
+    }
+    return stopReconnecting;
+  }, []);
+
 
   const clearSessionData = () => {
     sessionStorage.removeItem("sessionCode");
     sessionStorage.removeItem("playerName");
     sessionStorage.removeItem("isHost");
     sessionStorage.removeItem("gameId");
+    sessionStorage.removeItem("lastSeq");
+    lastSeqRef.current = 0;
     setPlayers([]);
+    setOnlinePlayers({});
+    setItemCounts({});
+    setChatMessages([]);
     setIsConnected(false);
     setSessionCode(null);
     setPlayerName(null);
     setIsHost(false);
   };
 
+  const stopReconnecting = () => {
+    reconnectRef.current.enabled = false;
+    clearTimeout(reconnectRef.current.timer);
+    reconnectRef.current.timer = null;
+  };
+
   const disconnectWebSocket = () => {
+    stopReconnecting();
     if (socketRef.current) {
       console.log("Manually disconnecting WebSocket...");
       socketRef.current.close();
@@ -62,6 +98,39 @@ export const WebSocketProvider = ({ children }) => {
     }
   };
 
+  /**
+   * Schedule the next connection attempt after a dropped connection
+   */
+  const scheduleReconnect = (event, code, username, isHostFlag) => {
+    const reconnect = reconnectRef.current;
+    let delay;
+
+    if (event.code === TAKEOVER_REFUSED_CLOSE_CODE) {
+      // Our old connection still looks alive to the server, try once more after it has gone silent
+      if (reconnect.takeoverRetried) {
+        console.warn("This player is still connected elsewhere. Not reconnecting.");
+        stopReconnecting();
+        return;
+      }
+      reconnect.takeoverRetried = true;
+      delay = (Number(event.reason) || 40) * 1000 + 1000;
+    } else {
+      if (reconnect.attempts >= MAX_RECONNECT_ATTEMPTS) {
+        console.warn("Giving up reconnecting after", reconnect.attempts, "attempts");
+        stopReconnecting();
+        return;
+      }
+      delay = Math.min(1000 * 2 ** reconnect.attempts, MAX_RECONNECT_DELAY) * (0.5 + Math.random() / 2);
+      reconnect.attempts += 1;
+    }
+
+    console.log(`Reconnecting to session ${code} in ${Math.round(delay)} ms`);
+    reconnect.timer = setTimeout(() => {
+      reconnect.timer = null;
+      connectWebSocket(code, username, isHostFlag);
+    }, delay);
+  };
+
   /**
    * Establish WebSocket connection
    */
@@ -70,15 +139,24 @@ export const WebSocketProvider = ({ children }) => {
       console.warn("WebSocket connection aborted: Missing sessionCode or playerName");
       return;
     }
-    if (socketRef.current && socketRef.current.readyState === WebSocket.OPEN) {
+    if (socketRef.current && [WebSocket.CONNECTING, WebSocket.OPEN].includes(socketRef.current.readyState)) {
         console.warn("WebSocket is already open. Connection attempt aborted.");
         return;
       }
 
-    const wsURL = `${WS_URL}/ws/session/${code}/?username=${username}`;
+    // Reconnecting to the same session resumes from the last event seen
+    const resuming = sessionStorage.getItem("sessionCode") === code && sessionStorage.getItem("lastSeq") !== null;
+    if (!resuming) {
+      lastSeqRef.current = 0;
+    }
+    const resumeParam = resuming ? `&last_seq=${lastSeqRef.current}` : "";
+    const wsURL = `${WS_URL}/ws/session/${code}/?username=${username}${resumeParam}`;
     console.log("Connecting to WebSocket:", wsURL);
 
-    socketRef.current = new WebSocket(wsURL);
+    clearTimeout(reconnectRef.current.timer);
+    reconnectRef.current.enabled = true;
+    const socket = new WebSocket(wsURL);
+    socketRef.current = socket;
 
     socketRef.current.onopen = () => {
       console.log("WebSocket connected");
@@ -106,8 +184,15 @@ export const WebSocketProvider = ({ children }) => {
         const timestamp = new Date().toISOString();
         console.log(`[${timestamp}] WebSocket closed: Code ${event.code}, Reason: ${event.reason}`);
 
+        // A newer connection already replaced this one
+        if (socketRef.current !== socket) {
+          return;
+        }
         setIsConnected(false);
         stopPing();
+        if (reconnectRef.current.enabled) {
+          scheduleReconnect(event, code, username, isHostFlag);
+        }
       };
       
 
@@ -123,6 +208,14 @@ export const WebSocketProvider = ({ children }) => {
   const handleWebSocketMessage = (data) => {
     const { type } = data;
 
+    // Session events are numbered, anything already seen is a replay duplicate
+    if (data.seq !== undefined) {
+      if (data.seq <= lastSeqRef.current) {
+        return;
+      }
+      rememberSeq(data.seq);
+    }
+
     switch (type) {
       case "pong":
         console.log("Received pong from server");
@@ -131,10 +224,25 @@ export const WebSocketProvider = ({ children }) => {
         handleSessionEnded();
         break;
       case "player_list":
-        handlePlayerList(data.players);
+        // Joined the room, a later drop starts the backoff from the beginning
+        reconnectRef.current.attempts = 0;
+        reconnectRef.current.takeoverRetried = false;
+        handlePlayerList(data.players, data.online);
+        // Not resumed means missed events are gone, start counting from the server's current number
+        if (!data.resumed) {
+          rememberSeq(data.event_seq);
+        }
         break;
-      case "player_joined":
-        handlePlayerJoined(data);
+      case "session_snapshot":
+        handleSessionSnapshot(data);
+        break;
+      case "connection_replaced":
+        console.log("This session was opened in another connection.");
+        stopReconnecting();
+        stopPing();
+        break;
+      case "presence_update":
+        handlePresenceUpdate(data);
         break;
       case "game_started":
         handleGameStarted(data);
@@ -145,11 +253,23 @@ export const WebSocketProvider = ({ children }) => {
       case "update_scores":
         handleUpdateScores(data);
         break;
-      case "chat_message":
-        handleChatMessage(data);
+      case "answers_graded":
+        handleAnswersGraded(data);
+        break;
+      case "chat_batch":
+        setChatMessages((prev) => [...prev, ...data.messages]);
+        break;
+      case "chat_history":
+        setChatMessages(data.messages);
+        break;
+      case "player_items_sync":
+        handlePlayerItemsSync(data);
         break;
-      case "player_items":
-        handlePlayerItems(data);
+      case "player_items_delta":
+        handlePlayerItemsDelta(data);
+        break;
+      case "player_items_summary":
+        handlePlayerItemsSummary(data);
         break;
       case "game_ended":
         handleGameEnded(data);
@@ -157,16 +277,64 @@ export const WebSocketProvider = ({ children }) => {
       case "item_used":
         handleItemUsed(data);
         break;
+      case "round_effects":
+        handleRoundEffects(data);
+        break;
+      case "round_paused":
+        handleRoundTimer("roundPaused", data);
+        break;
+      case "round_resumed":
+        handleRoundTimer("roundResumed", data);
+        break;
+      case "answer_rejected":
+        console.warn("Answer rejected:", data.question_index, data.reason);
+        window.dispatchEvent(
+          new CustomEvent("answerRejected", { detail: { question_index: data.question_index, reason: data.reason } })
+        );
+        break;
       default:
         console.warn("Unhandled WebSocket message type:", type);
     }
   };
 
+  const rememberSeq = (seq) => {
+    lastSeqRef.current = seq;
+    sessionStorage.setItem("lastSeq", seq);
+  };
+
+  /**
+   * Handle session snapshot, sent on reconnect when the missed events are no longer available
+   */
+  const handleSessionSnapshot = (data) => {
+    const { phase, game_id, question_index, question_data, scores, time_remaining, paused } = data;
+    // A snapshot from the scheduler's worker can arrive after newer live events
+    if (data.event_seq > lastSeqRef.current) {
+      rememberSeq(data.event_seq);
+    }
+    setScores(scores);
+
+    if (phase === "ended") {
+      handleGameEnded({ scores });
+      return;
+    }
+
+    sessionStorage.setItem("gameId", game_id);
+    const storedSessionCode = sessionStorage.getItem("sessionCode");
+    if (window.location.pathname !== `/game/${storedSessionCode}`) {
+      navigate(`/game/${storedSessionCode}`);
+    }
+    handleQuestionBroadcast({ question_index, question_data, duration: time_remaining });
+    if (paused) {
+      handleRoundTimer("roundPaused", { question_index, time_remaining });
+    }
+  };
+
   /**
    * Handle session ended
    */
   const handleSessionEnded = () => {
     console.log("Session ended by host. Redirecting to dashboard...");
+    stopReconnecting();
     clearSessionData();
     navigate("/dashboard");
   };
@@ -174,7 +342,7 @@ export const WebSocketProvider = ({ children }) => {
   /**
    * Handle player list
    */
-  const handlePlayerList = (playersList) => {
+  const handlePlayerList = (playersList, online = []) => {
     const storedUsername = sessionStorage.getItem("playerName");
 
     const player = playersList.find((p) => p.username === storedUsername);
@@ -187,23 +355,29 @@ export const WebSocketProvider = ({ children }) => {
       id: p.id,
       name: p.username,
     })));
+    setOnlinePlayers(Object.fromEntries(online.map((name) => [name, true])));
   };
 
   /**
-   * Handle player joined
+   * Handle presence update, joins and leaves batched by the server
    */
-  const handlePlayerJoined = (data) => {
-    const { player_id, username } = data;
-    const storedUsername = sessionStorage.getItem("playerName");
-
-    // Set playerId if this is the current player
-    if (username === storedUsername) {
-      sessionStorage.setItem("playerId", player_id);
-    }
+  const handlePresenceUpdate = (data) => {
+    const { online, offline } = data;
 
+    // Players seen for the first time are added to the list
     setPlayers((prev) => {
-      const exists = prev.some((p) => p.id === player_id);
-      return exists ? prev : [...prev, { id: player_id, name: username }];
+      const known = new Set(prev.map((p) => p.id));
+      const joined = online
+        .filter((p) => !known.has(p.player_id))
+        .map((p) => ({ id: p.player_id, name: p.username }));
+      return joined.length ? [...prev, ...joined] : prev;
+    });
+
+    setOnlinePlayers((prev) => {
+      const next = { ...prev };
+      online.forEach((p) => { next[p.username] = true; });
+      offline.forEach((p) => { delete next[p.username]; });
+      return next;
     });
   };
 
@@ -235,12 +409,33 @@ export const WebSocketProvider = ({ children }) => {
    */
   const handleQuestionBroadcast = (data) => {
     //console.log("Question Broadcast Received in Global WebSocketContext:", data);
-    const { question_index, question_data } = data;
+    const { question_index, question_data, duration } = data;
+
+    sessionStorage.setItem("pendingQuestion", JSON.stringify({ question_index, question_data, duration }));
 
-    sessionStorage.setItem("pendingQuestion", JSON.stringify({ question_index, question_data }));
+    window.dispatchEvent(
+      new CustomEvent("questionBroadcast", { detail: { question_index, question_data, duration } })
+    );
+  };
 
+  /**
+   * Handle a graded batch of answers: progress for the open question plus the scores that changed
+   */
+  const handleAnswersGraded = (data) => {
+    const { question_index, answered, players } = data;
+    handleUpdateScoresDelta(data);
+    window.dispatchEvent(
+      new CustomEvent("answerProgress", { detail: { question_index, answered, players } })
+    );
+  };
+
+  /**
+   * Handle round paused / resumed by the host, the server owns the timer
+   */
+  const handleRoundTimer = (eventName, data) => {
+    const { question_index, time_remaining } = data;
     window.dispatchEvent(
-      new CustomEvent("questionBroadcast", { detail: { question_index, question_data } })
+      new CustomEvent(eventName, { detail: { question_index, time_remaining } })
     );
   };
 
@@ -254,19 +449,54 @@ export const WebSocketProvider = ({ children }) => {
   };
 
   /**
-   * Handle chat message
+   * Handle update scores delta (only the players whose score changed)
    */
-  const handleChatMessage = (data) => {
-    window.dispatchEvent(new CustomEvent("chatMessage", { detail: data }));
+  const handleUpdateScoresDelta = (data) => {
+    const { scores: changes } = data;
+    setScores((prev) => {
+      const merged = new Map(prev.map((p) => [p.username, p]));
+      changes.forEach((p) => merged.set(p.username, p));
+      return [...merged.values()].sort((a, b) => b.score - a.score);
+    });
+  };
+
+  /**
+   * Handle player items sync (full inventory of this player)
+   */
+  const handlePlayerItemsSync = (data) => {
+    const { player_id, items, version } = data;
+    console.log("Player Items Synced:", items, "version", version);
+    itemsVersionRef.current = version;
+    setPlayerItems((prev) => ({ ...prev, [player_id]: items }));
+  };
+
+  /**
+   * Handle player items delta (this player's inventory changed)
+   */
+  const handlePlayerItemsDelta = (data) => {
+    const { player_id, items, version } = data;
+
+    // Ignore deltas older than what we already have
+    if (version <= itemsVersionRef.current) {
+      return;
+    }
+
+    // A gap means a change was missed, ask the server for the full inventory
+    if (version > itemsVersionRef.current + 1) {
+      sendMessage({ type: "items_resync", version: itemsVersionRef.current });
+    }
+
+    console.log("Player Items Updated:", items, "version", version);
+    itemsVersionRef.current = version;
+    setPlayerItems((prev) => ({ ...prev, [player_id]: items }));
   };
 
   /**
-   * Handle player items
+   * Handle player items summary (item counts of other players)
    */
-  const handlePlayerItems = (data) => {
-    const { items } = data;
-    console.log("Player Items Updated:", items);
-    setPlayerItems(items);
+  const handlePlayerItemsSummary = (data) => {
+    const { counts } = data;
+    setItemCounts((prev) => ({ ...prev, ...counts }));
   };
 
   /**
@@ -291,6 +521,18 @@ export const WebSocketProvider = ({ children }) => {
   };
 
 
+  /**
+   * Handle round effects (item hits and blocks resolved at the end of a question)
+   */
+  const handleRoundEffects = (data) => {
+    const { hits, blocked } = data;
+    console.log("Round Effects:", hits, blocked);
+
+    window.dispatchEvent(
+      new CustomEvent("roundEffects", { detail: { hits, blocked } })
+    );
+  };
+
   /**
    * Handle game ended
    */
@@ -307,7 +549,7 @@ export const WebSocketProvider = ({ children }) => {
    * Context value
    */
   return (
-    <WebSocketContext.Provider value={{ connectWebSocket, sendMessage, disconnectWebSocket, players, isConnected, isHost, scores, playerName, playerItems }}>
+    <WebSocketContext.Provider value={{ connectWebSocket, sendMessage, disconnectWebSocket, players, onlinePlayers, chatMessages, isConnected, isHost, scores, playerName, playerItems, itemCounts }}>
       {children}
     </WebSocketContext.Provider>
   );
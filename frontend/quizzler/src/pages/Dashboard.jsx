@@ -11,6 +11,7 @@ const API_URL = import.meta.env.VITE_API_URL;
 
 const Dashboard = () => {
   const [games, setGames] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [quizToDelete, setQuizToDelete] = useState(null);
@@ -33,28 +34,30 @@ const Dashboard = () => {
     }
   }, []);
 
-  useEffect(() => {
-    const fetchGames = async () => {
-      try {
-        const response = await fetch(`${API_URL}/games/my-games/`, {
-          headers: {
-            Authorization: `Bearer ${localStorage.getItem('access_token')}`,
-          },
-        });
-
-        if (response.ok) {
-          const data = await response.json();
-          setGames(data);
-        } else {
-          console.error('Failed to fetch games');
-        }
-      } catch (err) {
-        setError(err.message);
-      } finally {
-        setLoading(false);
+  // The dashboard only needs titles, so it asks for summaries one page at a time
+  const fetchGames = async (url = `${API_URL}/games/my-games/?view=summary`, append = false) => {
+    try {
+      const response = await fetch(url, {
+        headers: {
+          Authorization: `Bearer ${localStorage.getItem('access_token')}`,
+        },
+      });
+
+      if (response.ok) {
+        const data = await response.json();
+        setGames((prev) => (append ? [...prev, ...data.results] : data.results));
+        setNextPage(data.next);
+      } else {
+        console.error('Failed to fetch games');
       }
-    };
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setLoading(false);
+    }
+  };
 
+  useEffect(() => {
     fetchGames();
   }, []);
 
@@ -144,6 +147,14 @@ const Dashboard = () => {
             </ul>
           )}
 
+          {nextPage && (
+            <div className="flex justify-center mt-4">
+              <Button variant="secondary" onClick={() => fetchGames(nextPage, true)}>
+                Load more
+              </Button>
+            </div>
+          )}
+
         </div>
       </div>
       
@@ -20,6 +20,9 @@ const GamePlay = () => {
   const [selectedAnswer, setSelectedAnswer] = useState(null);
   const [isAnswerSubmitted, setIsAnswerSubmitted] = useState(false);
   const [showTargetModal, setShowTargetModal] = useState(false);
+  const [isPaused, setIsPaused] = useState(false);
+  const [answerProgress, setAnswerProgress] = useState(null);
+  const lastAnswerRef = useRef(null);
 
   const [notifications, setNotifications] = useState([]);
 
@@ -27,7 +30,7 @@ const GamePlay = () => {
 
 
 
-  const { sendMessage, isConnected, disconnectWebSocket, scores, playerName, playerItems } = useWebSocket();
+  const { sendMessage, isConnected, disconnectWebSocket, scores, playerName, playerItems, isHost, players, itemCounts } = useWebSocket();
   const navigate = useNavigate();
 
   //const [items, setItems] = useState(["Cannon", "Shield"]);
@@ -36,6 +39,11 @@ const GamePlay = () => {
   const playerId = sessionStorage.getItem("playerId");
   const items = playerItems[playerId] || [];
 
+  // Item counts arrive keyed by player id, the target list shows usernames
+  const itemCountsByName = Object.fromEntries(
+    players.filter((p) => itemCounts[p.id] !== undefined).map((p) => [p.name, itemCounts[p.id]])
+  );
+
 
   
   
@@ -50,25 +58,57 @@ const GamePlay = () => {
     console.log("GamePlay.jsx useEffect mounted for questionBroadcast listener");
 
     const handleQuestionBroadcast = (e) => {
-      const { question_index, question_data } = e.detail;
+      const { question_index, question_data, duration } = e.detail;
       console.log("Received Question:", question_data);
 
       setCurrentQuestion(question_data);
       setQuestionIndex(question_index);
       setIsAnswerSubmitted(false);
       setSelectedAnswer(null);
-      startTimer(30);
+      setIsPaused(false);
+      setAnswerProgress(null);
+      // The server closes the question, the countdown here is only for display
+      startTimer(Math.ceil(duration ?? 30));
 
       console.log("Current Question Set:", question_data);
     };
 
     window.addEventListener("questionBroadcast", handleQuestionBroadcast);
 
+    const handleRoundPaused = (e) => {
+      clearInterval(timerRef.current);
+      timerRef.current = null;
+      setTimeRemaining(Math.ceil(e.detail.time_remaining));
+      setIsPaused(true);
+    };
+    window.addEventListener("roundPaused", handleRoundPaused);
+
+    const handleRoundResumed = (e) => {
+      setIsPaused(false);
+      startTimer(Math.ceil(e.detail.time_remaining));
+    };
+    window.addEventListener("roundResumed", handleRoundResumed);
+
+    const handleAnswerProgress = (e) => {
+      setAnswerProgress(e.detail);
+    };
+    window.addEventListener("answerProgress", handleAnswerProgress);
+
+    // The server is saturated, send the same answer again shortly
+    const handleAnswerRejected = (e) => {
+      const { question_index, reason } = e.detail;
+      const lastAnswer = lastAnswerRef.current;
+      if (reason === "busy" && lastAnswer && lastAnswer.questionIndex === question_index) {
+        setTimeout(() => sendMessage(lastAnswer), 250 + Math.random() * 500);
+      }
+    };
+    window.addEventListener("answerRejected", handleAnswerRejected);
+
     // Check for any pending question in sessionStorage
     const pendingQuestion = sessionStorage.getItem("pendingQuestion");
     if (pendingQuestion) {
-      const { question_index, question_data } = JSON.parse(pendingQuestion);
-      handleQuestionBroadcast({ detail: { question_index, question_data } });
+      const { question_index, question_data, duration } = JSON.parse(pendingQuestion);
+      handleQuestionBroadcast({ detail: { question_index, question_data, duration } });
       sessionStorage.removeItem("pendingQuestion");
     }
 
@@ -98,6 +138,33 @@ const GamePlay = () => {
     };
     window.addEventListener("itemUsed", handleItemUsed);
 
+    // Hits and blocks are resolved when the question ends, tell players what happened to them
+    const handleRoundEffects = (e) => {
+      const { hits, blocked } = e.detail;
+      const storedUsername = sessionStorage.getItem("playerName");
+      const messages = [];
+
+      hits.forEach(({ item_type, source_username, target_username, points }) => {
+        if (source_username === storedUsername) {
+          messages.push(`Your ${item_type} hit ${target_username} (${points} pts)`);
+        } else if (target_username === storedUsername) {
+          messages.push(`${source_username}'s ${item_type} hit you (${points} pts)`);
+        }
+      });
+      blocked.forEach(({ item_type, source_username, target_username }) => {
+        if (target_username === storedUsername) {
+          messages.push(`Your Shield blocked ${source_username}'s ${item_type}`);
+        } else if (source_username === storedUsername) {
+          messages.push(`${target_username}'s Shield blocked your ${item_type}`);
+        }
+      });
+
+      if (messages.length > 0) {
+        setNotifications((prevNotifications) => [...prevNotifications, ...messages]);
+      }
+    };
+    window.addEventListener("roundEffects", handleRoundEffects);
+
 
     const handleGameEnded = (e) => {
       console.log("Game Ended Event Received:", e.detail);
@@ -110,22 +177,23 @@ const GamePlay = () => {
 
     return () => {
       window.removeEventListener("questionBroadcast", handleQuestionBroadcast);
+      window.removeEventListener("roundPaused", handleRoundPaused);
+      window.removeEventListener("roundResumed", handleRoundResumed);
+      window.removeEventListener("answerProgress", handleAnswerProgress);
+      window.removeEventListener("answerRejected", handleAnswerRejected);
+      window.removeEventListener("itemUsed", handleItemUsed);
+      window.removeEventListener("roundEffects", handleRoundEffects);
       window.removeEventListener("gameEnded", handleGameEnded);
     };
   }, [navigate]);
 
   /**
-   * Handle Moving to Next Question
+   * Host round controls, the server advances questions on its own
    */
-  const handleNextQuestion = () => {
-    console.log("Handling next question...");
-    
-    // Send "next_question" message through WebSocket
-    const sessionCode = sessionStorage.getItem("sessionCode");
-    if (sessionCode && isConnected) {
-      const message = { type: "next_question" };
-      sendMessage(message);
-      console.log("Sent next_question message to backend:", message);
+  const sendRoundControl = (type) => {
+    if (isConnected) {
+      sendMessage({ type });
+      console.log("Sent round control to backend:", type);
     }
   };
 
@@ -155,8 +223,7 @@ const GamePlay = () => {
       if (timeLeft <= 0) {
         clearInterval(timerRef.current);
         timerRef.current = null;
-        console.log("Timer ended, moving to next question");
-        handleNextQuestion();
+        console.log("Timer ended, waiting for the next question");
         handleDisplayNotifications();
       }
     }, 1000);
@@ -166,7 +233,7 @@ const GamePlay = () => {
    * Handle Answer Selection
    */
   const handleSelectAnswer = (answerId) => {
-    if (isAnswerSubmitted || timeRemaining === 0) return;
+    if (isAnswerSubmitted || isPaused || timeRemaining === 0) return;
 
     setSelectedAnswer(answerId);
     setIsAnswerSubmitted(true);
@@ -183,6 +250,7 @@ const GamePlay = () => {
         sessionCode: sessionCode,
       };
 
+      lastAnswerRef.current = message;
       sendMessage(message);
       console.log("Sent answer_submission message to backend:", message);
     }
@@ -279,10 +347,27 @@ const GamePlay = () => {
           Question {questionIndex + 1}
         </div>
         <div className="bg-indigo-100 text-indigo-800 px-3 py-1 rounded-full font-medium">
-          {timeRemaining} seconds
+          {isPaused ? "Paused" : `${timeRemaining} seconds`}
         </div>
       </div>
 
+      {isHost && (
+        <div className="flex justify-end gap-2 mb-4">
+          <button
+            onClick={() => sendRoundControl(isPaused ? "resume_round" : "pause_round")}
+            className="bg-gray-100 hover:bg-gray-200 px-3 py-1 rounded"
+          >
+            {isPaused ? "Resume" : "Pause"}
+          </button>
+          <button
+            onClick={() => sendRoundControl("skip_round")}
+            className="bg-gray-100 hover:bg-gray-200 px-3 py-1 rounded"
+          >
+            Skip
+          </button>
+        </div>
+      )}
+
       <div className="text-right mb-4 text-sm text-indigo-700 font-semibold">
          Your Score: {scores.find(p => p.username === playerName)?.score ?? 0}
       </div>
@@ -319,6 +404,9 @@ const GamePlay = () => {
       {isAnswerSubmitted && (
         <div className="bg-green-100 border border-green-400 text-green-700 px-4 py-3 rounded text-center">
           Answer submitted! Waiting for other players...
+          {answerProgress && answerProgress.question_index === questionIndex && (
+            <span> ({answerProgress.answered}/{answerProgress.players} answered)</span>
+          )}
         </div>
       )}
 
@@ -375,6 +463,7 @@ const GamePlay = () => {
           <SelectTargetModal
             players={scores}
             currentPlayer={playerName}
+            itemCounts={itemCountsByName}
             onSelect={handleSelectTarget}
             onClose={() => setShowTargetModal(false)}
           />
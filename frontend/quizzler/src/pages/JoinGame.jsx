@@ -32,6 +32,13 @@ const JoinGame = () => {
       return;
     }
   
+    // This tab already joined the session under that name, reopen the socket and resume instead of joining again
+    if (sessionStorage.getItem('sessionCode') === gamePin && sessionStorage.getItem('playerName') === playerName) {
+      connectWebSocket(gamePin, playerName, sessionStorage.getItem('isHost') === 'true');
+      navigate(`/lobby/${gamePin}`);
+      return;
+    }
+
     try {
       const response = await fetch(`${API_URL}/live-game-session/join-session/`, {
         method: 'POST',
@@ -17,7 +17,7 @@ const Lobby = () => {
   const [showConfirmModal, setShowConfirmModal] = useState(false);
 
   // Access WebSocket context
-  const { connectWebSocket, disconnectWebSocket, sendMessage, players, isConnected, isHost } = useWebSocket();
+  const { connectWebSocket, disconnectWebSocket, sendMessage, players, onlinePlayers, isConnected, isHost } = useWebSocket();
   const navigate = useNavigate();
 
   /**
@@ -87,8 +87,10 @@ const Lobby = () => {
               <h2 className="text-lg font-semibold mb-2">Players in Lobby ({players.length})</h2>
               <div className="bg-gray-100 p-4 rounded-lg">
                 {players.map(player => (
-                  <div key={player.id} className="py-2 border-b border-gray-200 last:border-b-0">
+                  <div key={player.id} className="py-2 border-b border-gray-200 last:border-b-0 flex items-center gap-2">
+                    <span className={`inline-block h-2 w-2 rounded-full ${onlinePlayers[player.name] ? "bg-green-500" : "bg-gray-400"}`}></span>
                     {player.name}
+                    {!onlinePlayers[player.name] && <span className="text-xs text-gray-500">offline</span>}
                   </div>
                 ))}
               </div>